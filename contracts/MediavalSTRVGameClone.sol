@@ -0,0 +1,33 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/proxy/utils/Initializable.sol";
+import "./MediavalSTRVGameV3.sol";
+
+// Implementation of the game for minimal proxies (EIP-1167) created by MediavalSTRVGameFactory.
+// Constructor state is not shared with clones -> every clone sets its own state by initialize.
+// VRF coordinator and LINK token are immutable (part of the bytecode), i.e. shared by all clones.
+contract MediavalSTRVGameClone is MediavalSTRVGameV3, Initializable {
+
+    // the implementation itself is locked, it cannot be initialized
+    constructor(address _vrfCoordinator, address _linkToken)
+    MediavalSTRVGameV3(_vrfCoordinator, _linkToken, bytes32(0), 0)
+    initializer
+    {}
+
+    function initialize(
+        address admin,
+        string memory uri,
+        bytes32 _keyHash,
+        uint256 _fee,
+        uint256 _maxAvailableForPublicMint,
+        uint256[] memory _ratesForPublicMint
+    ) public initializer {
+        _setURI(uri);
+        _setupRole(DEFAULT_ADMIN_ROLE, admin);
+        _transferOwnership(admin);
+        _initializeGame(_keyHash, _fee);
+        _setParametersOfPublicMint(_maxAvailableForPublicMint, _ratesForPublicMint);
+    }
+}
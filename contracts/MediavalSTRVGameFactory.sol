@@ -0,0 +1,44 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/proxy/Clones.sol";
+import "./MediavalSTRVGameClone.sol";
+
+// Creates game instances (seasons, regions, ...) as minimal proxies of one MediavalSTRVGameClone implementation
+contract MediavalSTRVGameFactory {
+
+    address public immutable implementation;
+    address[] private games;
+
+    event GameCreated(address game, address admin);
+
+    constructor(address _implementation) {
+        implementation = _implementation;
+    }
+
+    // clone and initialize in one transaction -> nobody can initialize the clone before its admin
+    function createGame(
+        address admin,
+        string memory uri,
+        bytes32 keyHash,
+        uint256 fee,
+        uint256 maxAvailableForPublicMint,
+        uint256[] memory ratesForPublicMint
+    ) public returns (address game) {
+        game = Clones.clone(implementation);
+        MediavalSTRVGameClone(payable(game)).initialize(
+            admin, uri, keyHash, fee, maxAvailableForPublicMint, ratesForPublicMint
+        );
+        games.push(game);
+        emit GameCreated(game, admin);
+    }
+
+    function gamesCount() public view returns (uint256) {
+        return games.length;
+    }
+
+    function gameAt(uint256 index) public view returns (address) {
+        return games[index];
+    }
+}
@@ -27,11 +27,15 @@ contract MediavalSTRVGameV2 is BurningContract, Ownable, VRFConsumerBase {
     // Mapping from requestID to Knigt's address
     mapping(bytes32 => address) public RequestIdsToKnights;
     mapping(bytes32 => uint256) public RequestIdsToRandomness;
+    // Mapping from requestID to amount of gears burnt (i.e. number of rolls) within the request, 0 for a single roll
+    mapping(bytes32 => uint256) public RequestIdsToAmounts;
     
     // variable related to burning item in order to mint another item 
     uint256 public mintingThreshold = 80;
     uint256 public gearToBurn = SHIELD;
     uint256 public gearToMint = SWORD;
+    // max gears burnt by one batched request -> keeps fulfillRandomness within VRF callback gas limit
+    uint256 public constant MAX_BURN_BATCH = 100;
 
     // VRF coordinator variables
     bytes32 public keyHash;
@@ -39,6 +43,7 @@ contract MediavalSTRVGameV2 is BurningContract, Ownable, VRFConsumerBase {
 
     event RequestedRandomness(bytes32 requestId, address _knight);
     event FulfilledRandomness(bytes32 requestId, uint256 randomness, uint256 randomNumber);
+    event FulfilledBatchRandomness(bytes32 requestId, uint256 rolls, uint256 gearsWon);
     event ReceivedEther(address sender, uint256 amount);
 
     constructor(address _vrfCoordinator, address _linkToken, bytes32 _keyHash, uint256 _fee) 
@@ -99,15 +104,36 @@ contract MediavalSTRVGameV2 is BurningContract, Ownable, VRFConsumerBase {
         }
     }
     
+    // burn gears at once in order to try luck in getting different gear -> one VRF request for all burnt gears
+    function burnToGainGearBatch(uint256 id, uint256 amount) public {
+        require(0 <= id && id <= mintedTotal.length, "Gear does not exists!");
+        require(id == gearToBurn, "This gear cannot be burnt!");
+        require(0 < amount && amount <= MAX_BURN_BATCH, "Amount out of batch range");
+        address knight = msg.sender;
+        require(Knights[id][knight] >= amount, "There is nothing to burn");
+        Knights[id][knight] = Knights[id][knight].sub(amount);
+        _burn(knight, id, amount);
+        _requestLottery(knight, amount);
+    }
+    
     // Calling VRF Coordinator / Chainlink nodes in order to get a random number
     function sword_lottery(address knight) public returns (bytes32 requestId) {
         // set the burning account -> used in fullfillRandomnes to know, which account to add minted sword
         // setBurningAccount(msg.sender);
+        requestId = _requestLottery(knight, 1);
+    }
+
+    // one request for `amount` rolls, the random word is expanded in fulfillRandomness
+    function _requestLottery(address knight, uint256 amount) internal returns (bytes32 requestId) {
         // LINK is defined in constructor of vrfCoordinator
         require(LINK.balanceOf(address(this)) >= fee, "Not enough LINK - fill contract!");
         // call chainlink node by requestRandomness
         requestId = requestRandomness(keyHash, fee);
         RequestIdsToKnights[requestId] = knight;
+        // single rolls (the loop of burnToGainGear) are read as amount 0 -> no extra storage write
+        if (amount > 1) {
+            RequestIdsToAmounts[requestId] = amount;
+        }
         emit RequestedRandomness(requestId, knight);
     }
 
@@ -119,13 +145,29 @@ contract MediavalSTRVGameV2 is BurningContract, Ownable, VRFConsumerBase {
         require(_randomness > 0, "Randomness not found");
         uint256 generatedRandomNumber;
         address knight = RequestIdsToKnights[_requestId];
+        uint256 amount = RequestIdsToAmounts[_requestId];
         generatedRandomNumber = (_randomness % 100) + 1;
         RequestIdsToRandomness[_requestId] = _randomness;
         emit FulfilledRandomness(_requestId, _randomness, generatedRandomNumber);
-        // if generatedRandomNumber is less or equal to mintingThreshold, then mint new gear
-        if (generatedRandomNumber <= mintingThreshold) {
-            _mint(knight, gearToMint, 1, "");
-        }        
+        // single roll: if generatedRandomNumber is less or equal to mintingThreshold, then mint new gear
+        if (amount <= 1) {
+            if (generatedRandomNumber <= mintingThreshold) {
+                _mint(knight, gearToMint, 1, "");
+            }
+            return;
+        }
+        // batch: expand the random word into `amount` independent rolls, mint all winnings at once
+        uint256 gearsWon;
+        for (uint256 i = 0; i < amount; i++) {
+            uint256 roll = (uint256(keccak256(abi.encode(_randomness, i))) % 100) + 1;
+            if (roll <= mintingThreshold) {
+                gearsWon++;
+            }
+        }
+        emit FulfilledBatchRandomness(_requestId, amount, gearsWon);
+        if (gearsWon > 0) {
+            _mint(knight, gearToMint, gearsWon, "");
+        }
     }
 
     receive() external payable {
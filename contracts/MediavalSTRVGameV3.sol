@@ -0,0 +1,479 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/math/SafeMath.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/draft-EIP712.sol";
+import "@openzeppelin/contracts/utils/structs/BitMaps.sol";
+import "@chainlink/contracts/src/v0.8/VRFConsumerBase.sol";
+import "./BurningContract.sol";
+
+contract MediavalSTRVGameV3 is BurningContract, Ownable, VRFConsumerBase, EIP712 {
+
+    using SafeMath for uint256;
+    using BitMaps for BitMaps.BitMap;
+
+    uint256 public constant ARMOR = 0;
+    uint256 public constant SHIELD = 1;
+    uint256 public constant SWORD = 2;
+    uint256 public constant GEAR_COUNT = 3;
+
+    // Configuration read by mint and burn paths packed into one storage slot (248 bits), 
+    // getters below keep the interface of V2 (mintedPublicly(), mintingThreshold(), fee(), ...)
+    struct GameConfig {
+        uint64 mintedPublicly;
+        uint64 maxAvailableForPublicMint;
+        uint8 mintingThreshold;
+        uint8 gearToBurn;
+        uint8 gearToMint;
+        uint96 fee;
+    }
+    GameConfig private gameConfig;
+
+    /// @notice quote "There is no limit for the total supply of equipment" -> uint256 is limited, thus
+    /// decided to set max value; uint64 per gear keeps all three counters in one slot
+    uint64[GEAR_COUNT] private minted;
+    // rates in WEI, uint80 allows rates up to ~1.2M ether and keeps all three rates in one slot
+    uint80[GEAR_COUNT] private rates;
+
+    // Knight's balances are kept only by ERC1155 balances (see balanceOf)
+    // Pending VRF request packed into one slot, deleted once fulfilled (the outcome is kept in events only)
+    struct PendingRequest {
+        address knight;
+        uint96 amount;  // gears burnt (i.e. number of rolls) within the request, 0 for a single roll
+    }
+    mapping(bytes32 => PendingRequest) private pendingRequests;
+    // Pending requests of a knight are not counted on-chain (a per-knight counter would be set from zero
+    // by every burn and cleared by the VRF callback), clients read them from RequestedRandomness and
+    // FulfilledRandomness events (see scripts/indexer.py pending_requests)
+    
+    // max gears burnt by one batched request -> keeps fulfillRandomness within VRF callback gas limit
+    uint256 public constant MAX_BURN_BATCH = 100;
+
+    // Presale allowlist: root of merkle tree of leaves keccak256(abi.encodePacked(index, knight, id, amount)),
+    // claimed leaves are kept by index in a bitmap (256 claims per slot) -> see scripts/presale.py
+    bytes32 public presaleRoot;
+    BitMaps.BitMap private presaleClaimed;
+
+    // Signed orders (EIP-712) executed by a relayer paying gas, see scripts/relayer.py
+    struct Order {
+        address knight;
+        uint8 action;  // ORDER_MINT or ORDER_BURN
+        uint256 id;
+        uint256 amount;
+        uint256 nonce;  // orders of a knight are executed in the order of nonces
+        uint256 deadline;
+    }
+    bytes32 public constant ORDER_TYPEHASH = keccak256(
+        "Order(address knight,uint8 action,uint256 id,uint256 amount,uint256 nonce,uint256 deadline)"
+    );
+    uint8 public constant ORDER_MINT = 0;
+    uint8 public constant ORDER_BURN = 1;
+    mapping(address => uint256) public orderNonces;
+    // ETH prepaid by (or for) knights paying their mint orders, excluded from withdraw
+    mapping(address => uint256) public orderDeposits;
+    uint256 public totalOrderDeposits;
+
+    // VRF coordinator variables (fee is packed in gameConfig)
+    bytes32 public keyHash;
+
+    event RequestedRandomness(bytes32 requestId, address _knight);
+    event FulfilledRandomness(bytes32 requestId, uint256 randomness, uint256 randomNumber);
+    event FulfilledBatchRandomness(bytes32 requestId, uint256 rolls, uint256 gearsWon);
+    event ReceivedEther(address sender, uint256 amount);
+    // parameters changed -> off-chain caches of the getters are invalidated by these events
+    event PresaleRootSet(bytes32 root);
+    event PresaleClaimed(uint256 index, address knight, uint256 id, uint256 amount);
+    event PublicMintParametersSet(uint256 maxAvailableForPublicMint, uint256[] ratesForPublicMint);
+    event BurnGearParametersSet(uint256 mintingThreshold, uint256 gearToBurn, uint256 gearToMint);
+    event OrderDepositChanged(address knight, uint256 deposit);
+    event OrderExecuted(address knight, uint256 nonce);
+    event OrderFailed(address knight, uint256 nonce, string reason);
+
+    constructor(address _vrfCoordinator, address _linkToken, bytes32 _keyHash, uint256 _fee) 
+    BurningContract("https://address-of-some-strv-server.io/{id}.json") 
+    VRFConsumerBase(_vrfCoordinator, _linkToken)
+    EIP712("MediavalSTRVGame", "1")
+    {    
+        _setupRole(DEFAULT_ADMIN_ROLE, _msgSender());
+        _initializeGame(_keyHash, _fee);
+    } 
+
+    // default parameters of the game, shared by the constructor and initializer of clones (see MediavalSTRVGameClone)
+    function _initializeGame(bytes32 _keyHash, uint256 _fee) internal {
+        keyHash = _keyHash;
+        // variables related to burning item in order to mint another item 
+        gameConfig = GameConfig({
+            mintedPublicly: 0,
+            maxAvailableForPublicMint: 1000,
+            mintingThreshold: 80,
+            gearToBurn: uint8(SHIELD),
+            gearToMint: uint8(SWORD),
+            fee: SafeCast.toUint96(_fee)
+        });
+        rates = [uint80(0.1 ether), uint80(0.1 ether), uint80(0.1 ether)];
+    }
+
+    function mintedTotal(uint256 id) public view returns (uint256) {
+        return minted[id];
+    }
+
+    function mintedPublicly() public view returns (uint256) {
+        return gameConfig.mintedPublicly;
+    }
+
+    function maxAvailableForPublicMint() public view returns (uint256) {
+        return gameConfig.maxAvailableForPublicMint;
+    }
+
+    function ratesForPublicMint(uint256 id) public view returns (uint256) {
+        return rates[id];
+    }
+
+    function mintingThreshold() public view returns (uint256) {
+        return gameConfig.mintingThreshold;
+    }
+
+    function gearToBurn() public view returns (uint256) {
+        return gameConfig.gearToBurn;
+    }
+
+    function gearToMint() public view returns (uint256) {
+        return gameConfig.gearToMint;
+    }
+
+    function fee() public view returns (uint256) {
+        return gameConfig.fee;
+    }
+
+    function mint(address knight, uint256 id, uint256 amount) public {
+        require(hasRole(MINTER_ROLE, _msgSender()), "BurningContract: must have minter role to mint");
+        require(id < GEAR_COUNT, "Gear does not exists!");
+        minted[id] = SafeCast.toUint64(uint256(minted[id]) + amount);
+        _mint(knight, id, amount, "");
+    }
+
+    // Mint to many knights in one transaction (airdrop) -> the supply counters are written once
+    function airdrop(address[] memory knights, uint256[] memory ids, uint256[] memory amounts) public {
+        require(hasRole(MINTER_ROLE, _msgSender()), "BurningContract: must have minter role to mint");
+        require(knights.length == ids.length && ids.length == amounts.length, "Knights, ids and amounts length mismatch");
+        uint64[GEAR_COUNT] memory _minted = minted;
+        for (uint256 i = 0; i < knights.length; i++) {
+            require(ids[i] < GEAR_COUNT, "Gear does not exists!");
+            _minted[ids[i]] = SafeCast.toUint64(uint256(_minted[ids[i]]) + amounts[i]);
+            _mint(knights[i], ids[i], amounts[i], "");
+        }
+        minted = _minted;
+    }
+
+    // Public mint for everyone until max NFT capacity allowed is reached 
+    function publicMint(uint256 id, uint256 amount) public payable { 
+        require(id < GEAR_COUNT, "Gear does not exists!");
+        GameConfig memory _config = gameConfig;
+        uint256 _mintedPublicly = uint256(_config.mintedPublicly) + amount;
+        require(_mintedPublicly <= _config.maxAvailableForPublicMint, "Not enough supply left in public mint");
+        require(msg.value >= amount * rates[id], "Not enough ETH for transaction");
+        // cannot overflow, it is lower than maxAvailableForPublicMint
+        gameConfig.mintedPublicly = uint64(_mintedPublicly);
+        minted[id] = SafeCast.toUint64(uint256(minted[id]) + amount);
+        _mint(msg.sender, id, amount, "");
+    }
+
+    // Public mint of more gears at once -> price and public supply are checked in one pass, one TransferBatch
+    function publicMintBatch(uint256[] memory ids, uint256[] memory amounts) public payable {
+        require(ids.length == amounts.length, "Ids and amounts length mismatch");
+        GameConfig memory _config = gameConfig;
+        uint64[GEAR_COUNT] memory _minted = minted;
+        uint80[GEAR_COUNT] memory _rates = rates;
+        uint256 total;
+        uint256 price;
+        for (uint256 i = 0; i < ids.length; i++) {
+            require(ids[i] < GEAR_COUNT, "Gear does not exists!");
+            total += amounts[i];
+            price += amounts[i] * _rates[ids[i]];
+            _minted[ids[i]] = SafeCast.toUint64(uint256(_minted[ids[i]]) + amounts[i]);
+        }
+        uint256 _mintedPublicly = uint256(_config.mintedPublicly) + total;
+        require(_mintedPublicly <= _config.maxAvailableForPublicMint, "Not enough supply left in public mint");
+        require(msg.value >= price, "Not enough ETH for transaction");
+        // cannot overflow, it is lower than maxAvailableForPublicMint
+        gameConfig.mintedPublicly = uint64(_mintedPublicly);
+        minted = _minted;
+        _mintBatch(msg.sender, ids, amounts, "");
+    }
+
+    // Presale mint of allowlisted knights, the gears are paid by rates of public mint (not counted in its supply)
+    function presaleMint(uint256 index, uint256 id, uint256 amount, bytes32[] calldata proof) public payable {
+        require(id < GEAR_COUNT, "Gear does not exists!");
+        require(!presaleClaimed.get(index), "Presale already claimed");
+        bytes32 leaf = keccak256(abi.encodePacked(index, msg.sender, id, amount));
+        require(MerkleProof.verify(proof, presaleRoot, leaf), "Invalid presale proof");
+        require(msg.value >= amount * rates[id], "Not enough ETH for transaction");
+        presaleClaimed.set(index);
+        minted[id] = SafeCast.toUint64(uint256(minted[id]) + amount);
+        emit PresaleClaimed(index, msg.sender, id, amount);
+        _mint(msg.sender, id, amount, "");
+    }
+
+    function isPresaleClaimed(uint256 index) public view returns (bool) {
+        return presaleClaimed.get(index);
+    }
+
+    // indexes of a new allowlist must follow the indexes of the previous ones (claims are kept by index)
+    function setPresaleRoot(bytes32 root) external {
+        require(hasRole(DEFAULT_ADMIN_ROLE, _msgSender()), "BurningContract: must have admin role to change variables");
+        presaleRoot = root;
+        emit PresaleRootSet(root);
+    }
+
+    // ETH paying mint orders of the knight, the relayer pays gas only
+    function depositForOrders(address knight) public payable {
+        orderDeposits[knight] += msg.value;
+        totalOrderDeposits += msg.value;
+        emit OrderDepositChanged(knight, orderDeposits[knight]);
+    }
+
+    function withdrawOrderDeposit(uint256 amount) public {
+        require(orderDeposits[msg.sender] >= amount, "Not enough deposit");
+        orderDeposits[msg.sender] -= amount;
+        totalOrderDeposits -= amount;
+        emit OrderDepositChanged(msg.sender, orderDeposits[msg.sender]);
+        payable(msg.sender).transfer(amount);
+    }
+
+    // Execute orders signed by knights: mints are paid from deposits of knights (by public mint rates),
+    // burns request randomness once per order (as burnToGainGearBatch). Invalid orders are skipped
+    // (OrderFailed), so one bad order neither reverts the batch nor blocks later orders of other knights
+    function executeOrders(Order[] calldata orders, bytes[] calldata signatures) public {
+        require(orders.length == signatures.length, "Orders and signatures length mismatch");
+        GameConfig memory _config = gameConfig;
+        for (uint256 i = 0; i < orders.length; i++) {
+            Order calldata order = orders[i];
+            string memory reason = _useOrder(order, signatures[i]);
+            if (bytes(reason).length == 0) {
+                reason = order.action == ORDER_MINT ? _executeMintOrder(order, _config) : _executeBurnOrder(order, _config);
+            }
+            if (bytes(reason).length == 0) {
+                emit OrderExecuted(order.knight, order.nonce);
+            } else {
+                emit OrderFailed(order.knight, order.nonce, reason);
+            }
+        }
+        gameConfig.mintedPublicly = _config.mintedPublicly;
+    }
+
+    // check the order is signed by its knight and consume its nonce, returns the reason of failure (empty if used);
+    // orders signed by the knight consume the nonce even if they cannot be executed, so they cannot be replayed
+    // and later orders of the knight do not fail on it
+    function _useOrder(Order calldata order, bytes calldata signature) internal returns (string memory) {
+        if (block.timestamp > order.deadline) {
+            return "Order expired";
+        }
+        if (order.nonce != orderNonces[order.knight]) {
+            return "Invalid order nonce";
+        }
+        bytes32 digest = _hashTypedDataV4(keccak256(abi.encode(
+            ORDER_TYPEHASH, order.knight, order.action, order.id, order.amount, order.nonce, order.deadline
+        )));
+        (address signer, ECDSA.RecoverError error) = ECDSA.tryRecover(digest, signature);
+        if (error != ECDSA.RecoverError.NoError || signer != order.knight) {
+            return "Invalid order signature";
+        }
+        orderNonces[order.knight] = order.nonce + 1;
+        if (order.action > ORDER_BURN) {
+            return "Unknown order action";
+        }
+        if (order.id >= GEAR_COUNT) {
+            return "Gear does not exists!";
+        }
+        return "";
+    }
+
+    function _executeMintOrder(Order calldata order, GameConfig memory _config) internal returns (string memory) {
+        // maxAvailableForPublicMint >= mintedPublicly (see setParametersOfPublicMint) -> no underflow
+        if (order.amount > _config.maxAvailableForPublicMint - _config.mintedPublicly) {
+            return "Not enough supply left in public mint";
+        }
+        uint256 price = order.amount * rates[order.id];
+        if (orderDeposits[order.knight] < price) {
+            return "Not enough deposit for order";
+        }
+        orderDeposits[order.knight] -= price;
+        totalOrderDeposits -= price;
+        _config.mintedPublicly += uint64(order.amount);
+        minted[order.id] = SafeCast.toUint64(uint256(minted[order.id]) + order.amount);
+        _mint(order.knight, order.id, order.amount, "");
+        return "";
+    }
+
+    function _executeBurnOrder(Order calldata order, GameConfig memory _config) internal returns (string memory) {
+        if (order.id != _config.gearToBurn) {
+            return "This gear cannot be burnt!";
+        }
+        if (order.amount == 0 || order.amount > MAX_BURN_BATCH) {
+            return "Amount out of batch range";
+        }
+        if (balanceOf(order.knight, order.id) < order.amount) {
+            return "There is nothing to burn";
+        }
+        if (LINK.balanceOf(address(this)) < _config.fee) {
+            return "Not enough LINK - fill contract!";
+        }
+        _burn(order.knight, order.id, order.amount);
+        _requestLottery(order.knight, order.amount);
+        return "";
+    }
+
+    // domain separator of signed orders (includes chain id and address of the game)
+    function DOMAIN_SEPARATOR() public view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+
+    // get sum of all already minted gears
+    function getSum(uint256[] memory _arrayToSum) public returns (uint256) {
+        uint256 i;
+        uint256 sum = 0;
+        for (i = 0; i < _arrayToSum.length; i++) {
+            sum = sum.add(_arrayToSum[i]);
+        }
+        return sum;
+    }
+
+    // withdraw ETH sent to the contract (during public Mint for instance)
+    function withdraw() public {
+        require(hasRole(DEFAULT_ADMIN_ROLE, _msgSender()), "BurningContract: must have minter role to mint");
+        // deposits of knights for their orders are not withdrawn
+        uint256 balance = address(this).balance - totalOrderDeposits;
+        require(balance > 0, "Balance is zero, cannot withdraw");
+        payable(owner()).transfer(balance);
+    }
+
+    // burn gear in order to try luck in getting different gear 
+    function burnToGainGear(uint256 id, uint256 amount) public {
+        require(id < GEAR_COUNT, "Gear does not exists!");
+        require(id == gameConfig.gearToBurn, "This gear cannot be burnt!");
+        address knight = msg.sender;
+        require(balanceOf(knight, id) >= amount, "There is nothing to burn");
+        _burn(knight, id, amount);
+        for (uint i=1; i <= amount; i++) {
+            sword_lottery(knight);
+        }
+    }
+    
+    // burn gears at once in order to try luck in getting different gear -> one VRF request for all burnt gears
+    function burnToGainGearBatch(uint256 id, uint256 amount) public {
+        require(id < GEAR_COUNT, "Gear does not exists!");
+        require(id == gameConfig.gearToBurn, "This gear cannot be burnt!");
+        require(0 < amount && amount <= MAX_BURN_BATCH, "Amount out of batch range");
+        address knight = msg.sender;
+        require(balanceOf(knight, id) >= amount, "There is nothing to burn");
+        _burn(knight, id, amount);
+        _requestLottery(knight, amount);
+    }
+    
+    // Calling VRF Coordinator / Chainlink nodes in order to get a random number, internal: requests are
+    // paid by LINK of the game, so they can be made only for burnt gears
+    function sword_lottery(address knight) internal returns (bytes32 requestId) {
+        // set the burning account -> used in fullfillRandomnes to know, which account to add minted sword
+        // setBurningAccount(msg.sender);
+        requestId = _requestLottery(knight, 1);
+    }
+
+    // one request for `amount` rolls, the random word is expanded in fulfillRandomness
+    function _requestLottery(address knight, uint256 amount) internal returns (bytes32 requestId) {
+        uint256 _fee = gameConfig.fee;
+        // LINK is defined in constructor of vrfCoordinator
+        require(LINK.balanceOf(address(this)) >= _fee, "Not enough LINK - fill contract!");
+        // call chainlink node by requestRandomness
+        requestId = requestRandomness(keyHash, _fee);
+        // as in V2, single rolls are kept as amount 0 (read as one roll by fulfillRandomness)
+        pendingRequests[requestId] = PendingRequest(knight, uint96(amount > 1 ? amount : 0));
+        emit RequestedRandomness(requestId, knight);
+    }
+
+    // knight of the pending request, zero address once the request has been fulfilled
+    function RequestIdsToKnights(bytes32 requestId) public view returns (address) {
+        return pendingRequests[requestId].knight;
+    }
+
+    // Callback function used by VRF Coordinator / Chainlink node, i.e.:
+    // once chainlink node returns data to the smart contract calling function fulfillRandomness
+    // calculate random number from 1 to 100:
+    function fulfillRandomness(bytes32 _requestId, uint256 _randomness) internal override {
+        // check the response
+        require(_randomness > 0, "Randomness not found");
+        uint256 generatedRandomNumber;
+        PendingRequest memory request = pendingRequests[_requestId];
+        address knight = request.knight;
+        uint256 amount = request.amount;
+        require(knight != address(0), "Request not pending");
+        if (amount == 0) {
+            amount = 1;
+        }
+        // clear the request (gas refund), the outcome is kept in FulfilledRandomness event
+        delete pendingRequests[_requestId];
+        generatedRandomNumber = (_randomness % 100) + 1;
+        emit FulfilledRandomness(_requestId, _randomness, generatedRandomNumber);
+        GameConfig memory _config = gameConfig;
+        // single roll: if generatedRandomNumber is less or equal to mintingThreshold, then mint new gear
+        if (amount <= 1) {
+            if (generatedRandomNumber <= _config.mintingThreshold) {
+                _mint(knight, _config.gearToMint, 1, "");
+            }
+            return;
+        }
+        // batch: expand the random word into `amount` independent rolls, mint all winnings at once
+        uint256 gearsWon;
+        for (uint256 i = 0; i < amount; i++) {
+            uint256 roll = (uint256(keccak256(abi.encode(_randomness, i))) % 100) + 1;
+            if (roll <= _config.mintingThreshold) {
+                gearsWon++;
+            }
+        }
+        emit FulfilledBatchRandomness(_requestId, amount, gearsWon);
+        if (gearsWon > 0) {
+            _mint(knight, _config.gearToMint, gearsWon, "");
+        }
+    }
+
+    receive() external payable {
+        emit ReceivedEther(msg.sender, msg.value);
+    }
+
+    function setParametersOfPublicMint(uint256 _maxAvailableForPublicMint, uint256[] memory _ratesForPublicMint) 
+    external returns (bool) {
+        require(hasRole(DEFAULT_ADMIN_ROLE, _msgSender()), "BurningContract: must have admint role to change variables");
+        _setParametersOfPublicMint(_maxAvailableForPublicMint, _ratesForPublicMint);
+        return true;
+    }
+
+    function _setParametersOfPublicMint(uint256 _maxAvailableForPublicMint, uint256[] memory _ratesForPublicMint) internal {
+        require(_maxAvailableForPublicMint >= gameConfig.mintedPublicly, "New value must be higher than already minted tokens");
+        require(_ratesForPublicMint.length == GEAR_COUNT, "Rates must be set for every gear");
+        for (uint256 i = 0; i < GEAR_COUNT; i++) {
+            require(_ratesForPublicMint[i] <= type(uint80).max, "Rate is too high");
+            rates[i] = uint80(_ratesForPublicMint[i]);
+        }
+        gameConfig.maxAvailableForPublicMint = SafeCast.toUint64(_maxAvailableForPublicMint);
+        emit PublicMintParametersSet(_maxAvailableForPublicMint, _ratesForPublicMint);
+    }
+
+    function setBurnGearParameters(uint256 _mintingThreshold, uint256 _gearToBurn, uint256 _gearToMint) 
+    external returns (bool) {
+        require(hasRole(DEFAULT_ADMIN_ROLE, _msgSender()), "BurningContract: must have admin role to change variables");
+        require(0 < _mintingThreshold && _mintingThreshold <= 100, "Minting threshold must be in range from 1 to 100");
+        require(_gearToBurn < GEAR_COUNT, "Gear to burn does not exists!");
+        require(_gearToMint < GEAR_COUNT, "Gear to mint does not exists!");
+        GameConfig memory _config = gameConfig;
+        _config.mintingThreshold = uint8(_mintingThreshold);
+        _config.gearToBurn = uint8(_gearToBurn);
+        _config.gearToMint = uint8(_gearToMint);
+        gameConfig = _config;
+        emit BurnGearParametersSet(_mintingThreshold, _gearToBurn, _gearToMint);
+        return true;
+    }
+}
\ No newline at end of file
@@ -0,0 +1,294 @@
+from scripts.helpers import get_account, get_registered_contract, GEAR_MAPPING
+from scripts.deploy_game import deploy_nft_game, MINTER_ROLE
+from scripts.tx_report import recorder
+from brownie import MediavalSTRVGameV3, chain, exceptions, web3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+import csv, hashlib, json, os, time
+
+# csv with header address,id,amount; can be passed as argument: brownie run scripts/airdrop.py main <csv>
+AIRDROP_CSV = os.getenv("AIRDROP_CSV", "./airdrop/recipients.csv")
+# gas limit of one airdrop transaction, chunks are sized to fit into it
+AIRDROP_GAS_LIMIT = int(os.getenv("AIRDROP_GAS_LIMIT", "8000000"))
+# share of the gas limit filled by estimated gas of a chunk (estimates of later chunks may differ)
+GAS_SAFETY_MARGIN = 0.8
+# number of recipients used to estimate gas per recipient
+ESTIMATE_SAMPLE_SIZE = 20
+# max chunks sent before waiting for the oldest one
+MAX_PENDING_CHUNKS = 4
+# number of recipients checked concurrently for contract code
+CODE_CHECK_WORKERS = 8
+
+
+def main(csv_path=AIRDROP_CSV):
+    owner = get_account()
+    nft_game = get_registered_contract("nft_game", MediavalSTRVGameV3)
+    if nft_game is None:
+        nft_game = deploy_nft_game(owner, grants=[(MINTER_ROLE, owner)])
+    recipients = load_recipients(csv_path)
+    report = airdrop(nft_game, recipients, owner, checkpoint_file="{}.checkpoint.json".format(csv_path))
+    print_report(report)
+
+
+def load_recipients(csv_path):
+    """
+    Load and validate recipients of the airdrop
+
+    Args:
+        csv_path (string): csv file with header address,id,amount
+
+    Returns:
+        (list): (checksum address, gear id, amount) in the order of the file
+    """
+    recipients = []
+    with open(csv_path, newline="") as file:
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            id, amount = int(row["id"]), int(row["amount"])
+            if id not in GEAR_MAPPING or amount <= 0:
+                raise ValueError("{}:{} invalid gear id or amount: {}".format(csv_path, line, row))
+            recipients.append((Web3.toChecksumAddress(row["address"].strip()), id, amount))
+    return recipients
+
+
+def find_rejecting_recipients(nft_game, recipients, minter):
+    """
+    Recipients that are contracts not accepting the gear (e.g. without onERC1155Received), one of them
+    would revert its whole chunk. Every contract recipient is checked by a call of airdrop to it alone.
+
+    Returns:
+        (list): {index, address, reason} of rejecting recipients
+    """
+    addresses = sorted(set(knight for knight, _, _ in recipients))
+    with ThreadPoolExecutor(max_workers=CODE_CHECK_WORKERS) as executor:
+        contracts = set(
+            address for address, code in zip(addresses, executor.map(web3.eth.get_code, addresses)) if len(code)
+        )
+    rejected = []
+    for index, (knight, id, amount) in enumerate(recipients):
+        if knight not in contracts:
+            continue
+        try:
+            nft_game.airdrop.call(*_chunk_args([(knight, id, amount)]), {"from": minter})
+        except (exceptions.VirtualMachineError, ValueError) as error:
+            rejected.append({"index": index, "address": knight, "reason": getattr(error, "revert_msg", None) or str(error)})
+    return rejected
+
+
+def estimate_chunk_size(nft_game, recipients, minter, gas_limit=AIRDROP_GAS_LIMIT):
+    """
+    Number of recipients fitting into one transaction, gas per recipient is estimated from the first ones
+
+    Returns:
+        (int): the chunk size
+        (dict): estimated base gas, gas per recipient and gas of one mint call (one-by-one approach)
+    """
+    sample = recipients[:ESTIMATE_SAMPLE_SIZE]
+    gas_one = nft_game.airdrop.estimate_gas(*_chunk_args(sample[:1]), {"from": minter})
+    gas_sample = nft_game.airdrop.estimate_gas(*_chunk_args(sample), {"from": minter})
+    per_recipient = (gas_sample - gas_one) / (len(sample) - 1) if len(sample) > 1 else gas_one
+    base = max(gas_one - per_recipient, 0)
+    chunk_size = max(int((gas_limit * GAS_SAFETY_MARGIN - base) // per_recipient), 1)
+    knight, id, amount = recipients[0]
+    estimates = {
+        "base_gas": base,
+        "gas_per_recipient": per_recipient,
+        "gas_per_mint_call": nft_game.mint.estimate_gas(knight, id, amount, {"from": minter}),
+    }
+    return chunk_size, estimates
+
+
+def airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=AIRDROP_GAS_LIMIT):
+    """
+    Mint gears to recipients by chunked airdrop transactions, progress is checkpointed to disk
+    (nonce of a chunk is saved before it is sent, its tx hash before it is waited for), so a rerun
+    resumes without minting any chunk twice: a chunk is resent only with its original nonce.
+    Contract recipients rejecting the gear are left out of the chunks, a chunk reverted anyway is
+    split in halves, down to the single recipient which is recorded as rejected in the checkpoint
+
+    Args:
+        nft_game (contract): the game, minter must have MINTER_ROLE
+        recipients (list): (address, gear id, amount), see load_recipients
+        minter (Account): the sender of airdrop transactions
+        checkpoint_file (string): path of json checkpoint
+        gas_limit (int): gas limit of one transaction
+
+    Returns:
+        (dict): the report, see print_report
+
+    Raises:
+        ValueError: if no recipient accepts the gears or the checkpoint belongs to other airdrop
+    """
+    if not recipients:
+        raise ValueError("No recipients to airdrop to")
+    start = time.perf_counter()
+    recipients_hash = hashlib.sha256(json.dumps(recipients).encode()).hexdigest()
+    checkpoint = load_checkpoint(checkpoint_file)
+    if checkpoint and (checkpoint["recipients_hash"], checkpoint["game"]) != (recipients_hash, nft_game.address):
+        raise ValueError("Checkpoint {} belongs to other recipients or game".format(checkpoint_file))
+    if not checkpoint:
+        rejected = find_rejecting_recipients(nft_game, recipients, minter)
+        rejected_indexes = set(recipient["index"] for recipient in rejected)
+        accepted = [recipient for index, recipient in enumerate(recipients) if index not in rejected_indexes]
+        if not accepted:
+            raise ValueError("No recipient accepts the gears")
+        chunk_size, estimates = estimate_chunk_size(nft_game, accepted, minter, gas_limit)
+        checkpoint = {
+            "recipients_hash": recipients_hash,
+            "game": nft_game.address,
+            "minter": str(minter),
+            "estimates": estimates,
+            "rejected": rejected,
+            "chunks": _split_into_chunks(len(recipients), chunk_size, rejected_indexes),
+        }
+        save_checkpoint(checkpoint, checkpoint_file)
+    checkpoint.setdefault("rejected", [])
+    print("Airdrop to {} recipients in {} chunk(s), {} rejecting recipient(s) left out".format(
+        len(recipients), len(checkpoint["chunks"]), len(checkpoint["rejected"])
+    ))
+
+    # fresh nonces must not collide with nonces of chunks sent by previous runs
+    used_nonces = [chunk["nonce"] for chunk in checkpoint["chunks"] if chunk["nonce"] is not None]
+    next_nonce = max([web3.eth.get_transaction_count(str(minter), "pending")] + [n + 1 for n in used_nonces])
+    # reverted chunks are replaced by their halves -> repeated until all chunks are mined
+    while True:
+        chunks = [chunk for chunk in checkpoint["chunks"] if chunk["gas_used"] is None and not chunk.get("reverted")]
+        if not chunks:
+            break
+        pending = []  # (chunk, tx)
+        for chunk in chunks:
+            tx = _resume_chunk(chunk, checkpoint["minter"])
+            if tx is None:
+                if chunk["nonce"] is None:
+                    chunk["nonce"], next_nonce = next_nonce, next_nonce + 1
+                    chunk["tx_hash"] = None
+                    save_checkpoint(checkpoint, checkpoint_file)
+                tx = nft_game.airdrop(
+                    *_chunk_args(recipients[chunk["start"]:chunk["end"]]),
+                    {"from": minter, "nonce": chunk["nonce"], "gas_limit": gas_limit, "required_confs": 0},
+                )
+                recorder.submitted(tx, "MediavalSTRVGameV3.airdrop")
+                chunk["tx_hash"] = tx.txid
+                save_checkpoint(checkpoint, checkpoint_file)
+            pending.append((chunk, tx))
+            if len(pending) >= MAX_PENDING_CHUNKS:
+                _confirm_chunk(*pending.pop(0), recipients, checkpoint, checkpoint_file)
+        for chunk, tx in pending:
+            _confirm_chunk(chunk, tx, recipients, checkpoint, checkpoint_file)
+
+    seconds = time.perf_counter() - start
+    minted_chunks = [chunk for chunk in checkpoint["chunks"] if chunk["gas_used"] is not None]
+    minted = sum(chunk["end"] - chunk["start"] for chunk in minted_chunks)
+    gas_used = sum(chunk["gas_used"] for chunk in minted_chunks)
+    return {
+        "recipients": minted,
+        "rejected": checkpoint["rejected"],
+        "chunks": len(minted_chunks),
+        "seconds": seconds,
+        "recipients_per_sec": minted / seconds if seconds else 0,
+        "gas_used": gas_used,
+        "gas_per_recipient": gas_used / minted if minted else 0,
+        "gas_per_mint_call": checkpoint["estimates"]["gas_per_mint_call"],
+    }
+
+
+def print_report(report):
+    print("\nAirdropped to {} recipients in {} chunk(s) in {:.1f} s -> {:.1f} recipients/s".format(
+        report["recipients"], report["chunks"], report["seconds"], report["recipients_per_sec"]
+    ))
+    print("Gas per recipient: {:.0f} (one-by-one mint: {} -> {:.1%} saved)".format(
+        report["gas_per_recipient"], report["gas_per_mint_call"],
+        1 - report["gas_per_recipient"] / report["gas_per_mint_call"],
+    ))
+    for recipient in report["rejected"]:
+        print("Rejected by {} (line {}): {}".format(recipient["address"], recipient["index"] + 2, recipient["reason"]))
+
+
+def load_checkpoint(checkpoint_file):
+    if not Path(checkpoint_file).exists():
+        return None
+    with open(checkpoint_file) as file:
+        return json.load(file)
+
+
+def save_checkpoint(checkpoint, checkpoint_file):
+    # written to a temporary file first, so a crash does not leave a partial checkpoint
+    tmp_file = Path("{}.tmp".format(checkpoint_file))
+    with tmp_file.open("w") as file:
+        json.dump(checkpoint, file, indent=4)
+    tmp_file.replace(checkpoint_file)
+
+
+def _resume_chunk(chunk, minter):
+    """
+    Transaction of the chunk sent by a previous run if it is mined successfully or still pending,
+    None if the chunk needs to be (re)sent (with its nonce if it has one)
+
+    Raises:
+        ValueError: if the nonce of the chunk was used but its transaction is unknown, i.e. the run
+            crashed between sending the chunk and saving its tx hash (the chunk may have been minted)
+    """
+    if chunk["nonce"] is None:
+        return None
+    if chunk["tx_hash"] is not None:
+        try:
+            receipt = web3.eth.get_transaction_receipt(chunk["tx_hash"])
+        except TransactionNotFound:
+            receipt = None
+        if receipt is not None:
+            # mined, a reverted chunk is split by _confirm_chunk
+            return chain.get_transaction(chunk["tx_hash"])
+        try:
+            web3.eth.get_transaction(chunk["tx_hash"])
+            return chain.get_transaction(chunk["tx_hash"])  # still pending
+        except TransactionNotFound:
+            pass
+    if web3.eth.get_transaction_count(minter, "latest") > chunk["nonce"]:
+        raise ValueError("Nonce {} of chunk {}-{} was used by unknown transaction, check the airdrop manually".format(
+            chunk["nonce"], chunk["start"], chunk["end"]
+        ))
+    # dropped (or never sent) -> resent with the same nonce, at most one of its transactions is mined
+    return None
+
+
+def _confirm_chunk(chunk, tx, recipients, checkpoint, checkpoint_file):
+    tx.wait(1)
+    recorder.record(tx)
+    if tx.status == 1:
+        chunk["gas_used"] = tx.gas_used
+        save_checkpoint(checkpoint, checkpoint_file)
+        print("Chunk {}-{} mined ({} gas)".format(chunk["start"], chunk["end"], tx.gas_used))
+        return
+    # the reverted chunk stays in the checkpoint (its nonce is used), it is not sent again as is
+    chunk["reverted"] = True
+    if chunk["end"] - chunk["start"] > 1:
+        middle = (chunk["start"] + chunk["end"]) // 2
+        checkpoint["chunks"] += [_new_chunk(chunk["start"], middle), _new_chunk(middle, chunk["end"])]
+        print("Chunk {}-{} reverted ({}), split in halves".format(chunk["start"], chunk["end"], tx.txid))
+    else:
+        knight = recipients[chunk["start"]][0]
+        checkpoint["rejected"].append({"index": chunk["start"], "address": knight, "reason": tx.revert_msg})
+        print("Airdrop to {} reverted ({}): {}".format(knight, tx.txid, tx.revert_msg))
+    save_checkpoint(checkpoint, checkpoint_file)
+
+
+def _split_into_chunks(count, chunk_size, skipped_indexes):
+    # contiguous chunks of at most chunk_size recipients, skipped recipients end a chunk
+    chunks = []
+    start = None
+    for index in range(count + 1):
+        if start is not None and (index == count or index in skipped_indexes or index - start == chunk_size):
+            chunks.append(_new_chunk(start, index))
+            start = None
+        if start is None and index < count and index not in skipped_indexes:
+            start = index
+    return chunks
+
+
+def _new_chunk(start, end):
+    return {"start": start, "end": end, "tx_hash": None, "nonce": None, "gas_used": None}
+
+
+def _chunk_args(recipients):
+    return [knight for knight, _, _ in recipients], [id for _, id, _ in recipients], [amount for _, _, amount in recipients]
@@ -1,58 +1,210 @@
-from brownie import NFTMediavalSTRVGame, network
+from brownie import network
 from scripts.helpers import get_gear, GEAR_MAPPING
 from metadata.sample_metadata import metadata_template
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import json, os, requests
+import hashlib, io, json, os, requests, threading, time, uuid
 
 gear_to_image_uri = {
     "ARMOR": "https://gateway.pinata.cloud/ipfs/QmRqzvXBczpaEnECijuk1VZEkaBgoDi62JrcsYyue86s87?preview=1",
     "SHIELD": "https://gateway.pinata.cloud/ipfs/QmUQ3sEhcnSuyv4o4fBSyEGtecDbyGNrDHFy6N1a6V6XfJ?preview=1",
     "SWORD": "https://gateway.pinata.cloud/ipfs/QmeVH5pGYBbT793DbrZtG4XHRvz4UCdHbW337EEZTACS5L?preview=1",
 }
+# pinning endpoint can be replaced (e.g. by a local server in tests) by env variable PINATA_BASE_URL
+PINATA_BASE_URL = os.getenv("PINATA_BASE_URL", "https://api.pinata.cloud")
+# local cache of already pinned files: sha256 of file content -> IPFS hash (CID)
+PIN_CACHE_FILE = "./metadata/pin_cache.json"
+MAX_UPLOAD_WORKERS = 4
+# variants of gear image (see optimize_images) written into metadata properties
+IMAGE_VARIANTS = ["png", "webp", "thumbnail"]
+CHUNK_SIZE = 64 * 1024
 
 
 def main():
+    to_create = {}
     for token_id, gear in GEAR_MAPPING.items():
         id = "{0:064x}".format(token_id)
         metadata_filename = "./metadata/{}/{}.json".format(network.show_active(), id)
-        metadata_token = metadata_template
         if Path(metadata_filename).exists():
             print("{} already exists! Delete it to overwrite".format(metadata_filename))
         else:
-            print("Creating Metadata file: {}".format(metadata_filename))
-            metadata_token["name"] = gear
-            metadata_token["description"] = "STRV awesome {}".format(gear)
-            # @NOTE here would be a script uploading gear image to some server (ipfs, STRVs server, ...)
-            # let us pretend we have an image and we upload it to pinata
-            image_path = "./img/{}_{}.PNG".format(token_id, gear.upper())
-            # if we want to upload image to pinata ipfs server, else put links to gear_to_image_uri
-            image_uri = None
-            if os.getenv("UPLOAD_IMAGE_URI") == "True":
-                pinata_upload = upload_to_pinata(image_path)
-                ipfs_hash = pinata_upload["IpfsHash"]
-                image_uri = "https://gateway.pinata.cloud/ipfs/{}?preview=1".format(ipfs_hash)
-            image_uri = image_uri if image_uri else gear_to_image_uri[gear]
-            metadata_token["image"] = image_uri
-            # create json file of metadata
-            with open(metadata_filename, "w") as file:
-                json.dump(metadata_token, file)
-
-
-def upload_to_pinata(filepath):
-    PINATA_BASE_URL = "https://api.pinata.cloud"
+            to_create[token_id] = metadata_filename
+    # @NOTE here would be a script uploading gear image to some server (ipfs, STRVs server, ...)
+    # let us pretend we have an image and we upload it to pinata
+    image_paths = {
+        token_id: "./img/{}_{}.PNG".format(token_id, get_gear(token_id).upper()) for token_id in to_create
+    }
+    # if we want to upload image to pinata ipfs server, else put links to gear_to_image_uri
+    ipfs_hashes, variants = {}, {}
+    if os.getenv("UPLOAD_IMAGE_URI") == "True" and image_paths:
+        # imported here, Pillow is needed only when images are uploaded
+        from scripts.optimize_images import optimize_images
+        # recompressed PNG, WebP and thumbnail are pinned instead of the original image
+        variants = optimize_images(list(image_paths.values()))
+        variant_paths = [
+            variant[name] for variant in variants.values() for name in IMAGE_VARIANTS
+        ]
+        ipfs_hashes, _ = upload_files(variant_paths)
+    for token_id, metadata_filename in to_create.items():
+        gear = get_gear(token_id)
+        print("Creating Metadata file: {}".format(metadata_filename))
+        metadata_token = dict(metadata_template)
+        metadata_token["name"] = gear
+        metadata_token["description"] = "STRV awesome {}".format(gear)
+        variant = variants.get(image_paths[token_id])
+        if variant:
+            properties = {name: get_ipfs_uri(ipfs_hashes[variant[name]]) for name in IMAGE_VARIANTS}
+            metadata_token["image"] = properties["png"]
+            metadata_token["properties"] = properties
+        else:
+            metadata_token["image"] = gear_to_image_uri[gear]
+        # create json file of metadata
+        with open(metadata_filename, "w") as file:
+            json.dump(metadata_token, file)
+
+
+def upload_files(filepaths, base_url=None, cache_file=PIN_CACHE_FILE, max_workers=MAX_UPLOAD_WORKERS):
+    """
+    Upload files to pinata concurrently, files already pinned (by content) are skipped
+
+    Args:
+        filepaths (list): paths of files to be uploaded
+        base_url (string, optional): pinning API base url, defaults to PINATA_BASE_URL
+        cache_file (string): path of json cache mapping content hash to IPFS hash
+        max_workers (int): max number of concurrent uploads
+
+    Returns:
+        (dict): file path -> IPFS hash
+        (dict): statistics of the run (uploaded, skipped, seconds, files_per_sec, mb_per_sec)
+    """
+    start = time.perf_counter()
+    cache = load_pin_cache(cache_file)
+    cache_lock = threading.Lock()
+    # identical files are uploaded once even within a single run
+    hashes = {filepath: hash_file(filepath) for filepath in filepaths}
+    to_upload = {}
+    for filepath, content_hash in hashes.items():
+        if content_hash not in cache:
+            to_upload.setdefault(content_hash, filepath)
+
+    def upload(content_hash, filepath):
+        ipfs_hash = upload_to_pinata(filepath, base_url)["IpfsHash"]
+        # saved after every upload, so a failed upload does not lose files pinned before it
+        with cache_lock:
+            cache[content_hash] = ipfs_hash
+            save_pin_cache(cache, cache_file)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() re-raises upload errors
+        list(executor.map(upload, to_upload.keys(), to_upload.values()))
+
+    seconds = time.perf_counter() - start
+    uploaded_bytes = sum(os.path.getsize(filepath) for filepath in to_upload.values())
+    stats = {
+        "uploaded": len(to_upload),
+        "skipped": len(filepaths) - len(to_upload),
+        "seconds": seconds,
+        "files_per_sec": len(to_upload) / seconds if seconds else 0,
+        "mb_per_sec": uploaded_bytes / seconds / 1e6 if seconds else 0,
+    }
+    print("Uploaded {} file(s), skipped {} cached, {:.2f} files/s, {:.2f} MB/s".format(
+        stats["uploaded"], stats["skipped"], stats["files_per_sec"], stats["mb_per_sec"]
+    ))
+    return {filepath: cache[content_hash] for filepath, content_hash in hashes.items()}, stats
+
+
+def get_ipfs_uri(ipfs_hash):
+    return "https://gateway.pinata.cloud/ipfs/{}".format(ipfs_hash)
+
+
+def upload_to_pinata(filepath, base_url=None):
+    base_url = base_url if base_url else PINATA_BASE_URL
     endpoint = "/pinning/pinFileToIPFS"
     headers = {
         "pinata_api_key": os.getenv("PINATA_API_KEY"),
         "pinata_secret_api_key": os.getenv("PINATA_API_SECRET")
     }
-    filename = filepath.split("/")[-1:][0]
-    print(filename)
+    print(Path(filepath).name)
 
-    with Path(filepath).open("rb") as fp:
-        image_binary = fp.read()
+    # the multipart body is streamed from the file in chunks instead of being built in memory
+    with MultipartFileBody(filepath) as body:
         response = requests.post(
-            PINATA_BASE_URL + endpoint,
-            files={"file": (filename, image_binary)},
-            headers=headers
+            base_url + endpoint,
+            data=body,
+            headers={**headers, "Content-Type": body.content_type},
         )
-        return response.json()
\ No newline at end of file
+        response.raise_for_status()
+        return response.json()
+
+
+class MultipartFileBody:
+    """
+    multipart/form-data body with one file read in chunks by requests, its length is known upfront
+    (sent as Content-Length, not chunked)
+
+    Args:
+        filepath (string): path of the file
+        field (string): name of the form field
+    """
+
+    def __init__(self, filepath, field="file"):
+        boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={}".format(boundary)
+        head = (
+            '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).format(boundary, field, Path(filepath).name).encode()
+        tail = "\r\n--{}--\r\n".format(boundary).encode()
+        self._length = len(head) + os.path.getsize(filepath) + len(tail)
+        self._file = Path(filepath).open("rb")
+        self._parts = [io.BytesIO(head), self._file, io.BytesIO(tail)]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return iter(lambda: self.read(CHUNK_SIZE), b"")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._file.close()
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+
+def hash_file(filepath):
+    """
+    Sha256 of the file content, the file is read in chunks
+    """
+    sha256 = hashlib.sha256()
+    with Path(filepath).open("rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_pin_cache(cache_file=PIN_CACHE_FILE):
+    if not Path(cache_file).exists():
+        return {}
+    with open(cache_file) as file:
+        return json.load(file)
+
+
+def save_pin_cache(cache, cache_file=PIN_CACHE_FILE):
+    # written to a temporary file first, so a crash does not leave a partial cache
+    tmp_file = Path("{}.tmp".format(cache_file))
+    with tmp_file.open("w") as file:
+        json.dump(cache, file, indent=4, sort_keys=True)
+    tmp_file.replace(cache_file)
@@ -0,0 +1,128 @@
+from scripts.helpers import (
+    get_account, get_contract, get_registered_contract, record_deployment, deploy_proxy, NonceManager,
+    predict_contract_address, wait_for_transactions,
+)
+from brownie import MediavalSTRVGameV3, MediavalSTRVGameClone, MediavalSTRVGameFactory, network, config
+from web3 import Web3
+import time
+
+GAME_URI = "https://address-of-some-strv-server.io/{id}.json"
+MAX_AVAILABLE_FOR_PUBLIC_MINT = 1000
+RATES_FOR_PUBLIC_MINT = [Web3.toWei(0.1, "ether")] * 3
+INSTANCES = 5
+
+
+def main():
+    owner = get_account()
+    factory = get_registered_contract("game_factory", MediavalSTRVGameFactory)
+    if factory is None:
+        factory = deploy_game_factory(owner)
+    games = create_games(factory, owner, INSTANCES)
+    for game in games:
+        print("Game instance: {}".format(game.address))
+    print_deployment_gas(compare_deployment_gas(owner, factory))
+
+
+def deploy_game_factory(owner):
+    """
+    Deploy the (locked) game implementation and the factory of its clones back to back
+
+    Returns:
+        (contract): the factory
+    """
+    nonces = NonceManager()
+    submitted = time.monotonic()
+    implementation_params = nonces.tx_params(owner)
+    implementation_address = predict_contract_address(owner, implementation_params["nonce"])
+    implementation_tx = MediavalSTRVGameClone.deploy(
+        get_contract("vrf_coordinator").address, get_contract("link_token").address, implementation_params,
+    )
+    factory_tx = MediavalSTRVGameFactory.deploy(implementation_address, nonces.tx_params(owner))
+    wait_for_transactions([implementation_tx, factory_tx], submitted=submitted)
+    implementation = MediavalSTRVGameClone.at(implementation_address, owner, implementation_tx)
+    factory = MediavalSTRVGameFactory.at(factory_tx.contract_address, owner, factory_tx)
+    print("Game factory deployed to {} (implementation {})".format(factory.address, implementation.address))
+    record_deployment("game_implementation", implementation, implementation_tx)
+    record_deployment("game_factory", factory, factory_tx)
+    return factory
+
+
+def create_games(
+    factory,
+    owner,
+    count,
+    admin=None,
+    uri=GAME_URI,
+    key_hash=None,
+    fee=None,
+    max_available_for_public_mint=MAX_AVAILABLE_FOR_PUBLIC_MINT,
+    rates_for_public_mint=RATES_FOR_PUBLIC_MINT,
+):
+    """
+    Create game instances by the factory, all createGame transactions are sent back to back
+
+    Args:
+        factory (contract): the factory, see deploy_game_factory
+        owner (Account): the sender of createGame transactions
+        count (int): number of instances
+        admin (string, optional): admin and owner of the instances, defaults to owner
+        uri (string): ERC1155 URI of the instances
+        key_hash (bytes32, optional): VRF key hash, defaults to the network config
+        fee (int, optional): VRF fee (in WEI of LINK), defaults to the network config
+        max_available_for_public_mint (int): public mint supply of the instances
+        rates_for_public_mint (list): public mint rates (in WEI) per gear
+
+    Returns:
+        (list): the game instances (MediavalSTRVGameClone)
+    """
+    network_config = config["networks"][network.show_active()]
+    args = [
+        str(admin if admin else owner),
+        uri,
+        key_hash if key_hash else network_config["keyhash"],
+        fee if fee is not None else network_config["fee"],
+        max_available_for_public_mint,
+        rates_for_public_mint,
+    ]
+    # instances are independent -> gas of the first one is a safe limit for all of them
+    gas_limit = int(factory.createGame.estimate_gas(*args, {"from": owner}) * 1.2)
+    nonces = NonceManager()
+    submitted = time.monotonic()
+    txs = [factory.createGame(*args, nonces.tx_params(owner, gas_limit=gas_limit)) for _ in range(count)]
+    wait_for_transactions(txs, submitted=submitted)
+    return [
+        MediavalSTRVGameClone.at(tx.events["GameCreated"]["game"], owner, tx) for tx in txs
+    ]
+
+
+def compare_deployment_gas(owner, factory):
+    """
+    Deployment gas of one game instance: full deploy of the game, transparent proxy (ProxyAdmin,
+    proxy and initializer) and a clone created by the factory
+
+    Returns:
+        (dict): approach -> gas used
+    """
+    network_config = config["networks"][network.show_active()]
+    full_tx = MediavalSTRVGameV3.deploy(
+        get_contract("vrf_coordinator").address, get_contract("link_token").address,
+        network_config["keyhash"], network_config["fee"], {"from": owner},
+    ).tx
+    implementation = MediavalSTRVGameClone.at(factory.implementation())
+    proxy_admin, _, proxy = deploy_proxy(
+        owner, implementation, "MediavalSTRVGameClone", implementation.initialize,
+        str(owner), GAME_URI, network_config["keyhash"], network_config["fee"],
+        MAX_AVAILABLE_FOR_PUBLIC_MINT, RATES_FOR_PUBLIC_MINT,
+    )
+    clone_tx = create_games(factory, owner, 1)[0].tx
+    return {
+        "full deploy": full_tx.gas_used,
+        "transparent proxy": proxy_admin.tx.gas_used + proxy.tx.gas_used,
+        "clone": clone_tx.gas_used,
+    }
+
+
+def print_deployment_gas(gas):
+    print("\nDeployment gas per game instance:")
+    for approach, gas_used in gas.items():
+        print("{}: {} ({:.1%} of full deploy)".format(approach, gas_used, gas_used / gas["full deploy"]))
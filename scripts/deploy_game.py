@@ -1,6 +1,12 @@
-from scripts.helpers import LOCAL_BLOCKCHAIN_ENVIRONMENTS, fund_with_link, get_account, get_contract
+from scripts.helpers import (
+    LOCAL_BLOCKCHAIN_ENVIRONMENTS, NON_FORKED_LOCAL_BLOCKCHAIN_ENVIRONMENTS, fund_with_link, get_account, get_contract,
+    get_request_ids, wait_for_randomness, fulfill_randomness_locally, get_game_snapshot,
+    get_registered_contract, record_deployment, NonceManager, predict_contract_address, send_pending_call,
+    wait_for_transactions,
+)
+from scripts.tx_report import recorder, send_transaction
 from brownie import (
-    MediavalSTRVGameV2,
+    MediavalSTRVGameV2, MediavalSTRVGameV3,
     network, config, Contract, accounts,
 )
 from web3 import Web3
@@ -9,6 +15,8 @@ import time
 RATE = 0.1
 MINTER_ROLE = Web3.keccak(text="MINTER_ROLE")
 PAUSER_ROLE = Web3.keccak(text="PAUSER_ROLE")
+# gas limit of setup calls sent before the game is mined (they cannot be gas-estimated)
+SETUP_GAS_LIMIT = 300000
 
 dict_gear_to_id = {
     "ARMOR": 0,
@@ -17,25 +25,64 @@ dict_gear_to_id = {
 }
 
 
-def deploy_nft_game(owner):
-    nft_game_contract = MediavalSTRVGameV2.deploy(
-        get_contract("vrf_coordinator").address,
-        get_contract("link_token").address,
+def deploy_nft_game(owner, grants=(), mints=(), link_amount=Web3.toWei(2, "ether")):
+    """
+    Deploy the game, grant roles, mint gears and fund the game with LINK; all transactions are sent
+    back to back (calls of the game use its predicted address) and waited for together
+
+    Args:
+        owner (Account): the deployer and admin of the game
+        grants (list, optional): (role, account) pairs to be granted by owner
+        mints (list, optional): (knight, gear id, amount) to be minted by owner (needs MINTER_ROLE in grants)
+        link_amount (int): the amount (in WEI) of LINK to fund the game with
+
+    Returns:
+        (contract): the deployed game
+    """
+    # mocks (if any) are deployed before nonces of the flow are assigned
+    vrf_coordinator = get_contract("vrf_coordinator")
+    link_token = get_contract("link_token")
+    nonces = NonceManager()
+    submitted = time.monotonic()
+    deploy_params = nonces.tx_params(owner)
+    nft_game_address = predict_contract_address(owner, deploy_params["nonce"])
+    deploy_tx = MediavalSTRVGameV3.deploy(
+        vrf_coordinator.address,
+        link_token.address,
         config["networks"][network.show_active()]["keyhash"],
         config["networks"][network.show_active()]["fee"],
-        {"from": owner},
-        publish_source=config["networks"][network.show_active()].get("verify", False),
+        deploy_params,
         )
-    print("NFT Mediaval STRV Game deployed.")
+    txs = [deploy_tx]
+    for role, account in grants:
+        txs.append(send_pending_call(
+            nonces, owner, MediavalSTRVGameV3, nft_game_address, "grantRole", [role, str(account)], SETUP_GAS_LIMIT
+        ))
+    for knight, id, amount in mints:
+        txs.append(send_pending_call(
+            nonces, owner, MediavalSTRVGameV3, nft_game_address, "mint", [str(knight), id, amount], SETUP_GAS_LIMIT
+        ))
     # funding nft game contract with some LINK tokens for VRF
-    tx = fund_with_link(nft_game_contract.address, amount=Web3.toWei(2, "ether"))
-    tx.wait(1)
+    txs.append(link_token.transfer(nft_game_address, link_amount, nonces.tx_params(owner)))
+    wait_for_transactions(txs, submitted=submitted)
+    nft_game_contract = MediavalSTRVGameV3.at(nft_game_address, owner, deploy_tx)
+    print("NFT Mediaval STRV Game deployed.")
+    if config["networks"][network.show_active()].get("verify", False):
+        MediavalSTRVGameV3.publish_source(nft_game_contract)
+    record_deployment("nft_game", nft_game_contract, deploy_tx)
     return nft_game_contract
 
 
+def print_balances(nft_game, user):
+    snapshot = get_game_snapshot(nft_game, [(user, gear_id) for gear_id in dict_gear_to_id.values()])
+    for gear_id in dict_gear_to_id.values():
+        print("ID {}: {}".format(gear_id, snapshot.balance_of(user, gear_id)))
+    return snapshot
+
+
 def main():
     owner = admin = get_account()
-    nft_game_address = config["networks"][network.show_active()]["deployed_nft_game"]
+    nft_game_address = config["networks"][network.show_active()].get("deployed_nft_game")
 
     # if local deployment, a user needs to be defined, else get user account from .env
     if network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
@@ -43,24 +90,19 @@ def main():
     else:
         user = accounts.add(config["wallets"]["from_key_user"])
 
+    # if contract with current bytecode already deployed by this script, get it from the deployment registry,
     # if contract already deployed on rinkeby (needs to be defined in config in networks/rinkeby/deployed_nft_game), 
-    # get the contract from abi, else deploy it 
-    if nft_game_address:
+    # get the contract from abi (deployed version is V2), else deploy it 
+    nft_game = get_registered_contract("nft_game", MediavalSTRVGameV3)
+    if nft_game is None and nft_game_address:
         nft_game = Contract.from_abi(
             MediavalSTRVGameV2._name, nft_game_address, MediavalSTRVGameV2.abi
         ) 
-    else:
-        nft_game = deploy_nft_game(owner)
-        nft_game.grantRole(MINTER_ROLE, admin, {"from": admin})
-        nft_game.mint(user, 1, 10, {"from": admin})
+    if nft_game is None:
+        nft_game = deploy_nft_game(owner, grants=[(MINTER_ROLE, admin)], mints=[(user, 1, 10)])
     
     print("New balances after using burn to gain gear function...")
-    user_balance_0 = nft_game.balanceOf(user, dict_gear_to_id["ARMOR"])
-    print("ID {}: {}".format(dict_gear_to_id["ARMOR"], user_balance_0))
-    user_balance_1 = nft_game.balanceOf(user, dict_gear_to_id["SHIELD"])
-    print("ID {}: {}".format(dict_gear_to_id["SHIELD"], user_balance_1))
-    user_balance_2 = nft_game.balanceOf(user, dict_gear_to_id["SWORD"])
-    print("ID {}: {}".format(dict_gear_to_id["SWORD"], user_balance_2))
+    snapshot = print_balances(nft_game, user)
 
     print("\nFunding contract with LINK again..")
     fund_with_link(nft_game.address, amount=Web3.toWei(2, "ether"))
@@ -68,43 +110,50 @@ def main():
     print("\nSetting new parameters for public minting..")
     NEW_RATE = Web3.toWei("0.01", "ether")
     AMOUNT_FOR_PUBLIC_MINT = 3
-    NEW_MAX_AMOUNT_FOR_PUBLIC_MINT = nft_game.mintedPublicly() + AMOUNT_FOR_PUBLIC_MINT
+    NEW_MAX_AMOUNT_FOR_PUBLIC_MINT = snapshot.minted_publicly + AMOUNT_FOR_PUBLIC_MINT
 
-    nft_game.setParametersOfPublicMint(NEW_MAX_AMOUNT_FOR_PUBLIC_MINT, [NEW_RATE, NEW_RATE, NEW_RATE], {"from": admin})
+    send_transaction(
+        nft_game.setParametersOfPublicMint,
+        NEW_MAX_AMOUNT_FOR_PUBLIC_MINT, [NEW_RATE, NEW_RATE, NEW_RATE], {"from": admin}
+        )
 
     print("Setting new parameters for burn to gain gear function..")
     NEW_ITEM_TO_BURN = dict_gear_to_id["SHIELD"]
     ITEM_TO_GAIN = dict_gear_to_id["ARMOR"]
     NEW_THRESHOLD = 50
 
-    nft_game.setBurnGearParameters(NEW_THRESHOLD, NEW_ITEM_TO_BURN, ITEM_TO_GAIN, {"from": admin})
+    send_transaction(nft_game.setBurnGearParameters, NEW_THRESHOLD, NEW_ITEM_TO_BURN, ITEM_TO_GAIN, {"from": admin})
 
     print("Testing public minting..")
-    nft_game.publicMint(NEW_ITEM_TO_BURN, AMOUNT_FOR_PUBLIC_MINT, {"from": user, "value": NEW_RATE*AMOUNT_FOR_PUBLIC_MINT})
-    max_for_public_mint = nft_game.maxAvailableForPublicMint()
+    send_transaction(
+        nft_game.publicMint,
+        NEW_ITEM_TO_BURN, AMOUNT_FOR_PUBLIC_MINT, {"from": user, "value": NEW_RATE*AMOUNT_FOR_PUBLIC_MINT}
+        )
+    snapshot = get_game_snapshot(nft_game, [(user, NEW_ITEM_TO_BURN)])
+    max_for_public_mint = snapshot.max_available_for_public_mint
     print("Max for public mint should be {}: {}".format(
         NEW_MAX_AMOUNT_FOR_PUBLIC_MINT, max_for_public_mint == NEW_MAX_AMOUNT_FOR_PUBLIC_MINT
         ))
 
     print("\nTesting burn to gain gear function, it will take while...")
     WAIT_FOR_LINK_RESPONSE = 300
-    AMOUNT_TO_BURN = nft_game.balanceOf(user, NEW_ITEM_TO_BURN)
-    nft_game.burnToGainGear(NEW_ITEM_TO_BURN, AMOUNT_TO_BURN, {"from": user})
-    print("\nWaiting for Chainlink node response (set to: {} secs)".format(WAIT_FOR_LINK_RESPONSE))
-    time.sleep(WAIT_FOR_LINK_RESPONSE)
+    AMOUNT_TO_BURN = snapshot.balance_of(user, NEW_ITEM_TO_BURN)
+    tx = send_transaction(nft_game.burnToGainGear, NEW_ITEM_TO_BURN, AMOUNT_TO_BURN, {"from": user})
+    request_ids = get_request_ids(tx)
+    # no chainlink node on local network -> fulfill requests by VRF Coordinator mock
+    if network.show_active() in NON_FORKED_LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        fulfill_randomness_locally(nft_game, request_ids)
+    print("\nWaiting for Chainlink node response (timeout: {} secs)".format(WAIT_FOR_LINK_RESPONSE))
+    wait_for_randomness(nft_game, request_ids, from_block=tx.block_number, timeout=WAIT_FOR_LINK_RESPONSE)
 
     print("\nNew balances after using burn to gain gear function...")
-    user_balance_0 = nft_game.balanceOf(user, dict_gear_to_id["ARMOR"])
-    print("ID {}: {}".format(dict_gear_to_id["ARMOR"], user_balance_0))
-    user_balance_1 = nft_game.balanceOf(user, dict_gear_to_id["SHIELD"])
-    print("ID {}: {}".format(dict_gear_to_id["SHIELD"], user_balance_1))
-    user_balance_2 = nft_game.balanceOf(user, dict_gear_to_id["SWORD"])
-    print("ID {}: {}".format(dict_gear_to_id["SWORD"], user_balance_2))
+    print_balances(nft_game, user)
 
     print("\nReturning public minting parameters back")
     AMOUNT_TO_SET = 1000
     RATE_PUBLIC_MINT = Web3.toWei("0.1", "ether")
-    nft_game.setParametersOfPublicMint(
+    send_transaction(
+        nft_game.setParametersOfPublicMint,
         AMOUNT_TO_SET, [RATE_PUBLIC_MINT, RATE_PUBLIC_MINT, RATE_PUBLIC_MINT], {"from": admin}
         )
     max_for_public_mint = nft_game.maxAvailableForPublicMint()
@@ -115,14 +164,16 @@ def main():
     ITEM_TO_MINT = dict_gear_to_id["SWORD"]
     ORIGINAL_THRESHOLD = 80
 
-    nft_game.setBurnGearParameters(ORIGINAL_THRESHOLD, ITEM_TO_BURN, ITEM_TO_MINT, {"from": admin})
+    send_transaction(nft_game.setBurnGearParameters, ORIGINAL_THRESHOLD, ITEM_TO_BURN, ITEM_TO_MINT, {"from": admin})
 
     print("Testing witdrawal function...")
     balance_before = owner.balance()
-    nft_game.withdraw({"from": owner})
+    send_transaction(nft_game.withdraw, {"from": owner})
     balance_after = owner.balance()
     print("Withdrawal successful: {} (before: {}; after: {};".format(
         balance_before < balance_after, balance_before, balance_after
         ))
 
-
+    print("\nTransactions sent by the script:")
+    recorder.print_summary()
+    recorder.write_report()
@@ -0,0 +1,157 @@
+from brownie import web3
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+import os, threading
+
+# view functions whose values change only by the setters below (and are cached)
+CACHED_VIEWS = [
+    "ratesForPublicMint", "mintingThreshold", "gearToBurn", "gearToMint", "maxAvailableForPublicMint", "fee",
+    "keyHash",
+]
+SETTERS = ["setParametersOfPublicMint", "setBurnGearParameters"]
+# events emitted by the setters (V3 and later), V2 emits none -> its cache lives for one block only
+SETTER_EVENTS = ["PublicMintParametersSet", "BurnGearParametersSet"]
+# seconds between two polls of the block and event filters by the watcher thread (see CachedGame.start)
+POLL_INTERVAL = float(os.getenv("CACHE_POLL_INTERVAL", "0.5"))
+
+
+class CachedGame:
+    """
+    Caching read layer over the game contract handle. Parameter views (CACHED_VIEWS) are memoized
+    and the cache is invalidated by:
+        - setter transactions sent through this handle (immediately)
+        - new blocks containing setter events (a filter of the events), for games without setter
+          events (V2) by every new block (a block filter)
+    Values are read at the latest block seen by the filters, so a cached value is never older than a
+    parameter change the filters have seen. Once started, a watcher thread polls the filters and reads
+    cost no RPC calls; without the watcher the filters are polled before every read.
+    All other attributes are passed to the contract.
+
+    Usage:
+        with CachedGame(nft_game) as game:  # starts the watcher
+            price = game.ratesForPublicMint(0) * amount
+            game.setBurnGearParameters(50, 1, 2, {"from": admin})  # invalidates the cache
+
+    Args:
+        nft_game (contract): the game contract
+        poll_interval (float): seconds between two polls of the watcher
+    """
+
+    def __init__(self, nft_game, poll_interval=POLL_INTERVAL):
+        self.contract = nft_game
+        self.poll_interval = poll_interval
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._cache = {}
+        self._topics = [
+            Web3.toHex(event_abi_to_log_topic(item)) for item in nft_game.abi
+            if item["type"] == "event" and item["name"] in SETTER_EVENTS
+        ]
+        self._block_filter = None
+        self._event_filter = None
+        self._block_number = None
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._watcher = None
+
+    def __getattr__(self, name):
+        if name in CACHED_VIEWS:
+            return lambda *args: self._read(name, *args)
+        if name in SETTERS:
+            return lambda *args: self.observe(getattr(self.contract, name)(*args))
+        return getattr(self.contract, name)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Start the watcher thread polling the filters, reads are served from the cache without RPC calls
+        """
+        self.poll()
+        self._stopped.clear()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+    def poll(self):
+        """
+        Check the filters once and invalidate the cache if the parameters might have changed since
+        the previous check
+
+        Returns:
+            (int): the latest block seen
+        """
+        with self._lock:
+            if self._block_filter is None:
+                self._reset_filters()
+                return self._block_number
+            try:
+                blocks = self._block_filter.get_new_entries()
+                events = self._event_filter.get_new_entries() if self._event_filter else []
+            except ValueError:
+                # filter unknown to the node (e.g. restarted node, reverted local chain) -> nothing can be trusted
+                self._reset_filters()
+                return self._block_number
+            if blocks:
+                self._block_number = web3.eth.block_number
+            if events or (blocks and not self._topics):
+                self.invalidate()
+            return self._block_number
+
+    def invalidate(self):
+        with self._lock:
+            if self._cache:
+                self.stats["invalidations"] += 1
+            self._cache.clear()
+
+    def observe(self, tx):
+        """
+        Invalidate the cache if the transaction changed parameters of the game
+
+        Args:
+            tx (TransactionReceipt): transaction sent to the game (e.g. by other handle of the same game)
+
+        Returns:
+            (TransactionReceipt): the transaction
+        """
+        if tx.fn_name in SETTERS or any(name in tx.events for name in SETTER_EVENTS):
+            with self._lock:
+                self.invalidate()
+                # next reads are done at (or after) the block of the transaction
+                if self._block_number is not None and tx.block_number is not None:
+                    self._block_number = max(self._block_number, tx.block_number)
+        return tx
+
+    def _reset_filters(self):
+        self._block_filter = web3.eth.filter("latest")
+        if self._topics:
+            self._event_filter = web3.eth.filter({"address": self.contract.address, "topics": [self._topics]})
+        self._block_number = web3.eth.block_number
+        self.invalidate()
+
+    def _watch(self):
+        while not self._stopped.wait(self.poll_interval):
+            self.poll()
+
+    def _read(self, name, *args):
+        if self._watcher is None:
+            self.poll()
+        key = (name, args)
+        with self._lock:
+            if key in self._cache:
+                self.stats["hits"] += 1
+                return self._cache[key]
+            self.stats["misses"] += 1
+            # read at the block seen by the filters, so the value is consistent with the events checked so far
+            value = getattr(self.contract, name)(*args, block_identifier=self._block_number)
+            self._cache[key] = value
+            return value
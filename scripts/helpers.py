@@ -1,10 +1,14 @@
 from brownie import (
-    accounts, network, config, Contract, interface,
-    LinkToken, VRFCoordinatorMock, MockV3Aggregator, MockOracle,
+    accounts, network, config, Contract, interface, web3,
+    LinkToken, VRFCoordinatorMock, MockV3Aggregator, MockOracle, Multicall2,
     TransparentUpgradeableProxy, ProxyAdmin,
 )
+from scripts.tx_report import recorder, send_transaction
+from dataclasses import dataclass
+from pathlib import Path
 from web3 import Web3
 import eth_utils
+import json, random, rlp, threading, time
 
 
 NON_FORKED_LOCAL_BLOCKCHAIN_ENVIRONMENTS = ["hardhat", "development", "ganache"]
@@ -39,7 +43,11 @@ def get_account(index=None, id=None):
     return accounts.add(config["wallets"]["from_key"])  # use account from our environment
 
 
-contract_to_mock = {"link_token": LinkToken, "vrf_coordinator": VRFCoordinatorMock}
+contract_to_mock = {"link_token": LinkToken, "vrf_coordinator": VRFCoordinatorMock, "multicall": Multicall2}
+# per-network registry of contracts deployed by our scripts (live networks only, local chains are ephemeral)
+DEPLOYMENTS_DIR = "./deployments"
+# in-process cache of contract handles: (network, contract name) -> contract
+_contract_cache = {}
 
 
 def get_contract(contract_name):
@@ -47,7 +55,7 @@ def get_contract(contract_name):
     To use this function, go to the brownie config and add a new entry for
     the contract that you want to be able to 'get'. Then add an entry in the in the variable 'contract_to_mock'.
         This script will then either:
-            - Get a address from the config.
+            - Get a address from the deployment registry or from the config.
             - Or deploy a mock to use for a network that doesn't have it.
         Args:
             contract_name (string): This is the name that is refered to in the
@@ -63,23 +71,196 @@ def get_contract(contract_name):
         # if contract has not been already deployed, deploy mocks, otherwise grab the recent contract deployed
         if len(contract_type) <= 0:
             deploy_mocks()
-        contract = contract_type[-1] # let's grab the most recent deployed contract
-    else:
-        try:
-            contract_address = config["networks"][network.show_active()][contract_name]
-            contract = Contract.from_abi(
-                contract_type._name, contract_address, contract_type.abi
-            )
-        except KeyError:
-            print(
-                f"{network.show_active()} address not found, perhaps you should add it to the config or deploy mocks?"
-            )
-            print(
-                f"brownie run scripts/deploy_mocks.py --network {network.show_active()}"
+        return contract_type[-1] # let's grab the most recent deployed contract
+    cache_key = (network.show_active(), contract_name)
+    if cache_key in _contract_cache:
+        return _contract_cache[cache_key]
+    contract = get_registered_contract(contract_name, contract_type)
+    if contract is None:
+        contract_address = config["networks"][network.show_active()].get(contract_name)
+        if not contract_address:
+            raise KeyError(
+                f"{network.show_active()} address of {contract_name} not found, "
+                "perhaps you should add it to the config or deploy mocks?"
             )
+        contract = Contract.from_abi(contract_type._name, contract_address, contract_type.abi)
+    _contract_cache[cache_key] = contract
     return contract
 
 
+def load_registry(network_name=None):
+    """
+    Load the deployment registry of the network
+
+    Args:
+        network_name (string, optional): defaults to the active network
+
+    Returns:
+        (dict): contract name -> {address, contract_type, abi_hash, bytecode_hash, block_number, tx_hash}
+    """
+    registry_file = Path(DEPLOYMENTS_DIR) / "{}.json".format(network_name or network.show_active())
+    if not registry_file.exists():
+        return {}
+    with registry_file.open() as file:
+        return json.load(file)
+
+
+def record_deployment(contract_name, contract, tx=None):
+    """
+    Record the contract deployed by our scripts into the registry of the active network
+
+    Args:
+        contract_name (string): name of the deployment, e.g. 'nft_game' or 'link_token'
+        contract (contract): the freshly deployed contract
+        tx (TransactionReceipt, optional): the deployment transaction, defaults to contract.tx
+    """
+    if network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        return
+    _contract_cache[(network.show_active(), contract_name)] = contract
+    tx = tx if tx else contract.tx
+    registry = load_registry()
+    registry[contract_name] = {
+        "address": contract.address,
+        "contract_type": contract._name,
+        "abi_hash": get_abi_hash(contract.abi),
+        "bytecode_hash": get_bytecode_hash(contract._build["bytecode"]),
+        "block_number": tx.block_number if tx else None,
+        "tx_hash": tx.txid if tx else None,
+    }
+    registry_file = Path(DEPLOYMENTS_DIR) / "{}.json".format(network.show_active())
+    registry_file.parent.mkdir(parents=True, exist_ok=True)
+    with registry_file.open("w") as file:
+        json.dump(registry, file, indent=4, sort_keys=True)
+
+
+def get_registered_contract(contract_name, contract_type):
+    """
+    Get the contract handle from the registry if it was deployed from the current bytecode
+
+    Args:
+        contract_name (string): name of the deployment, e.g. 'nft_game'
+        contract_type (ContractContainer): e.g. MediavalSTRVGameV3
+
+    Returns:
+        (contract): handle of registered contract, None if not registered or the bytecode has changed
+    """
+    cache_key = (network.show_active(), contract_name)
+    if cache_key in _contract_cache and _contract_cache[cache_key]._name == contract_type._name:
+        return _contract_cache[cache_key]
+    entry = load_registry().get(contract_name)
+    if not entry or entry["bytecode_hash"] != get_bytecode_hash(contract_type.bytecode):
+        return None
+    contract = Contract.from_abi(contract_type._name, entry["address"], contract_type.abi)
+    _contract_cache[cache_key] = contract
+    return contract
+
+
+def get_abi_hash(abi):
+    return Web3.keccak(text=json.dumps(abi, sort_keys=True)).hex()
+
+
+def get_bytecode_hash(bytecode):
+    return Web3.keccak(hexstr=bytecode).hex()
+
+
+class NonceManager:
+    """
+    Tracks nonces of accounts locally, so independent transactions can be sent back to back
+    without waiting for the previous ones to be mined.
+
+    Dependencies between transactions are expressed by:
+        - nonce order: transactions of one account are mined in the order they were sent
+        - predicted addresses: address of a contract deployment is known once its nonce is assigned
+          (see predict_contract_address), so dependent transactions can be sent before it is mined
+        - waiting: a transaction depending on other account's transaction is sent after
+          wait_for_transactions of its dependencies
+    """
+
+    def __init__(self):
+        self._nonces = {}
+        self._lock = threading.Lock()
+
+    def next_nonce(self, account):
+        with self._lock:
+            address = str(account)
+            if address not in self._nonces:
+                self._nonces[address] = web3.eth.get_transaction_count(address, "pending")
+            nonce = self._nonces[address]
+            self._nonces[address] += 1
+            return nonce
+
+    def tx_params(self, account, **params):
+        """
+        Transaction parameters with the next nonce of the account, the transaction is not waited for
+
+        Args:
+            account (Account): the sender
+            **params: other transaction parameters, e.g. value or gas_limit
+
+        Returns:
+            (dict): parameters to be passed as the last argument of contract calls and deployments
+        """
+        return {"from": account, "nonce": self.next_nonce(account), "required_confs": 0, **params}
+
+
+def predict_contract_address(account, nonce):
+    """
+    Address of the contract deployed by the account with the given nonce (CREATE opcode)
+    """
+    sender = bytes.fromhex(str(account)[2:])
+    return eth_utils.to_checksum_address(Web3.keccak(rlp.encode([sender, nonce]))[12:])
+
+
+def send_pending_call(nonces, account, contract_type, address, function_name, args, gas_limit, value=0):
+    """
+    Send a contract call which does not need the contract to be mined yet (it is not gas-estimated)
+
+    Args:
+        nonces (NonceManager): the nonce manager of the flow
+        account (Account): the sender
+        contract_type (ContractContainer): type of the called contract, e.g. MediavalSTRVGameV3
+        address (string): address of the called (possibly pending) contract
+        function_name (string): name of the called function
+        args (list): arguments of the called function
+        gas_limit (int): gas limit of the call
+        value (int, optional): WEI sent with the call
+
+    Returns:
+        (TransactionReceipt): the pending transaction
+    """
+    data = web3.eth.contract(abi=contract_type.abi).encodeABI(fn_name=function_name, args=args)
+    tx = account.transfer(
+        address, value, data=data, gas_limit=gas_limit, nonce=nonces.next_nonce(account), required_confs=0,
+    )
+    # the raw transfer is not decoded by brownie -> name it for the transaction report
+    return recorder.submitted(tx, "{}.{}".format(contract_type._name, function_name))
+
+
+def wait_for_transactions(txs, required_confs=1, submitted=None):
+    """
+    Wait for all transactions together, they are recorded for the transaction report
+
+    Args:
+        txs (list): pending transactions
+        required_confs (int): number of confirmations to wait for
+        submitted (float, optional): monotonic time the transactions were sent at (latency in the report)
+
+    Returns:
+        (list): the confirmed transactions
+
+    Raises:
+        ValueError: if any of the transactions reverted
+    """
+    txs = list(txs)
+    for tx in txs:
+        tx.wait(required_confs)
+        recorder.record(tx, submitted=submitted)
+    reverted = [tx.txid for tx in txs if tx.status != 1]
+    if reverted:
+        raise ValueError("Reverted transactions: {}".format(reverted))
+    return txs
+
+
 DECIMALS = 18 
 INITIAL_VALUE = Web3.toWei(2000, "ether")
 
@@ -87,6 +268,7 @@ INITIAL_VALUE = Web3.toWei(2000, "ether")
 def deploy_mocks(decimals=DECIMALS, initial_value=INITIAL_VALUE):
     """
     Use this script if you want to deploy mocks to a testnet.
+    All mocks are sent back to back, the mocks using LINK get its predicted address.
     
     Args:
         decimals (int):
@@ -95,25 +277,39 @@ def deploy_mocks(decimals=DECIMALS, initial_value=INITIAL_VALUE):
     print(f"The active network is {network.show_active()}")
     print("Deploying Mocks...")
     account = get_account()
+    nonces = NonceManager()
+    submitted = time.monotonic()
     # deploy link token contract
     print("Deploying Mock Link Token...")
-    link_token = LinkToken.deploy({"from": account})
+    link_token_params = nonces.tx_params(account)
+    link_token_address = predict_contract_address(account, link_token_params["nonce"])
+    txs = {"link_token": LinkToken.deploy(link_token_params)}
     # deploy mock price feed aggregator
     print("Deploying Mock Price Feed...")
-    mock_price_feed = MockV3Aggregator.deploy(
-        decimals, initial_value, {"from": account}
-    )
-    print(f"Deployed to {mock_price_feed.address}")
+    txs["price_feed"] = MockV3Aggregator.deploy(decimals, initial_value, nonces.tx_params(account))
     # deploy mock VRFCoordinator
     print("Deploying Mock VRFCoordinator...")
-    mock_vrf_coordinator = VRFCoordinatorMock.deploy(
-        link_token.address, {"from": account}
-    )
-    print(f"Deployed to {mock_vrf_coordinator.address}")
+    txs["vrf_coordinator"] = VRFCoordinatorMock.deploy(link_token_address, nonces.tx_params(account))
     # deploy Oracle
     print("Deploying Mock Oracle...")
-    mock_oracle = MockOracle.deploy(link_token.address, {"from": account})
-    print(f"Deployed to {mock_oracle.address}")
+    txs["oracle"] = MockOracle.deploy(link_token_address, nonces.tx_params(account))
+    # deploy Multicall
+    print("Deploying Multicall...")
+    txs["multicall"] = Multicall2.deploy(nonces.tx_params(account))
+    wait_for_transactions(txs.values(), submitted=submitted)
+    link_token = LinkToken.at(txs["link_token"].contract_address, account, txs["link_token"])
+    mock_vrf_coordinator = VRFCoordinatorMock.at(
+        txs["vrf_coordinator"].contract_address, account, txs["vrf_coordinator"]
+    )
+    multicall = Multicall2.at(txs["multicall"].contract_address, account, txs["multicall"])
+    MockV3Aggregator.at(txs["price_feed"].contract_address, account, txs["price_feed"])
+    MockOracle.at(txs["oracle"].contract_address, account, txs["oracle"])
+    for name, tx in txs.items():
+        print(f"{name} deployed to {tx.contract_address}")
+    # record mocks deployed to a testnet, so the next run does not need them in the config
+    record_deployment("link_token", link_token, txs["link_token"])
+    record_deployment("vrf_coordinator", mock_vrf_coordinator, txs["vrf_coordinator"])
+    record_deployment("multicall", multicall, txs["multicall"])
     print("Mocks Deployed!")
 
 
@@ -134,7 +330,7 @@ def fund_with_link(
     """
     account = account if account else get_account()
     link_token = link_token if link_token else get_contract("link_token")
-    funding_tx = link_token.transfer(contract_address, amount, {"from": account})
+    funding_tx = send_transaction(link_token.transfer, contract_address, amount, {"from": account})
     # @NOTE if interface:
     # link_token_contract = interface.ILinkToken(link_token.address) 
     # funding_tx = link_token_contract.transfer(contract_address, amount, {"from": account})
@@ -143,6 +339,167 @@ def fund_with_link(
     return funding_tx
 
 
+def get_request_ids(tx):
+    """
+    Get VRF request ids of the transaction (one per 'RequestedRandomness' event)
+
+    Args:
+        tx (TransactionReceipt): receipt of burnToGainGear/burnToGainGearBatch transaction
+
+    Returns:
+        (list): request ids as hex strings
+    """
+    if "RequestedRandomness" not in tx.events:
+        return []
+    return [_to_hex(event["requestId"]) for event in tx.events["RequestedRandomness"]]
+
+
+def wait_for_randomness(
+    nft_game,
+    request_ids,
+    from_block=None,
+    timeout=300,
+    poll_interval=1,
+    max_poll_interval=16,
+):
+    """
+    Wait until the VRF Coordinator fulfills all given requests, i.e. until 'FulfilledRandomness'
+    events with matching request ids are emitted by the game
+
+    Args:
+        nft_game (contract): the game contract consuming randomness
+        request_ids (list): request ids to wait for, see get_request_ids
+        from_block (int, optional): block to start searching the events from, defaults to the latest block
+        timeout (int): max seconds to wait
+        poll_interval (float): seconds between the first polls, doubled after every unsuccessful poll
+        max_poll_interval (float): max seconds between two polls
+
+    Returns:
+        (dict): request id -> arguments of its 'FulfilledRandomness' event
+
+    Raises:
+        TimeoutError: if some of the requests have not been fulfilled within the timeout
+    """
+    pending = set(_to_hex(request_id) for request_id in request_ids)
+    fulfilled = {}
+    game = web3.eth.contract(address=nft_game.address, abi=nft_game.abi)
+    from_block = web3.eth.block_number if from_block is None else from_block
+    deadline = time.monotonic() + timeout
+    while True:
+        latest_block = web3.eth.block_number
+        if latest_block >= from_block:
+            events = game.events.FulfilledRandomness.getLogs(fromBlock=from_block, toBlock=latest_block)
+            for event in events:
+                request_id = _to_hex(event.args.requestId)
+                if request_id in pending:
+                    pending.discard(request_id)
+                    fulfilled[request_id] = dict(event.args)
+            from_block = latest_block + 1
+        if not pending:
+            return fulfilled
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("{} randomness request(s) not fulfilled in {} secs: {}".format(
+                len(pending), timeout, sorted(pending)
+            ))
+        time.sleep(min(poll_interval, remaining))
+        poll_interval = min(poll_interval * 2, max_poll_interval)
+
+
+def fulfill_randomness_locally(nft_game, request_ids, randomness=None, account=None):
+    """
+    Pretend being a chainlink node -> fulfill the requests by VRF Coordinator mock (local networks only)
+
+    Args:
+        nft_game (contract): the game contract consuming randomness
+        request_ids (list): request ids to fulfill, see get_request_ids
+        randomness (int, optional): the randomness to send back, random if not defined
+        account (string, optional): the account calling the VRF Coordinator mock
+
+    Returns:
+        (list): receipts of callback transactions
+    """
+    account = account if account else get_account()
+    vrf_coordinator = get_contract("vrf_coordinator")
+    txs = []
+    for request_id in request_ids:
+        _randomness = randomness if randomness else random.randint(1, 2 ** 256 - 1)
+        txs.append(send_transaction(
+            vrf_coordinator.callBackWithRandomness, request_id, _randomness, nft_game.address, {"from": account}
+        ))
+    return txs
+
+
+def _to_hex(value):
+    if isinstance(value, str):
+        return value.lower() if value.startswith("0x") else "0x" + value.lower()
+    return Web3.toHex(value)
+
+
+# view functions of the game without arguments included in every snapshot
+SNAPSHOT_PARAMETERS = [
+    "mintedPublicly", "maxAvailableForPublicMint", "mintingThreshold", "gearToBurn", "gearToMint", "fee",
+]
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """
+    Balances and parameters of the game read at one block
+    """
+    block_number: int
+    balances: dict  # (account address, gear id) -> balance
+    minted_total: list  # gear id -> minted amount
+    rates_for_public_mint: list  # gear id -> rate (in WEI)
+    minted_publicly: int
+    max_available_for_public_mint: int
+    minting_threshold: int
+    gear_to_burn: int
+    gear_to_mint: int
+    fee: int
+
+    def balance_of(self, account, gear):
+        return self.balances[(str(account), gear)]
+
+
+def get_game_snapshot(nft_game, accounts_gears, block_identifier=None, multicall=None):
+    """
+    Read balances of (account, gear) pairs and all game parameters in a single call via Multicall
+
+    Args:
+        nft_game (contract): the game contract
+        accounts_gears (list): (account, gear id) pairs whose balances are read by one balanceOfBatch
+        block_identifier (int, optional): block to read the state at, defaults to the latest block
+        multicall (contract, optional): the Multicall2 contract, see get_contract("multicall")
+
+    Returns:
+        (GameSnapshot): the snapshot of the game state
+    """
+    multicall = multicall if multicall else get_contract("multicall")
+    owners = [str(account) for account, _ in accounts_gears]
+    gears = [gear for _, gear in accounts_gears]
+    gear_ids = list(GEAR_MAPPING.keys())
+    methods = (
+        [(nft_game.balanceOfBatch, (owners, gears))]
+        + [(nft_game.mintedTotal, (gear,)) for gear in gear_ids]
+        + [(nft_game.ratesForPublicMint, (gear,)) for gear in gear_ids]
+        + [(getattr(nft_game, name), ()) for name in SNAPSHOT_PARAMETERS]
+    )
+    calls = [(nft_game.address, method.encode_input(*args)) for method, args in methods]
+    block_number, return_data = multicall.aggregate.call(calls, block_identifier=block_identifier)
+    results = [method.decode_output(data) for (method, _), data in zip(methods, return_data)]
+    balances, results = results[0], results[1:]
+    minted_total, results = list(results[:len(gear_ids)]), results[len(gear_ids):]
+    rates_for_public_mint, results = list(results[:len(gear_ids)]), results[len(gear_ids):]
+    return GameSnapshot(
+        block_number,
+        {(owner, gear): balance for owner, gear, balance in zip(owners, gears, balances)},
+        minted_total,
+        rates_for_public_mint,
+        *results,
+    )
+
+
 def encode_function_data(initializer=None, *args):
     """
     Encodes the function call so we can work with an initializer.
@@ -188,7 +545,8 @@ def upgrade(
             # encode initiliazer in bytes
             encoded_function_call = encode_function_data(initializer, *args)
             # upgrade the proxy admin contract with encoded initializer
-            transaction = proxy_admin_contract.upgradeAndCall(
+            transaction = send_transaction(
+                proxy_admin_contract.upgradeAndCall,
                 proxy.address,  
                 new_implementation_address,
                 encoded_function_call,
@@ -196,7 +554,8 @@ def upgrade(
             )
         else:
             # upgrade the proxy admin contract WITHOUT encoded initializer
-            transaction = proxy_admin_contract.upgrade(
+            transaction = send_transaction(
+                proxy_admin_contract.upgrade,
                 proxy.address,
                 new_implementation_address,
                 {"from": account},
@@ -206,13 +565,15 @@ def upgrade(
         if initializer:
             # encode initiliazer in bytes
             encoded_function_call = encode_function_data(initializer, *args)
-            transaction = proxy.upgradeToAndCall(
+            transaction = send_transaction(
+                proxy.upgradeToAndCall,
                 new_implementation_address,
                 encoded_function_call,
                 {"from": account},
             )
         else:
-            transaction == proxy.upgradeTo(
+            transaction = send_transaction(
+                proxy.upgradeTo,
                 new_implementation_address,
                 {"from": account},
             )
@@ -221,7 +582,8 @@ def upgrade(
 
 def deploy_proxy(account, contract_deployed, contract_name="contract", initilizer=None, *args):
     # 1.create proxy admin
-    proxy_admin = ProxyAdmin.deploy(
+    proxy_admin = send_transaction(
+        ProxyAdmin.deploy,
         {"from": account}, 
         publish_source=config["networks"][network.show_active()].get("publish", False)
         )
@@ -231,11 +593,13 @@ def deploy_proxy(account, contract_deployed, contract_name="contract", initilize
     else:
         encoded_initiliazer = encode_function_data()
     # 3.create proxy
-    proxy = TransparentUpgradeableProxy.deploy(
+    proxy = send_transaction(
+        TransparentUpgradeableProxy.deploy,
         contract_deployed.address,
         proxy_admin.address,
         encoded_initiliazer,
-        {"from": account, "gas_limit": 1000000},
+        # the limit includes the initializer call (e.g. MediavalSTRVGameClone.initialize)
+        {"from": account, "gas_limit": 3000000},
         publish_source=config["networks"][network.show_active()].get("publish", False)
     )
     # 4. create proxy contract
@@ -0,0 +1,254 @@
+from scripts.helpers import LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import MediavalSTRVGameV2, MediavalSTRVGameV3, network, config, web3
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+import sqlite3
+
+# number of blocks fetched by one eth_getLogs call
+CHUNK_SIZE = 2000
+# number of blocks re-indexed once a reorg is detected at the cursor
+REORG_DEPTH = 12
+INDEXED_EVENTS = [
+    "TransferSingle", "TransferBatch", "RequestedRandomness", "FulfilledRandomness", "FulfilledBatchRandomness",
+]
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursor (
+    contract TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    batch_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    from_address TEXT NOT NULL,
+    to_address TEXT NOT NULL,
+    token_id INTEGER NOT NULL,
+    amount INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index, batch_index)
+);
+CREATE TABLE IF NOT EXISTS balances (
+    holder TEXT NOT NULL,
+    token_id INTEGER NOT NULL,
+    balance INTEGER NOT NULL,
+    PRIMARY KEY (holder, token_id)
+);
+CREATE TABLE IF NOT EXISTS requests (
+    request_id TEXT PRIMARY KEY,
+    knight TEXT NOT NULL,
+    requested_block INTEGER NOT NULL,
+    fulfilled_block INTEGER,
+    randomness TEXT,
+    random_number INTEGER,
+    rolls INTEGER NOT NULL DEFAULT 1,
+    gears_won INTEGER
+);
+CREATE INDEX IF NOT EXISTS requests_knight ON requests (knight);
+"""
+
+
+def main():
+    nft_game = get_indexed_game()
+    conn = connect("./game_index_{}.sqlite".format(network.show_active()))
+    last_block = sync(conn, nft_game)
+    print("Indexed {} up to block {}".format(nft_game.address, last_block))
+    for holder, token_id, balance in conn.execute("SELECT * FROM balances WHERE balance > 0 ORDER BY holder"):
+        print("{} ID {}: {}".format(holder, token_id, balance))
+    print("Win rate (threshold {}): {}".format(nft_game.mintingThreshold(), win_rate(conn, nft_game.mintingThreshold())))
+
+
+def get_indexed_game():
+    nft_game_address = config["networks"][network.show_active()].get("deployed_nft_game")
+    if network.show_active() in LOCAL_BLOCKCHAIN_ENVIRONMENTS or not nft_game_address:
+        return MediavalSTRVGameV3[-1]
+    # deployed version on rinkeby is V2
+    return MediavalSTRVGameV2.at(nft_game_address)
+
+
+def connect(db_file):
+    """
+    Open (and create if needed) the sqlite store of the indexer
+
+    Args:
+        db_file (string): path of the sqlite file, ':memory:' for in-memory store
+
+    Returns:
+        (sqlite3.Connection): connection with the schema created
+    """
+    conn = sqlite3.connect(db_file)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(transfers)")]
+    if columns and "batch_index" not in columns:
+        # store of a previous version (keyed by token id, which a TransferBatch may repeat) -> reindexed
+        conn.executescript("DROP TABLE transfers; DROP TABLE balances; DROP TABLE requests; DROP TABLE cursor;")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def sync(conn, nft_game, from_block=0, to_block=None, chunk_size=CHUNK_SIZE, reorg_depth=REORG_DEPTH):
+    """
+    Index game logs from the persisted cursor (or from_block on the first run) up to to_block
+
+    Args:
+        conn (sqlite3.Connection): the store, see connect
+        nft_game (contract): the game contract to be indexed
+        from_block (int): block to start from if the store has no cursor yet, e.g. deploy block
+        to_block (int, optional): last block to index, defaults to the latest block
+        chunk_size (int): number of blocks per eth_getLogs call
+        reorg_depth (int): number of blocks rewound if the cursor block is not canonical anymore
+
+    Returns:
+        (int): the last indexed block
+    """
+    contract = nft_game.address
+    to_block = web3.eth.block_number if to_block is None else to_block
+    cursor = conn.execute(
+        "SELECT block_number, block_hash FROM cursor WHERE contract = ?", (contract,)
+    ).fetchone()
+    if cursor:
+        block_number, block_hash = cursor
+        if Web3.toHex(web3.eth.get_block(block_number)["hash"]) != block_hash:
+            block_number = rewind(conn, contract, block_number - reorg_depth)
+        from_block = block_number + 1
+    decoders = _get_decoders(nft_game)
+    for chunk_start in range(from_block, to_block + 1, chunk_size):
+        chunk_end = min(chunk_start + chunk_size - 1, to_block)
+        # hash of the cursor block is fetched before its logs: if a reorg happens in between, the stored
+        # hash is the one of the replaced chain and the next sync rewinds (the other way round stale
+        # logs would be kept under the hash of the new chain)
+        chunk_end_hash = web3.eth.get_block(chunk_end)["hash"]
+        logs = web3.eth.get_logs({"address": contract, "fromBlock": chunk_start, "toBlock": chunk_end})
+        # one sqlite transaction per chunk -> cursor always matches the indexed data
+        with conn:
+            for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+                decoder = decoders.get(Web3.toHex(log["topics"][0]))
+                if decoder:
+                    event = decoder.processLog(log)
+                    _apply_event(conn, event)
+            _set_cursor(conn, contract, chunk_end, chunk_end_hash)
+    return max(to_block, from_block - 1)
+
+
+def rewind(conn, contract, block_number):
+    """
+    Drop indexed data after block_number (reorg handling) and revert materialized balances
+
+    Returns:
+        (int): the new cursor block
+    """
+    block_number = max(block_number, 0)
+    with conn:
+        rows = conn.execute(
+            "SELECT from_address, to_address, token_id, amount FROM transfers WHERE block_number > ?",
+            (block_number,),
+        ).fetchall()
+        for from_address, to_address, token_id, amount in rows:
+            _add_balance(conn, from_address, token_id, amount)
+            _add_balance(conn, to_address, token_id, -amount)
+        conn.execute("DELETE FROM transfers WHERE block_number > ?", (block_number,))
+        conn.execute("DELETE FROM requests WHERE requested_block > ?", (block_number,))
+        conn.execute(
+            "UPDATE requests SET fulfilled_block = NULL, randomness = NULL, random_number = NULL, rolls = 1, "
+            "gears_won = NULL "
+            "WHERE fulfilled_block > ?",
+            (block_number,),
+        )
+        _set_cursor(conn, contract, block_number)
+    return block_number
+
+
+def win_rate(conn, minting_threshold):
+    """
+    Share of winning rolls of fulfilled requests, single rolls are evaluated against the given threshold
+
+    Args:
+        conn (sqlite3.Connection): the store, see connect
+        minting_threshold (int): the game's mintingThreshold
+
+    Returns:
+        (float): won rolls / all rolls, None if nothing has been fulfilled yet
+    """
+    won, total = conn.execute(
+        "SELECT SUM(CASE WHEN rolls = 1 THEN random_number <= ? ELSE gears_won END), SUM(rolls) "
+        "FROM requests WHERE fulfilled_block IS NOT NULL",
+        (minting_threshold,),
+    ).fetchone()
+    return won / total if total else None
+
+
+def pending_requests(conn, knight):
+    """
+    Requests of the knight waiting for randomness (requested, not fulfilled yet), the game keeps no
+    per-knight count of them
+
+    Args:
+        conn (sqlite3.Connection): the store, see connect
+        knight (string): address of the knight
+
+    Returns:
+        (list): request ids (hex) in the order they were requested
+    """
+    return [request_id for request_id, in conn.execute(
+        "SELECT request_id FROM requests WHERE knight = ? AND fulfilled_block IS NULL ORDER BY requested_block",
+        (str(knight),),
+    )]
+
+
+def _get_decoders(nft_game):
+    game = web3.eth.contract(address=nft_game.address, abi=nft_game.abi)
+    decoders = {}
+    for event_abi in nft_game.abi:
+        if event_abi["type"] == "event" and event_abi["name"] in INDEXED_EVENTS:
+            decoders[Web3.toHex(event_abi_to_log_topic(event_abi))] = game.events[event_abi["name"]]()
+    return decoders
+
+
+def _apply_event(conn, event):
+    args = event.args
+    block_number = event.blockNumber
+    if event.event in ("TransferSingle", "TransferBatch"):
+        if event.event == "TransferSingle":
+            ids_amounts = [(args["id"], args["value"])]
+        else:
+            ids_amounts = zip(args["ids"], args["values"])
+        # position within the batch is the key, a TransferBatch may repeat an id
+        for batch_index, (token_id, amount) in enumerate(ids_amounts):
+            conn.execute(
+                "INSERT INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (block_number, event.logIndex, batch_index, Web3.toHex(event.transactionHash), args["from"],
+                 args["to"], token_id, amount),
+            )
+            _add_balance(conn, args["from"], token_id, -amount)
+            _add_balance(conn, args["to"], token_id, amount)
+    elif event.event == "RequestedRandomness":
+        conn.execute(
+            "INSERT OR REPLACE INTO requests (request_id, knight, requested_block) VALUES (?, ?, ?)",
+            (Web3.toHex(args["requestId"]), args["_knight"], block_number),
+        )
+    elif event.event == "FulfilledRandomness":
+        conn.execute(
+            "UPDATE requests SET fulfilled_block = ?, randomness = ?, random_number = ? WHERE request_id = ?",
+            (block_number, hex(args["randomness"]), args["randomNumber"], Web3.toHex(args["requestId"])),
+        )
+    elif event.event == "FulfilledBatchRandomness":
+        conn.execute(
+            "UPDATE requests SET rolls = ?, gears_won = ? WHERE request_id = ?",
+            (args["rolls"], args["gearsWon"], Web3.toHex(args["requestId"])),
+        )
+
+
+def _add_balance(conn, holder, token_id, amount):
+    if holder == ZERO_ADDRESS:
+        return
+    conn.execute(
+        "INSERT INTO balances VALUES (?, ?, ?) "
+        "ON CONFLICT (holder, token_id) DO UPDATE SET balance = balance + excluded.balance",
+        (holder, token_id, amount),
+    )
+
+
+def _set_cursor(conn, contract, block_number, block_hash=None):
+    block_hash = web3.eth.get_block(block_number)["hash"] if block_hash is None else block_hash
+    conn.execute("INSERT OR REPLACE INTO cursor VALUES (?, ?, ?)", (contract, block_number, Web3.toHex(block_hash)))
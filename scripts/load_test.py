@@ -0,0 +1,178 @@
+from scripts.helpers import (
+    get_account, get_contract, fund_with_link, get_request_ids, NonceManager, wait_for_transactions,
+)
+from scripts.deploy_game import deploy_nft_game
+from scripts.tx_report import percentile
+from brownie import accounts, exceptions
+from web3 import Web3
+from queue import Queue
+import os, random, threading, time
+
+# size of the simulated population of knights and the workload, can be changed by env variables
+POPULATION = int(os.getenv("LOAD_POPULATION", "1000"))
+OPERATIONS = int(os.getenv("LOAD_OPERATIONS", "5000"))
+TARGET_RATE = float(os.getenv("LOAD_TARGET_RATE", "50"))  # operations per second
+# share of operations in the mixed workload
+WORKLOAD = {"publicMint": 0.5, "burnToGainGear": 0.3, "fulfillRandomness": 0.2}
+KNIGHT_FUNDING = Web3.toWei(0.05, "ether")
+LOAD_RATE = Web3.toWei(0.001, "ether")
+PERCENTILES = [50, 90, 99]
+
+
+def main():
+    owner = get_account()
+    nft_game = deploy_nft_game(owner)
+    knights = create_knights(POPULATION, owner)
+    report = run_load(nft_game, knights, OPERATIONS, TARGET_RATE)
+    print_report(report)
+
+
+def create_knights(population, funder, funding=KNIGHT_FUNDING):
+    """
+    Generate local accounts and fund them with ETH, funding transactions are sent back to back
+
+    Args:
+        population (int): number of knights
+        funder (Account): the account funding the knights
+        funding (int): ETH (in WEI) sent to every knight
+
+    Returns:
+        (list): the funded accounts
+    """
+    knights = [accounts.add() for _ in range(population)]
+    nonces = NonceManager()
+    txs = [funder.transfer(knight, funding, **_transfer_params(nonces, funder)) for knight in knights]
+    wait_for_transactions(txs)
+    print("Funded {} knights".format(population))
+    return knights
+
+
+def run_load(nft_game, knights, operations, target_rate, workload=WORKLOAD, seed=None):
+    """
+    Drive a mixed workload of publicMint, burnToGainGear and mocked VRF callbacks against the game
+
+    Args:
+        nft_game (contract): the game
+        knights (list): funded accounts, see create_knights
+        operations (int): number of operations to be sent
+        target_rate (float): operations per second to be sent
+        workload (dict): operation name -> share of the workload
+        seed (int, optional): seed of the random workload
+
+    Returns:
+        (dict): the report, see print_report
+    """
+    rng = random.Random(seed)
+    owner = get_account()
+    vrf_coordinator = get_contract("vrf_coordinator")
+    # the game must not limit the load -> open public mint and fund the game with enough LINK
+    nft_game.setParametersOfPublicMint(2 ** 63, [LOAD_RATE, LOAD_RATE, LOAD_RATE], {"from": owner})
+    fund_with_link(nft_game.address, owner, amount=operations * nft_game.fee())
+    gear_to_burn = nft_game.gearToBurn()
+
+    nonces = NonceManager()
+    results = {name: [] for name in workload}
+    confirmations = Queue()
+    holders = {}  # knight -> gears to burn (sent, not necessarily confirmed)
+    pending_requests = []
+    lock = threading.Lock()
+
+    def confirm():
+        while True:
+            item = confirmations.get()
+            if item is None:
+                return
+            name, tx, submitted = item
+            try:
+                tx.wait(1)
+                status = tx.status
+            except exceptions.VirtualMachineError:
+                status = 0
+            latency = time.monotonic() - submitted
+            with lock:
+                results[name].append({"latency": latency, "gas_used": tx.gas_used, "reverted": status != 1})
+                if name == "burnToGainGear" and status == 1:
+                    pending_requests.extend(get_request_ids(tx))
+
+    confirmer = threading.Thread(target=confirm, daemon=True)
+    confirmer.start()
+    names, weights = list(workload.keys()), list(workload.values())
+    start = time.monotonic()
+    for i in range(operations):
+        # pace the submission to the target rate
+        delay = start + i / target_rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        name = rng.choices(names, weights)[0]
+        if name == "burnToGainGear" and not holders:
+            name = "publicMint"
+        if name == "fulfillRandomness":
+            with lock:
+                request_id = pending_requests.pop(rng.randrange(len(pending_requests))) if pending_requests else None
+            if request_id is None:
+                name = "publicMint"
+        submitted = time.monotonic()
+        try:
+            if name == "publicMint":
+                knight = rng.choice(knights)
+                amount = rng.randint(1, 3)
+                tx = nft_game.publicMint(
+                    gear_to_burn, amount, nonces.tx_params(knight, value=amount * LOAD_RATE)
+                )
+                holders[knight] = holders.get(knight, 0) + amount
+            elif name == "burnToGainGear":
+                knight = rng.choice(list(holders))
+                tx = nft_game.burnToGainGear(gear_to_burn, 1, nonces.tx_params(knight))
+                holders[knight] -= 1
+                if not holders[knight]:
+                    del holders[knight]
+            else:
+                tx = vrf_coordinator.callBackWithRandomness(
+                    request_id, rng.randint(1, 2 ** 256 - 1), nft_game.address, nonces.tx_params(owner)
+                )
+        except (exceptions.VirtualMachineError, ValueError):
+            # reverted already during gas estimation -> the nonce has not been used
+            nonces = NonceManager()
+            with lock:
+                results[name].append({"latency": time.monotonic() - submitted, "gas_used": None, "reverted": True})
+            continue
+        confirmations.put((name, tx, submitted))
+    submitted_in = time.monotonic() - start
+    confirmations.put(None)
+    confirmer.join()
+    return {
+        "operations": operations,
+        "seconds": time.monotonic() - start,
+        "submission_rate": operations / submitted_in if submitted_in else 0,
+        "population": len(knights),
+        "operations_stats": {name: _get_stats(records) for name, records in results.items()},
+    }
+
+
+def print_report(report):
+    print("\n{} operations of {} knights in {:.1f} s -> {:.1f} ops/s (submitted at {:.1f} ops/s)".format(
+        report["operations"], report["population"], report["seconds"],
+        report["operations"] / report["seconds"] if report["seconds"] else 0, report["submission_rate"],
+    ))
+    for name, stats in report["operations_stats"].items():
+        print("{}: {} ops, revert rate {:.2%}, avg gas {}, latency {}".format(
+            name, stats["count"], stats["revert_rate"], stats["avg_gas_used"],
+            ", ".join("p{} {:.3f} s".format(p, stats["latency_p{}".format(p)]) for p in PERCENTILES),
+        ))
+
+
+def _get_stats(records):
+    latencies = sorted(record["latency"] for record in records)
+    gas_used = [record["gas_used"] for record in records if record["gas_used"] is not None]
+    stats = {
+        "count": len(records),
+        "revert_rate": sum(record["reverted"] for record in records) / len(records) if records else 0,
+        "avg_gas_used": sum(gas_used) // len(gas_used) if gas_used else None,
+    }
+    for p in PERCENTILES:
+        stats["latency_p{}".format(p)] = percentile(latencies, p, default=0)
+    return stats
+
+
+def _transfer_params(nonces, account):
+    return {"nonce": nonces.next_nonce(account), "required_confs": 0}
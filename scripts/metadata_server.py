@@ -0,0 +1,174 @@
+from brownie import network
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+import gzip, hashlib, os, re, threading, time
+
+METADATA_SERVER_HOST = os.getenv("METADATA_SERVER_HOST", "127.0.0.1")
+METADATA_SERVER_PORT = int(os.getenv("METADATA_SERVER_PORT", "8000"))
+# ERC1155 clients replace {id} in the URI by the lowercase 64-hex id
+METADATA_PATH = re.compile(r"^/([0-9a-f]{64})\.json$")
+CACHE_CONTROL = "public, max-age=300"
+
+
+class MetadataStore:
+    """
+    In-memory cache of metadata json files, a file is reloaded once its mtime or size changes
+
+    Args:
+        directory (string): folder with <64-hex-id>.json files, e.g. ./metadata/rinkeby
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, token_hex_id):
+        """
+        Returns:
+            (dict): body, gzip_body, etag and gzip_etag of the file, None if it does not exist
+        """
+        path = self.directory / "{}.json".format(token_hex_id)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(token_hex_id, None)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(token_hex_id)
+        if entry and entry["version"] == version:
+            return entry
+        body = path.read_bytes()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        entry = {
+            "version": version,
+            "body": body,
+            "gzip_body": gzip.compress(body),
+            "etag": '"{}"'.format(digest),
+            "gzip_etag": '"{}-gzip"'.format(digest),
+        }
+        with self._lock:
+            self._entries[token_hex_id] = entry
+        return entry
+
+
+class MetadataRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = None
+
+    def do_GET(self):
+        match = METADATA_PATH.match(urlsplit(self.path).path)
+        entry = self.store.get(match.group(1)) if match else None
+        if not entry:
+            self._send(404, b"", {})
+            return
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        etag = entry["gzip_etag"] if use_gzip else entry["etag"]
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if_none_match = self.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+            self._send(304, b"", headers)
+            return
+        headers["Content-Type"] = "application/json"
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        self._send(200, entry["gzip_body"] if use_gzip else entry["body"], headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def create_server(directory, host=METADATA_SERVER_HOST, port=METADATA_SERVER_PORT):
+    """
+    Create (not start) a server of metadata files at the ERC1155 URI pattern /{id}.json
+
+    Args:
+        directory (string): folder with <64-hex-id>.json files
+        host (string): interface to listen on
+        port (int): port to listen on, 0 for any free port
+
+    Returns:
+        (ThreadingHTTPServer): the server, start it by serve_forever()
+    """
+    handler = type("Handler", (MetadataRequestHandler,), {"store": MetadataStore(directory)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def benchmark(base_url, token_hex_ids, requests=10000, concurrency=16, use_gzip=True, revalidate=False):
+    """
+    Load the server by keep-alive clients and measure requests/sec
+
+    Args:
+        base_url (string): e.g. http://127.0.0.1:8000
+        token_hex_ids (list): ids requested in round robin
+        requests (int): total number of requests
+        concurrency (int): number of concurrent clients
+        use_gzip (bool): whether clients accept gzip
+        revalidate (bool): whether clients send If-None-Match (i.e. get 304)
+
+    Returns:
+        (dict): requests, seconds, requests_per_sec and counts of status codes
+    """
+    url = urlsplit(base_url)
+    per_client = requests // concurrency
+
+    def client(index):
+        connection = HTTPConnection(url.hostname, url.port)
+        statuses = {}
+        etags = {}
+        for i in range(per_client):
+            token_hex_id = token_hex_ids[(index + i) % len(token_hex_ids)]
+            headers = {"Accept-Encoding": "gzip"} if use_gzip else {}
+            if revalidate and token_hex_id in etags:
+                headers["If-None-Match"] = etags[token_hex_id]
+            connection.request("GET", "/{}.json".format(token_hex_id), headers=headers)
+            response = connection.getresponse()
+            response.read()
+            etags[token_hex_id] = response.getheader("ETag")
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+        connection.close()
+        return statuses
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    seconds = time.perf_counter() - start
+    statuses = {}
+    for result in results:
+        for status, count in result.items():
+            statuses[status] = statuses.get(status, 0) + count
+    total = per_client * concurrency
+    return {"requests": total, "seconds": seconds, "requests_per_sec": total / seconds, "statuses": statuses}
+
+
+def main():
+    directory = "./metadata/{}".format(network.show_active())
+    server = create_server(directory)
+    print("Serving {} at http://{}:{}/{{id}}.json".format(directory, *server.server_address))
+    server.serve_forever()
+
+
+def run_benchmark():
+    directory = "./metadata/{}".format(network.show_active())
+    server = create_server(directory, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://{}:{}".format(*server.server_address)
+    token_hex_ids = [path.stem for path in Path(directory).glob("*.json")]
+    for use_gzip, revalidate in [(False, False), (True, False), (True, True)]:
+        result = benchmark(base_url, token_hex_ids, use_gzip=use_gzip, revalidate=revalidate)
+        print("gzip: {}, revalidate: {} -> {:.0f} requests/sec {}".format(
+            use_gzip, revalidate, result["requests_per_sec"], result["statuses"]
+        ))
+    server.shutdown()
@@ -0,0 +1,117 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+import hashlib, os, shutil
+
+OPTIMIZED_IMAGES_DIR = "./img/optimized"
+THUMBNAIL_SIZE = (256, 256)
+MAX_WORKERS = os.cpu_count()
+# images whose perceptual hashes differ in less bits are reported as similar
+SIMILARITY_DISTANCE = 4
+
+
+def main():
+    paths = sorted(str(path) for path in Path("./img").glob("*.PNG"))
+    variants = optimize_images(paths)
+    for path, image_variants in variants.items():
+        print("{}: {}".format(path, image_variants))
+
+
+def optimize_images(paths, output_dir=OPTIMIZED_IMAGES_DIR, max_workers=MAX_WORKERS):
+    """
+    Recompress images losslessly, create thumbnails and WebP variants in a process pool.
+    Images with identical pixels are processed once and share variants.
+
+    Args:
+        paths (list): paths of source images
+        output_dir (string): folder of the variants
+        max_workers (int): number of processes
+
+    Returns:
+        (dict): source path -> {png, webp, thumbnail, content_hash, perceptual_hash, bytes_saved}
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        hashes = dict(zip(paths, executor.map(hash_image, paths)))
+        unique = {}
+        for path, (content_hash, _) in hashes.items():
+            unique.setdefault(content_hash, path)
+        processed = dict(zip(
+            unique.keys(),
+            executor.map(create_variants, unique.values(), [output_dir] * len(unique), unique.keys()),
+        ))
+    variants = {}
+    for path, (content_hash, perceptual_hash) in hashes.items():
+        variants[path] = dict(processed[content_hash], content_hash=content_hash, perceptual_hash=perceptual_hash)
+    print("Optimized {} image(s), {} duplicate(s) skipped".format(len(unique), len(paths) - len(unique)))
+    for path_a, path_b in find_similar(hashes):
+        print("Similar images: {} and {}".format(path_a, path_b))
+    return variants
+
+
+def hash_image(path):
+    """
+    Content hash (sha256 of decoded pixels, independent of PNG encoding) and perceptual
+    difference hash (64 bits) of the image
+    """
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+        content_hash = hashlib.sha256(
+            "{}x{}".format(*image.size).encode() + image.tobytes()
+        ).hexdigest()
+        # dHash: compare neighbouring pixels of 9x8 grayscale image
+        pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    bits = [pixels[row * 9 + col] > pixels[row * 9 + col + 1] for row in range(8) for col in range(8)]
+    perceptual_hash = sum(1 << i for i, bit in enumerate(bits) if bit)
+    return content_hash, "{:016x}".format(perceptual_hash)
+
+
+def create_variants(path, output_dir=OPTIMIZED_IMAGES_DIR, content_hash=None):
+    """
+    Write losslessly recompressed PNG, lossless WebP and WebP thumbnail of the image. The variants are
+    named by the content hash, so sources with the same name (e.g. a/Sword.png and b/sword.jpg) do not
+    overwrite each other. A PNG source smaller than its recompression (already optimized) is kept as is
+
+    Args:
+        path (string): path of the source image
+        output_dir (string): folder of the variants
+        content_hash (string, optional): content hash of the image, see hash_image
+
+    Returns:
+        (dict): paths of the variants (png, webp, thumbnail) and bytes saved by the PNG recompression (0 if
+            the source is kept)
+    """
+    content_hash = content_hash if content_hash else hash_image(path)[0]
+    png_path = str(Path(output_dir) / "{}.png".format(content_hash))
+    webp_path = str(Path(output_dir) / "{}.webp".format(content_hash))
+    thumbnail_path = str(Path(output_dir) / "{}_thumbnail.webp".format(content_hash))
+    with Image.open(path) as image:
+        image.load()
+        image.save(png_path, format="PNG", optimize=True)
+        # same pixels -> same name, only the smaller encoding is kept
+        if image.format == "PNG" and os.path.getsize(path) <= os.path.getsize(png_path):
+            shutil.copyfile(path, png_path)
+        image.save(webp_path, format="WEBP", lossless=True, method=6)
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        thumbnail.save(thumbnail_path, format="WEBP", quality=85, method=6)
+    return {
+        "png": png_path,
+        "webp": webp_path,
+        "thumbnail": thumbnail_path,
+        "bytes_saved": os.path.getsize(path) - os.path.getsize(png_path),
+    }
+
+
+def find_similar(hashes, max_distance=SIMILARITY_DISTANCE):
+    """
+    Pairs of images with different pixels but (almost) the same perceptual hash
+    """
+    items = list(hashes.items())
+    similar = []
+    for i, (path_a, (content_a, perceptual_a)) in enumerate(items):
+        for path_b, (content_b, perceptual_b) in items[i + 1:]:
+            distance = bin(int(perceptual_a, 16) ^ int(perceptual_b, 16)).count("1")
+            if content_a != content_b and distance <= max_distance:
+                similar.append((path_a, path_b))
+    return similar
@@ -0,0 +1,120 @@
+from scripts.helpers import get_account, get_registered_contract, GEAR_MAPPING
+from scripts.tx_report import send_transaction
+from scripts.deploy_game import deploy_nft_game, MINTER_ROLE
+from brownie import MediavalSTRVGameV3
+from eth_utils import keccak
+from web3 import Web3
+import csv, json, os
+
+# csv with header address,id,amount; can be passed as argument: brownie run scripts/presale.py main <csv>
+PRESALE_CSV = os.getenv("PRESALE_CSV", "./presale/allowlist.csv")
+
+
+def main(csv_path=PRESALE_CSV, proofs_path=None):
+    owner = get_account()
+    nft_game = get_registered_contract("nft_game", MediavalSTRVGameV3)
+    if nft_game is None:
+        nft_game = deploy_nft_game(owner)
+    entries = load_allowlist(csv_path)
+    levels = build_tree([get_leaf(*entry) for entry in entries])
+    root = get_root(levels)
+    proofs_path = proofs_path if proofs_path else "{}.proofs.json".format(csv_path)
+    write_proofs(entries, levels, proofs_path)
+    tx = send_transaction(nft_game.setPresaleRoot, root, {"from": owner})
+    print("Presale of {} entries set by one transaction ({} gas), proofs in {}".format(len(entries), tx.gas_used, proofs_path))
+    grant_gas = nft_game.grantRole.estimate_gas(MINTER_ROLE, entries[0][1], {"from": owner})
+    print("Granting MINTER_ROLE per address would take {} transactions (~{} gas)".format(len(entries), grant_gas * len(entries)))
+
+
+def load_allowlist(csv_path, start_index=0):
+    """
+    Load the allowlist, every row is one claim of the presale
+
+    Args:
+        csv_path (string): csv file with header address,id,amount
+        start_index (int): index of the first claim, must follow indexes of previous allowlists of the game
+
+    Returns:
+        (list): (index, checksum address, gear id, amount)
+    """
+    entries = []
+    with open(csv_path, newline="") as file:
+        for index, row in enumerate(csv.DictReader(file), start=start_index):
+            id, amount = int(row["id"]), int(row["amount"])
+            if id not in GEAR_MAPPING or amount <= 0:
+                raise ValueError("{} invalid gear id or amount: {}".format(csv_path, row))
+            entries.append((index, Web3.toChecksumAddress(row["address"].strip()), id, amount))
+    return entries
+
+
+def get_leaf(index, address, id, amount):
+    """
+    keccak256(abi.encodePacked(index, knight, id, amount)) as computed by presaleMint
+    """
+    return keccak(
+        index.to_bytes(32, "big") + bytes.fromhex(address[2:]) + id.to_bytes(32, "big") + amount.to_bytes(32, "big")
+    )
+
+
+def build_tree(leaves):
+    """
+    Merkle tree compatible with OpenZeppelin MerkleProof (pairs are sorted before hashing, the last node
+    of a level with odd number of nodes is moved up unchanged)
+
+    Args:
+        leaves (list): leaf hashes (bytes) in the order of indexes
+
+    Returns:
+        (list): levels of the tree from the leaves up to the root
+    """
+    if not leaves:
+        raise ValueError("The tree needs at least one leaf")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([_hash_pair(*level[i:i + 2]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)])
+    return levels
+
+
+def get_root(levels):
+    return "0x" + levels[-1][0].hex()
+
+
+def get_proof(levels, position):
+    """
+    Proof of the leaf at the position (position in the tree, i.e. index - start_index)
+
+    Returns:
+        (list): sibling hashes as hex strings
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append("0x" + level[sibling].hex())
+        position //= 2
+    return proof
+
+
+def verify_proof(proof, root, leaf):
+    computed = leaf
+    for sibling in proof:
+        computed = _hash_pair(computed, bytes.fromhex(sibling[2:]))
+    return "0x" + computed.hex() == root
+
+
+def write_proofs(entries, levels, proofs_path):
+    """
+    Stream the root and claims with proofs into a json file ({"root": ..., "claims": [...]}),
+    the claims are written one by one instead of serializing one large object
+    """
+    with open(proofs_path, "w") as file:
+        file.write('{{"root": "{}", "claims": [\n'.format(get_root(levels)))
+        for position, (index, address, id, amount) in enumerate(entries):
+            claim = {"index": index, "address": address, "id": id, "amount": amount, "proof": get_proof(levels, position)}
+            file.write((",\n" if position else "") + json.dumps(claim))
+        file.write("\n]}\n")
+
+
+def _hash_pair(a, b):
+    return keccak(a + b) if a < b else keccak(b + a)
@@ -0,0 +1,261 @@
+from scripts.helpers import get_account, fund_with_link, NonceManager
+from scripts.deploy_game import deploy_nft_game
+from scripts.tx_report import recorder, percentile
+from brownie import accounts, chain, exceptions
+from eth_abi import encode_abi
+from eth_account import Account
+from eth_account.messages import SignableMessage
+from eth_utils import keccak
+from queue import Queue, Empty
+import os, random, threading, time
+
+ORDER_TYPEHASH = keccak(text="Order(address knight,uint8 action,uint256 id,uint256 amount,uint256 nonce,uint256 deadline)")
+ORDER_MINT = 0
+ORDER_BURN = 1
+# orders are batched until MAX_BATCH orders are queued or the oldest one waits MAX_WAIT seconds
+MAX_BATCH = int(os.getenv("RELAYER_MAX_BATCH", "50"))
+MAX_WAIT = float(os.getenv("RELAYER_MAX_WAIT", "1"))
+ORDER_DEADLINE = 3600  # seconds
+# batches are sent back to back (not gas-estimated), upper bounds of their gas
+BATCH_BASE_GAS = 60000
+ORDER_GAS = {ORDER_MINT: 80000, ORDER_BURN: 200000}
+PERCENTILES = [50, 95]
+
+
+def main():
+    owner = get_account()
+    nft_game = deploy_nft_game(owner)
+    knights = [accounts.add() for _ in range(20)]
+    fund_with_link(nft_game.address, owner, amount=len(knights) * nft_game.fee())
+    gear_to_burn = nft_game.gearToBurn()
+    relayer = OrderRelayer(nft_game, owner).start()
+    # every knight signs a mint and a burn of the minted gears, no knight holds any ETH:
+    # mints are prepaid into the game (e.g. bought by card), the relayer pays gas only
+    for knight in knights:
+        amount = random.randint(1, 3)
+        nft_game.depositForOrders(knight, {"from": owner, "value": amount * nft_game.ratesForPublicMint(gear_to_burn)})
+        relayer.submit(*sign_order(nft_game, knight, ORDER_MINT, gear_to_burn, amount, nonce=0))
+        relayer.submit(*sign_order(nft_game, knight, ORDER_BURN, gear_to_burn, amount, nonce=1))
+    print_report(relayer.stop())
+
+
+def get_order_hash(order):
+    """
+    hashStruct of the order as computed by the game (EIP-712)
+    """
+    return keccak(encode_abi(
+        ["bytes32", "address", "uint8", "uint256", "uint256", "uint256", "uint256"],
+        [ORDER_TYPEHASH, order["knight"], order["action"], order["id"], order["amount"], order["nonce"], order["deadline"]],
+    ))
+
+
+def get_signable_order(domain_separator, order):
+    return SignableMessage(b"\x01", bytes(domain_separator), get_order_hash(order))
+
+
+def sign_order(nft_game, knight, action, id, amount, nonce=None, deadline=None, domain_separator=None):
+    """
+    Create an order signed by the knight (local account with private key, e.g. accounts.add())
+
+    Args:
+        nft_game (contract): the game executing the order
+        knight (LocalAccount): the signer
+        action (int): ORDER_MINT or ORDER_BURN
+        id (int): gear id
+        amount (int): amount of gears
+        nonce (int, optional): nonce of the order, defaults to the next nonce of the knight on chain
+        deadline (int, optional): timestamp the order expires at, defaults to ORDER_DEADLINE from now
+        domain_separator (bytes, optional): defaults to DOMAIN_SEPARATOR() of the game
+
+    Returns:
+        (dict): the order
+        (string): the signature
+    """
+    order = {
+        "knight": str(knight),
+        "action": action,
+        "id": id,
+        "amount": amount,
+        "nonce": nonce if nonce is not None else nft_game.orderNonces(knight),
+        "deadline": deadline if deadline else chain.time() + ORDER_DEADLINE,
+    }
+    domain_separator = domain_separator if domain_separator else nft_game.DOMAIN_SEPARATOR()
+    signed = Account.sign_message(get_signable_order(domain_separator, order), knight.private_key)
+    return order, signed.signature.hex()
+
+
+class OrderRelayer:
+    """
+    Collects signed orders and executes them in batches by executeOrders of the game. Batches are sent
+    back to back under the nonce lane of the relayer account and confirmed by a separate thread.
+    The relayer pays gas only, mint orders are paid from deposits of knights (depositForOrders).
+    Orders failing in the game (OrderFailed) are skipped by the game without reverting their batch.
+
+    Usage:
+        relayer = OrderRelayer(nft_game, account).start()
+        relayer.submit(order, signature)
+        report = relayer.stop()  # sends queued orders and waits for all batches
+
+    Args:
+        nft_game (contract): the game (V3)
+        relayer (Account): pays gas of the batches
+        max_batch (int): max orders per transaction
+        max_wait (float): max seconds an order waits for its batch
+    """
+
+    def __init__(self, nft_game, relayer, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.nft_game = nft_game
+        self.relayer = relayer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.domain_separator = nft_game.DOMAIN_SEPARATOR()
+        self.nonces = NonceManager()
+        self.results = []  # per order: latency in queue and till mined, gas share, reverted, failure reason
+        self._orders = Queue()
+        self._confirmations = Queue()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._start = None
+
+    def start(self):
+        self._start = time.monotonic()
+        self._threads = [threading.Thread(target=target, daemon=True) for target in (self._batch, self._confirm)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def submit(self, order, signature):
+        """
+        Queue the order, its signature is checked before it is accepted
+
+        Raises:
+            ValueError: if the order is not signed by its knight
+        """
+        signer = Account.recover_message(get_signable_order(self.domain_separator, order), signature=signature)
+        if signer != order["knight"]:
+            raise ValueError("Order is not signed by its knight: {}".format(order))
+        self._orders.put((order, signature, time.monotonic()))
+
+    def stop(self):
+        """
+        Send queued orders, wait for all batches and return the report (see print_report)
+        """
+        self._stopped.set()
+        self._threads[0].join()
+        self._confirmations.put(None)
+        self._threads[1].join()
+        return self.report()
+
+    def report(self):
+        with self._lock:
+            results = list(self.results)
+        seconds = time.monotonic() - self._start
+        executed = [result for result in results if not result["reverted"]]
+        gas_used = sum(result["gas_used"] for result in executed)
+        report = {
+            "orders": len(results),
+            "reverted": len(results) - len(executed),
+            "batches": len(set(result["txid"] for result in results)),
+            "seconds": seconds,
+            "orders_per_sec": len(executed) / seconds if seconds else 0,
+            "gas_per_order": gas_used / len(executed) if executed else 0,
+        }
+        for name in ("queue_latency", "latency"):
+            latencies = sorted(result[name] for result in results)
+            for p in PERCENTILES:
+                report["{}_p{}".format(name, p)] = percentile(latencies, p, default=0)
+        return report
+
+    def _batch(self):
+        batch = []
+        while True:
+            timeout = self.max_wait - (time.monotonic() - batch[0][2]) if batch else self.max_wait
+            try:
+                batch.append(self._orders.get(timeout=max(timeout, 0)))
+            except Empty:
+                pass
+            full = len(batch) >= self.max_batch
+            waited = batch and time.monotonic() - batch[0][2] >= self.max_wait
+            if batch and (full or waited or (self._stopped.is_set() and self._orders.empty())):
+                self._send(batch)
+                batch = []
+            if self._stopped.is_set() and self._orders.empty() and not batch:
+                return
+
+    def _send(self, batch):
+        orders = [order for order, _, _ in batch]
+        gas_limit = BATCH_BASE_GAS + sum(ORDER_GAS[order["action"]] for order in orders)
+        sent = time.monotonic()
+        try:
+            tx = self.nft_game.executeOrders(
+                [_to_tuple(order) for order in orders],
+                [signature for _, signature, _ in batch],
+                self.nonces.tx_params(self.relayer, gas_limit=gas_limit),
+            )
+        except (exceptions.VirtualMachineError, ValueError):
+            # rejected before being mined -> the nonce of the relayer has not been used
+            self.nonces = NonceManager()
+            self._record(batch, sent, None)
+            return
+        recorder.submitted(tx, "MediavalSTRVGameV3.executeOrders")
+        self._confirmations.put((batch, sent, tx))
+
+    def _confirm(self):
+        while True:
+            item = self._confirmations.get()
+            if item is None:
+                return
+            batch, sent, tx = item
+            try:
+                tx.wait(1)
+            except exceptions.VirtualMachineError:
+                pass
+            recorder.record(tx)
+            self._record(batch, sent, tx)
+
+    def _record(self, batch, sent, tx):
+        mined = time.monotonic()
+        reverted = tx is None or tx.status != 1
+        # every order emits OrderExecuted or OrderFailed, an order (knight, nonce) is executed at most once
+        executed = []
+        failed = {}
+        if not reverted and "OrderExecuted" in tx.events:
+            executed = [(event["knight"], event["nonce"]) for event in tx.events["OrderExecuted"]]
+        if not reverted and "OrderFailed" in tx.events:
+            for event in tx.events["OrderFailed"]:
+                failed.setdefault((event["knight"], event["nonce"]), event["reason"])
+        with self._lock:
+            for order, _, received in batch:
+                key = (order["knight"], order["nonce"])
+                if reverted:
+                    reason = "Batch reverted"
+                elif key in executed:
+                    executed.remove(key)
+                    reason = None
+                else:
+                    reason = failed.get(key, "Unknown")
+                self.results.append({
+                    "txid": tx.txid if tx else None,
+                    "queue_latency": sent - received,
+                    "latency": mined - received,
+                    "gas_used": tx.gas_used / len(batch) if tx and not reverted else 0,
+                    "reverted": reason is not None,
+                    "reason": reason,
+                })
+
+
+def print_report(report):
+    print("\n{} orders in {} batches ({} reverted) in {:.1f} s -> {:.1f} orders/s, {:.0f} gas per order".format(
+        report["orders"], report["batches"], report["reverted"], report["seconds"],
+        report["orders_per_sec"], report["gas_per_order"],
+    ))
+    for name in ("queue_latency", "latency"):
+        print("{}: {}".format(name, ", ".join(
+            "p{} {:.3f} s".format(p, report["{}_p{}".format(name, p)]) for p in PERCENTILES
+        )))
+
+
+def _to_tuple(order):
+    return (order["knight"], order["action"], order["id"], order["amount"], order["nonce"], order["deadline"])
+
@@ -0,0 +1,329 @@
+from scripts.helpers import (
+    LOCAL_BLOCKCHAIN_ENVIRONMENTS, get_account, get_contract, get_request_ids, NonceManager, wait_for_transactions,
+)
+from scripts.indexer import CHUNK_SIZE
+from scripts.tx_report import recorder, TX_REPORT_DIR
+from brownie import MediavalSTRVGameV2, MediavalSTRVGameV3, accounts, network, config, exceptions, web3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from web3.logs import DISCARD
+import json, os, time
+
+# trace exported from a live network and replayed locally, can be passed as argument:
+#   brownie run scripts/replay.py main <trace> <from_block> --network rinkeby  (export)
+#   brownie run scripts/replay.py main <trace>                                 (replay)
+TRACE_FILE = os.getenv("REPLAY_TRACE", "./traces/nft_game.json")
+# versions the trace is replayed against, the first one is the base of the gas diff
+REPLAY_VERSIONS = [MediavalSTRVGameV2, MediavalSTRVGameV3]
+# calls are sent back to back (not gas-estimated, they may revert as in the trace)
+REPLAY_GAS_LIMIT = int(os.getenv("REPLAY_GAS_LIMIT", "5000000"))
+# number of blocks fetched concurrently by the export
+EXPORT_WORKERS = 8
+# pseudo function of the trace: VRF callback of the recorded request with the recorded randomness
+FULFILL = "fulfillRandomness"
+RECEIVE = "receive"
+
+
+def main(trace_file=TRACE_FILE, from_block=None, to_block=None):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        if from_block is None:
+            raise ValueError("Block the game was deployed at is needed to export its trace")
+        nft_game_address = config["networks"][network.show_active()]["deployed_nft_game"]
+        trace = export_trace(nft_game_address, int(from_block), int(to_block) if to_block else None)
+        save_trace(trace, trace_file)
+        return
+    trace = load_trace(trace_file)
+    diff = compare_gas(replay_versions(trace))
+    print_gas_diff(diff)
+    write_gas_diff(diff)
+
+
+def export_trace(nft_game_address, from_block, to_block=None, contract_type=MediavalSTRVGameV2):
+    """
+    Export calls of the game (function, args, sender, value) and its fulfilled randomness in the order
+    they were mined. The trace should start at the block the game was deployed at, the replay starts
+    from a freshly deployed game.
+
+    Args:
+        nft_game_address (string): address of the deployed game
+        from_block (int): first exported block
+        to_block (int, optional): last exported block, defaults to the latest block
+        contract_type (ContractContainer): deployed version of the game, its ABI decodes the calls
+
+    Returns:
+        (dict): the trace, see save_trace
+    """
+    to_block = web3.eth.block_number if to_block is None else to_block
+    nft_game = contract_type.at(nft_game_address)
+    game = web3.eth.contract(address=nft_game.address, abi=contract_type.abi)
+    calls = []
+    # blocks are fetched concurrently, map keeps them in order
+    with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+        blocks = executor.map(
+            lambda number: web3.eth.get_block(number, full_transactions=True), range(from_block, to_block + 1)
+        )
+        for block in blocks:
+            for tx in block.transactions:
+                if tx["to"] == nft_game.address:
+                    calls.append(_export_call(game, tx))
+            if block.number % 1000 == 0:
+                print("Exported up to block {} ({} calls)".format(block.number, len(calls)))
+    for start in range(from_block, to_block + 1, CHUNK_SIZE):
+        for event in game.events.FulfilledRandomness.getLogs(fromBlock=start, toBlock=min(start + CHUNK_SIZE - 1, to_block)):
+            calls.append({
+                "block": event.blockNumber,
+                "tx_index": event.transactionIndex,
+                "tx_hash": event.transactionHash.hex(),
+                "sender": None,
+                "function": FULFILL,
+                "args": [_to_json(event.args.requestId), event.args.randomness],
+                "value": 0,
+                "status": 1,
+                # gas of the coordinator (proof verification) is not comparable to the mock callback
+                "gas_used": None,
+                "request_ids": [],
+            })
+    calls.sort(key=lambda call: (call["block"], call["tx_index"]))
+    print("Exported {} calls of {} from blocks {}-{}".format(len(calls), nft_game.address, from_block, to_block))
+    return {
+        "network": network.show_active(),
+        "game": nft_game.address,
+        "contract_type": contract_type._name,
+        "admin": nft_game.owner(),
+        "key_hash": _to_json(nft_game.keyHash()),
+        "fee": nft_game.fee(),
+        "from_block": from_block,
+        "to_block": to_block,
+        "calls": calls,
+    }
+
+
+def save_trace(trace, trace_file):
+    """
+    Write the trace into a json file: header (game, admin, VRF key hash and fee, blocks) and the calls,
+    every call is {block, tx_index, tx_hash, sender, function, args, value, status, gas_used, request_ids}
+    """
+    trace_file = Path(trace_file)
+    trace_file.parent.mkdir(parents=True, exist_ok=True)
+    with trace_file.open("w") as file:
+        json.dump(trace, file, indent=4)
+    print("Trace of {} calls written to {}".format(len(trace["calls"]), trace_file))
+
+
+def load_trace(trace_file):
+    with open(trace_file) as file:
+        return json.load(file)
+
+
+def replay(trace, contract_type, gas_limit=REPLAY_GAS_LIMIT):
+    """
+    Replay the trace against a freshly deployed game on the local network. Senders of the trace are
+    impersonated (the game is deployed by its recorded admin) and their calls are sent back to back,
+    i.e. only in nonce order per sender. Recorded randomness is fed back by the VRF Coordinator mock,
+    a callback waits only for the transaction of its request (the replayed request id differs).
+
+    Args:
+        trace (dict): the trace, see export_trace
+        contract_type (ContractContainer): the replayed version, must be compatible with the traced one
+        gas_limit (int): gas limit of every call
+
+    Returns:
+        (contract): the game the trace was replayed against
+        (list): per call: function, status and gas used of the replay and of the trace, unsupported if the
+            version has no such function
+    """
+    owner = get_account()
+    vrf_coordinator = get_contract("vrf_coordinator")
+    link_token = get_contract("link_token")
+    calls = trace["calls"]
+    senders = {address: accounts.at(address, force=True) for address in
+               set([trace["admin"]] + [call["sender"] for call in calls if call["sender"]])}
+    nft_game = contract_type.deploy(
+        vrf_coordinator.address, link_token.address, trace["key_hash"], trace["fee"], {"from": senders[trace["admin"]]}
+    )
+    print("Replaying {} calls against {} {}".format(len(calls), contract_type._name, nft_game.address))
+
+    # senders get ETH sent with their calls, the game gets LINK for all requests of the trace
+    nonces = NonceManager()
+    submitted = time.monotonic()
+    values = {}
+    for call in calls:
+        if call["sender"] and call["value"]:
+            values[call["sender"]] = values.get(call["sender"], 0) + call["value"]
+    funding_txs = [owner.transfer(address, value, **_transfer_params(nonces, owner)) for address, value in values.items()]
+    # one extra fee keeps the LINK balance of the game non-zero (as on a funded game) after the last request
+    requests = sum(len(call["request_ids"]) for call in calls)
+    funding_txs.append(link_token.transfer(nft_game.address, (requests + 1) * trace["fee"], nonces.tx_params(owner)))
+    wait_for_transactions(funding_txs, submitted=submitted)
+
+    # functions of the trace missing in the replayed version (e.g. removed or made internal) are not sent
+    functions = set(item["name"] for item in contract_type.abi if item["type"] == "function") | {FULFILL, RECEIVE}
+    requested = {}  # recorded request id -> (replayed transaction, position of the request in it)
+    replayed = []  # (call, transaction or None if it was rejected or unsupported)
+    for call in calls:
+        if call["function"] not in functions:
+            replayed.append((call, None))
+            continue
+        try:
+            if call["function"] == FULFILL:
+                tx = _fulfill(call, requested, vrf_coordinator, nft_game, nonces.tx_params(owner, gas_limit=gas_limit))
+            elif call["function"] == RECEIVE:
+                sender = senders[call["sender"]]
+                tx = sender.transfer(nft_game.address, call["value"], **_transfer_params(nonces, sender, gas_limit=gas_limit))
+            else:
+                tx = getattr(nft_game, call["function"])(*call["args"], nonces.tx_params(
+                    senders[call["sender"]], value=call["value"], gas_limit=gas_limit
+                ))
+        except (exceptions.VirtualMachineError, ValueError):
+            # rejected before being mined -> nonces are read again from the chain
+            nonces = NonceManager()
+            tx = None
+        if tx is not None:
+            recorder.submitted(tx, "{}.{}".format(contract_type._name, call["function"]))
+            for position, request_id in enumerate(call["request_ids"]):
+                requested[request_id] = (tx, position)
+        replayed.append((call, tx))
+
+    results = []
+    for call, tx in replayed:
+        if tx is not None:
+            _wait(tx)
+            recorder.record(tx)
+        results.append({
+            "function": call["function"],
+            "unsupported": call["function"] not in functions,
+            "status": tx.status if tx is not None else 0,
+            "gas_used": tx.gas_used if tx is not None and tx.status == 1 else None,
+            "recorded_status": call["status"],
+            "recorded_gas_used": call["gas_used"],
+        })
+    return nft_game, results
+
+
+def replay_versions(trace, versions=REPLAY_VERSIONS, gas_limit=REPLAY_GAS_LIMIT):
+    """
+    Replay the trace against every version, each version gets its own freshly deployed game
+
+    Returns:
+        (dict): name of the version -> results of the replay (see replay)
+    """
+    return {contract_type._name: replay(trace, contract_type, gas_limit)[1] for contract_type in versions}
+
+
+def compare_gas(results_by_version):
+    """
+    Per-function gas of the trace and of the replayed versions, averages are taken over successful calls
+
+    Returns:
+        (dict): function -> {calls, recorded_gas, versions: {version -> {avg_gas, reverted, status_mismatches,
+            unsupported}}}
+    """
+    diff = {}
+    for version, results in results_by_version.items():
+        for function in sorted(set(result["function"] for result in results)):
+            calls = [result for result in results if result["function"] == function]
+            recorded = [call["recorded_gas_used"] for call in calls if call["recorded_gas_used"] and call["recorded_status"] == 1]
+            row = diff.setdefault(function, {"calls": len(calls), "recorded_gas": _average(recorded), "versions": {}})
+            supported = [call for call in calls if not call["unsupported"]]
+            row["versions"][version] = {
+                "avg_gas": _average([call["gas_used"] for call in supported if call["status"] == 1]),
+                "reverted": len([call for call in supported if call["status"] != 1]),
+                "status_mismatches": len([call for call in supported if call["status"] != call["recorded_status"]]),
+                "unsupported": len(calls) - len(supported),
+            }
+    return diff
+
+
+def print_gas_diff(diff):
+    print("\nGas per function (average of successful calls):")
+    for function, row in diff.items():
+        versions = list(row["versions"].items())
+        base_gas = versions[0][1]["avg_gas"]
+        columns = []
+        for i, (version, stats) in enumerate(versions):
+            column = "{} {}".format(version, _format_gas(stats["avg_gas"]))
+            if i and stats["avg_gas"] is not None and base_gas:
+                column += " ({:+.1%})".format(stats["avg_gas"] / base_gas - 1)
+            if stats["status_mismatches"]:
+                column += " [{} status mismatch(es)]".format(stats["status_mismatches"])
+            if stats["unsupported"]:
+                column += " [{} unsupported]".format(stats["unsupported"])
+            columns.append(column)
+        print("{}: {} calls, recorded {}, {}".format(function, row["calls"], _format_gas(row["recorded_gas"]), ", ".join(columns)))
+
+
+def write_gas_diff(diff, report_dir=None, name="replay_gas_diff"):
+    report_dir = Path(report_dir or TX_REPORT_DIR)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_file = report_dir / "{}.json".format(name)
+    with report_file.open("w") as file:
+        json.dump(diff, file, indent=4)
+    print("Gas diff written to {}".format(report_file))
+    return str(report_file)
+
+
+def _export_call(game, tx):
+    receipt = web3.eth.get_transaction_receipt(tx.hash)
+    if tx.input in ("0x", ""):
+        function, args = RECEIVE, []
+    else:
+        function, decoded = game.decode_function_input(tx.input)
+        args = [_to_json(decoded[item["name"]]) for item in function.abi["inputs"]]
+        function = function.fn_name
+    return {
+        "block": tx.blockNumber,
+        "tx_index": tx.transactionIndex,
+        "tx_hash": tx.hash.hex(),
+        "sender": tx["from"],
+        "function": function,
+        "args": args,
+        "value": tx.value,
+        "status": receipt.status,
+        "gas_used": receipt.gasUsed,
+        "request_ids": [
+            _to_json(event.args.requestId) for event in game.events.RequestedRandomness().processReceipt(receipt, errors=DISCARD)
+        ],
+    }
+
+
+def _fulfill(call, requested, vrf_coordinator, nft_game, tx_params):
+    request_id, randomness = call["args"]
+    if request_id not in requested:
+        # requested before the trace starts or by a call which was rejected by the replay
+        return None
+    tx, position = requested[request_id]
+    _wait(tx)
+    request_ids = get_request_ids(tx) if tx.status == 1 else []
+    if position >= len(request_ids):
+        return None
+    return vrf_coordinator.callBackWithRandomness(request_ids[position], randomness, nft_game.address, tx_params)
+
+
+def _transfer_params(nonces, account, **params):
+    # Account.transfer takes the parameters as keyword arguments, the sender is the account itself
+    params = nonces.tx_params(account, **params)
+    del params["from"]
+    return params
+
+
+def _wait(tx):
+    try:
+        tx.wait(1)
+    except exceptions.VirtualMachineError:
+        pass
+
+
+def _to_json(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _average(values):
+    return sum(values) / len(values) if values else None
+
+
+def _format_gas(gas):
+    return "-" if gas is None else "{:.0f}".format(gas)
@@ -0,0 +1,165 @@
+from scripts import deploy_game
+from brownie import web3
+from pathlib import Path
+import json, os, sys, threading, time
+
+# reports are written into this folder, can be changed by env variable TX_REPORT_DIR (as transaction reports)
+RPC_REPORT_DIR = os.getenv("TX_REPORT_DIR", "./reports")
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+# the closest frame from these folders is the call site of a request
+PROJECT_SOURCES = [str(PROJECT_DIR / "scripts"), str(PROJECT_DIR / "tests")]
+_PROFILER_FILE = str(Path(__file__).resolve())
+
+
+def main():
+    with RpcProfiler() as profiler:
+        deploy_game.main()
+    profiler.print_report()
+    profiler.write_report()
+
+
+class RpcProfiler:
+    """
+    Counts and times JSON-RPC requests by wrapping make_request of the web3 provider,
+    every request is attributed to the closest frame of our scripts or tests (the call site)
+
+    Usage:
+        with RpcProfiler() as profiler:
+            deploy_game.main()
+        profiler.print_report()
+
+    Args:
+        w3 (Web3, optional): defaults to the web3 of brownie (connect the network first)
+    """
+
+    def __init__(self, w3=None):
+        self.w3 = w3 if w3 else web3
+        self.methods = {}  # method -> {count, seconds, errors}
+        self.call_sites = {}  # (call site, method) -> {count, seconds}
+        self.requests = {}  # (method, params) -> count, to find repeated requests
+        self._lock = threading.Lock()
+        self._provider = None
+        self._start = None
+        self.seconds = 0
+
+    def start(self):
+        provider = self.w3.provider
+        make_request = provider.make_request
+
+        def profiled_make_request(method, params):
+            start = time.perf_counter()
+            error = False
+            try:
+                response = make_request(method, params)
+                error = isinstance(response, dict) and "error" in response
+                return response
+            except Exception:
+                error = True
+                raise
+            finally:
+                self._record(method, params, time.perf_counter() - start, error)
+
+        self._provider = provider
+        # instance attribute shadows the method of the provider class, web3 caches the middleware
+        # chain built around make_request -> reset the cache
+        provider.make_request = profiled_make_request
+        provider._request_func_cache = (None, None)
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        if self._provider is not None:
+            del self._provider.make_request
+            self._provider._request_func_cache = (None, None)
+            self.seconds += time.perf_counter() - self._start
+            self._provider = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def total_calls(self):
+        return sum(stats["count"] for stats in self.methods.values())
+
+    def _record(self, method, params, seconds, error):
+        call_site = _get_call_site()
+        request_key = (method, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            stats = self.methods.setdefault(method, {"count": 0, "seconds": 0, "errors": 0})
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["errors"] += error
+            site_stats = self.call_sites.setdefault((call_site, method), {"count": 0, "seconds": 0})
+            site_stats["count"] += 1
+            site_stats["seconds"] += seconds
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+    def report(self, top=20):
+        """
+        Returns:
+            (dict): total calls and seconds, stats per method (count, seconds, avg_ms, errors),
+                top call sites and top repeated requests (same method and params sent more than once)
+        """
+        methods = {
+            method: dict(stats, avg_ms=stats["seconds"] / stats["count"] * 1000)
+            for method, stats in sorted(self.methods.items(), key=lambda item: -item[1]["count"])
+        }
+        call_sites = [
+            {"call_site": call_site, "method": method, **stats}
+            for (call_site, method), stats in sorted(self.call_sites.items(), key=lambda item: -item[1]["count"])
+        ]
+        repeated = [
+            {"method": method, "params": params, "count": count}
+            for (method, params), count in sorted(self.requests.items(), key=lambda item: -item[1])
+            if count > 1
+        ]
+        return {
+            "calls": self.total_calls,
+            "rpc_seconds": sum(stats["seconds"] for stats in self.methods.values()),
+            "profiled_seconds": self.seconds,
+            "methods": methods,
+            "call_sites": call_sites[:top],
+            "repeated_requests": repeated[:top],
+        }
+
+    def print_report(self, top=10):
+        report = self.report(top)
+        print("\n{} RPC calls, {:.3f} s spent in RPC".format(report["calls"], report["rpc_seconds"]))
+        for method, stats in report["methods"].items():
+            print("{}: {} calls, {:.3f} s, avg {:.2f} ms, {} errors".format(
+                method, stats["count"], stats["seconds"], stats["avg_ms"], stats["errors"]
+            ))
+        print("\nTop call sites:")
+        for site in report["call_sites"]:
+            print("{} {}: {} calls, {:.3f} s".format(site["call_site"], site["method"], site["count"], site["seconds"]))
+        print("\nTop repeated requests:")
+        for request in report["repeated_requests"]:
+            print("{} {}: {} calls".format(request["method"], request["params"][:80], request["count"]))
+
+    def write_report(self, report_dir=None, name="rpc_profile", top=100):
+        report_dir = Path(report_dir or RPC_REPORT_DIR)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        path = report_dir / "{}.json".format(name)
+        with path.open("w") as file:
+            json.dump(self.report(top), file, indent=4)
+        print("RPC profile written to {}".format(path))
+        return str(path)
+
+
+def _get_call_site():
+    """
+    The closest frame of our scripts or tests, e.g. scripts/helpers.py:120 (get_contract)
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != _PROFILER_FILE and any(filename.startswith(source) for source in PROJECT_SOURCES):
+            return "{}:{} ({})".format(
+                os.path.relpath(filename, PROJECT_DIR), frame.f_lineno, frame.f_code.co_name
+            )
+        frame = frame.f_back
+    return "<external>"
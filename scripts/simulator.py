@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from web3 import Web3
+import numpy as np
+import time
+
+GEAR_COUNT = 3
+PERCENTILES = [5, 50, 95]
+# simulations processed at once, arrays of a chunk are chunk size x orders
+CHUNK_SIZE = 10000
+
+
+@dataclass
+class GameParameters:
+    """
+    Parameters of the game as set by setParametersOfPublicMint and setBurnGearParameters
+    """
+    minting_threshold: int = 80
+    gear_to_burn: int = 1
+    gear_to_mint: int = 2
+    max_available_for_public_mint: int = 1000
+    rates_for_public_mint: list = field(default_factory=lambda: [Web3.toWei(0.1, "ether")] * GEAR_COUNT)
+    fee: int = Web3.toWei(0.1, "ether")  # LINK (in WEI) paid per VRF request
+
+
+@dataclass
+class Demand:
+    """
+    Assumed behaviour of knights
+
+    Attributes:
+        orders (int): number of publicMint calls per simulation
+        gear_weights (list): probability of each gear being ordered
+        max_order (int): amounts of orders are uniform from 1 to max_order
+        burn_share (float): share of burnable gears the knights burn to gain gear
+        burn_batch (int): gears burnt per VRF request (1 = burnToGainGear, more = burnToGainGearBatch)
+    """
+    orders: int = 500
+    gear_weights: list = field(default_factory=lambda: [1 / 3] * GEAR_COUNT)
+    max_order: int = 5
+    burn_share: float = 0.5
+    burn_batch: int = 1
+
+
+def random_numbers(randomness):
+    """
+    Random numbers from 1 to 100 as calculated by fulfillRandomness, i.e. (randomness % 100) + 1
+
+    Args:
+        randomness (iterable): random words (int up to 2**256)
+
+    Returns:
+        (np.ndarray): the random numbers
+    """
+    return np.array([int(word) % 100 + 1 for word in randomness], dtype=np.int64)
+
+
+def roll_outcomes(randomness, minting_threshold):
+    """
+    Whether each single-roll request wins a gear, i.e. random number <= mintingThreshold
+    """
+    return random_numbers(randomness) <= minting_threshold
+
+
+def batch_gears_won(randomness, amount, minting_threshold):
+    """
+    Gears won by one burnToGainGearBatch request, the random word is expanded the same way as on chain
+    (keccak256(abi.encode(randomness, i)) for every roll i)
+    """
+    if amount <= 1:
+        return int(roll_outcomes([randomness], minting_threshold)[0])
+    words = [Web3.toInt(Web3.solidityKeccak(["uint256", "uint256"], [randomness, i])) for i in range(amount)]
+    return int(roll_outcomes(words, minting_threshold).sum())
+
+
+def simulate(parameters, demand, simulations=10000, seed=None, chunk_size=CHUNK_SIZE):
+    """
+    Simulate public mint and burn-to-gain rounds of the game, simulations are processed in chunks
+    (vectorized within a chunk) to keep the memory bounded
+
+    Public mint accepts orders one by one against the remaining supply as publicMint does, i.e. an order
+    which does not fit is rejected while later smaller orders may still be accepted.
+    Burns are simulated roll by roll with the win probability of the contract's rule
+    (minting_threshold out of 100 random numbers).
+
+    Args:
+        parameters (GameParameters): the game parameters
+        demand (Demand): the behaviour of knights
+        simulations (int): number of simulated rounds
+        seed (int, optional): seed of the random generator
+        chunk_size (int): max simulations processed at once
+
+    Returns:
+        (dict): arrays with one value per simulation - supply (simulations x gears), revenue (WEI),
+            link_spend (WEI), burnt and won gears
+    """
+    rng = np.random.default_rng(seed)
+    chunks = [
+        _simulate_chunk(parameters, demand, min(chunk_size, simulations - start), rng)
+        for start in range(0, simulations, chunk_size)
+    ]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def _simulate_chunk(parameters, demand, simulations, rng):
+    shape = (simulations, demand.orders)
+    gears = rng.choice(GEAR_COUNT, size=shape, p=np.asarray(demand.gear_weights) / np.sum(demand.gear_weights))
+    amounts = rng.integers(1, demand.max_order + 1, size=shape)
+    # publicMint: require(mintedPublicly + amount <= maxAvailableForPublicMint) -> checked order by order
+    supply = np.zeros((simulations, GEAR_COUNT), dtype=np.int64)
+    remaining = np.full(simulations, parameters.max_available_for_public_mint, dtype=np.int64)
+    rows = np.arange(simulations)
+    for order in range(demand.orders):
+        minted = np.where(amounts[:, order] <= remaining, amounts[:, order], 0)
+        remaining -= minted
+        supply[rows, gears[:, order]] += minted
+    rates = np.asarray(parameters.rates_for_public_mint, dtype=np.float64)
+    revenue = (supply * rates).sum(axis=1)
+    # burnToGainGear: every burnt gear is one roll, won if (randomness % 100) + 1 <= mintingThreshold
+    burnt = rng.binomial(supply[:, parameters.gear_to_burn], demand.burn_share)
+    won = rng.binomial(burnt, parameters.minting_threshold / 100)
+    supply[:, parameters.gear_to_burn] -= burnt
+    supply[:, parameters.gear_to_mint] += won
+    requests = np.ceil(burnt / max(demand.burn_batch, 1))
+    return {
+        "supply": supply,
+        "revenue": revenue,
+        "link_spend": requests * parameters.fee,
+        "burnt": burnt,
+        "won": won,
+    }
+
+
+def summarize(results, percentiles=PERCENTILES):
+    """
+    Percentiles of simulated distributions
+
+    Returns:
+        (dict): name -> {percentile: value}, supply is reported per gear (supply_0, supply_1, ...)
+    """
+    distributions = {name: values for name, values in results.items() if name != "supply"}
+    for gear in range(results["supply"].shape[1]):
+        distributions["supply_{}".format(gear)] = results["supply"][:, gear]
+    return {
+        name: dict(zip(percentiles, np.percentile(values, percentiles))) for name, values in distributions.items()
+    }
+
+
+def main():
+    parameters, demand = GameParameters(), Demand()
+    simulations = 100000
+    start = time.perf_counter()
+    results = simulate(parameters, demand, simulations)
+    seconds = time.perf_counter() - start
+    print("{} simulations ({} orders each) in {:.2f} s -> {:.0f} burns and {:.0f} orders per second".format(
+        simulations, demand.orders, seconds, results["burnt"].sum() / seconds, simulations * demand.orders / seconds
+    ))
+    for name, values in summarize(results).items():
+        print("{}: {}".format(name, ", ".join("p{} {:.4g}".format(p, value) for p, value in values.items())))
@@ -0,0 +1,214 @@
+from brownie import chain, exceptions
+from brownie.network.transaction import TransactionReceipt
+from pathlib import Path
+import csv, json, os, threading, time
+
+# reports are written into this folder, can be changed by env variable TX_REPORT_DIR
+TX_REPORT_DIR = os.getenv("TX_REPORT_DIR", "./reports")
+# upper bounds of histogram buckets
+GAS_BUCKETS = [21000, 50000, 100000, 200000, 500000, 1000000, 3000000]
+LATENCY_BUCKETS = [0.1, 0.5, 1, 2, 5, 15, 30, 60, 120]  # seconds
+PERCENTILES = [50, 95]
+RECORD_FIELDS = [
+    "txid", "function", "status", "gas_used", "gas_limit", "gas_price", "latency", "revert_msg", "block_number",
+]
+
+
+class TransactionRecorder:
+    """
+    Collects gas, price and latency of transactions sent by our scripts, see send_transaction
+    """
+
+    def __init__(self):
+        self.records = []
+        self._recorded = set()
+        self._submitted = {}  # txid -> (monotonic time of submission, function name)
+        self._lock = threading.Lock()
+
+    def submitted(self, tx, function_name=None):
+        """
+        Remember submission time (and function name) of a pending transaction, it is recorded
+        once waited for (see record)
+        """
+        with self._lock:
+            self._submitted[tx.txid] = (time.monotonic(), function_name)
+        return tx
+
+    def record(self, tx, function_name=None, submitted=None, revert_msg=None):
+        """
+        Record a mined transaction, a transaction is recorded once
+
+        Args:
+            tx (TransactionReceipt): the transaction, None if it reverted before being sent (gas estimation)
+            function_name (string, optional): defaults to name decoded by brownie, e.g. LinkToken.transfer
+            submitted (float, optional): monotonic time of submission, defaults to time set by submitted()
+            revert_msg (string, optional): defaults to revert message of the transaction
+        """
+        with self._lock:
+            if tx is not None:
+                if tx.txid in self._recorded:
+                    return
+                self._recorded.add(tx.txid)
+                pending_submitted, pending_name = self._submitted.pop(tx.txid, (None, None))
+                submitted = submitted if submitted is not None else pending_submitted
+                function_name = function_name or pending_name or _get_function_name(tx)
+            self.records.append({
+                "txid": tx.txid if tx else None,
+                "function": function_name,
+                "status": tx.status if tx else 0,
+                "gas_used": tx.gas_used if tx else None,
+                "gas_limit": tx.gas_limit if tx else None,
+                "gas_price": tx.gas_price if tx else None,
+                "latency": time.monotonic() - submitted if submitted is not None else None,
+                "revert_msg": revert_msg or (tx.revert_msg if tx and tx.status != 1 else None),
+                "block_number": tx.block_number if tx else None,
+            })
+
+    def chain_reverted(self):
+        """
+        Forget which transactions have been recorded once the chain has been reverted (e.g. chain.revert
+        or chain.undo), a transaction sent again afterwards has the same txid but is mined again
+        """
+        with self._lock:
+            self._recorded.clear()
+
+    def record_history(self, txs):
+        """
+        Record already mined transactions (e.g. brownie.network.history), their latency is unknown
+        """
+        for tx in list(txs):
+            if tx.status != -1:
+                self.record(tx)
+
+    def summary(self):
+        """
+        Returns:
+            (dict): function name -> count, reverted, gas used, gas limit usage, effective gas price,
+                latency percentiles and histograms of gas used and latency
+        """
+        functions = {}
+        for record in self.records:
+            functions.setdefault(record["function"], []).append(record)
+        return {name: _get_stats(records) for name, records in sorted(functions.items(), key=lambda item: str(item[0]))}
+
+    def write_report(self, report_dir=None, name="transactions"):
+        """
+        Write the summary and all records into <name>.json and the records into <name>.csv
+
+        Returns:
+            (tuple): paths of the json and csv reports
+        """
+        report_dir = Path(report_dir or TX_REPORT_DIR)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        json_path, csv_path = report_dir / "{}.json".format(name), report_dir / "{}.csv".format(name)
+        with json_path.open("w") as file:
+            json.dump({"summary": self.summary(), "transactions": self.records}, file, indent=4)
+        with csv_path.open("w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=RECORD_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+        print("Report of {} transaction(s) written to {}".format(len(self.records), json_path))
+        return str(json_path), str(csv_path)
+
+    def print_summary(self):
+        for name, stats in self.summary().items():
+            print("{}: {} tx, {} reverted, avg gas {} ({:.0%} of limit), latency p50 {}".format(
+                name, stats["count"], stats["reverted"], stats["avg_gas_used"],
+                stats["avg_gas_limit_usage"] or 0, _format_seconds(stats["latency_p50"]),
+            ))
+
+
+# recorder shared by all helpers of the process
+recorder = TransactionRecorder()
+
+
+def send_transaction(function, *args, function_name=None, **kwargs):
+    """
+    Send a transaction (contract call or deployment), wait for it and record it by the recorder
+
+    Args:
+        function (callable): e.g. link_token.transfer or ProxyAdmin.deploy
+        *args: arguments of the function including the transaction parameters
+        function_name (string, optional): name in the report, defaults to name decoded by brownie
+        **kwargs: keyword arguments of the function, e.g. publish_source
+
+    Returns:
+        the result of the function (TransactionReceipt or the deployed contract)
+
+    Raises:
+        VirtualMachineError: the transaction reverted, it is recorded with its revert message
+    """
+    submitted = time.monotonic()
+    try:
+        result = function(*args, **kwargs)
+    except exceptions.VirtualMachineError as error:
+        txid = getattr(error, "txid", None)
+        tx = chain.get_transaction(txid) if txid else None
+        recorder.record(
+            tx, function_name or getattr(function, "_name", None), submitted, getattr(error, "revert_msg", None)
+        )
+        raise
+    tx = result if isinstance(result, TransactionReceipt) else result.tx
+    tx.wait(1)
+    recorder.record(tx, function_name, submitted)
+    return result
+
+
+def _get_function_name(tx):
+    if tx.contract_name and tx.fn_name:
+        return "{}.{}".format(tx.contract_name, tx.fn_name)
+    return tx.fn_name or "transfer"
+
+
+def _get_stats(records):
+    gas_used = [record["gas_used"] for record in records if record["gas_used"] is not None]
+    usages = [record["gas_used"] / record["gas_limit"] for record in records if record["gas_limit"]]
+    gas_prices = [record["gas_price"] for record in records if record["gas_price"] is not None]
+    latencies = sorted(record["latency"] for record in records if record["latency"] is not None)
+    stats = {
+        "count": len(records),
+        "reverted": sum(record["status"] != 1 for record in records),
+        "avg_gas_used": sum(gas_used) // len(gas_used) if gas_used else None,
+        "max_gas_used": max(gas_used) if gas_used else None,
+        "avg_gas_limit_usage": sum(usages) / len(usages) if usages else None,
+        "avg_gas_price": sum(gas_prices) // len(gas_prices) if gas_prices else None,
+        "gas_histogram": _histogram(gas_used, GAS_BUCKETS),
+        "latency_histogram": _histogram(latencies, LATENCY_BUCKETS),
+    }
+    for p in PERCENTILES:
+        stats["latency_p{}".format(p)] = percentile(latencies, p)
+    return stats
+
+
+def _histogram(values, buckets):
+    """
+    Counts of values per bucket, keys are upper bounds ("<=bound") and "inf"
+    """
+    counts = {"<={}".format(bound): 0 for bound in buckets}
+    counts["inf"] = 0
+    for value in values:
+        bound = next((bound for bound in buckets if value <= bound), None)
+        counts["<={}".format(bound) if bound is not None else "inf"] += 1
+    return counts
+
+
+def percentile(sorted_values, p, default=None):
+    """
+    Nearest-rank percentile of sorted values, shared by the reports of our scripts
+
+    Args:
+        sorted_values (list): values sorted ascending
+        p (float): the percentile (0-100)
+        default (optional): returned for no values
+
+    Returns:
+        the value at the percentile
+    """
+    if not sorted_values:
+        return default
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def _format_seconds(seconds):
+    return "{:.3f} s".format(seconds) if seconds is not None else "n/a"
@@ -0,0 +1,72 @@
+from pathlib import Path
+import json, os
+import pytest
+
+# machine-readable baseline: {"<function>[<size>]": gas_used}, committed with the benchmarks
+GAS_BASELINE_FILE = Path(__file__).parent / "gas_baseline.json"
+# allowed increase of gas used (in percents) before a benchmark fails, e.g. GAS_REGRESSION_TOLERANCE=2.5
+GAS_REGRESSION_TOLERANCE = float(os.getenv("GAS_REGRESSION_TOLERANCE", "5"))
+# set UPDATE_GAS_BASELINE=True to record measured values into the baseline (new benchmarks included)
+UPDATE_GAS_BASELINE = os.getenv("UPDATE_GAS_BASELINE") == "True"
+
+
+class GasRecorder:
+    """
+    Collects gas used by benchmarked transactions and compares it with the baseline
+
+    Args:
+        baseline (dict): previously recorded gas used, keyed by benchmark name
+        tolerance (float): allowed regression in percents
+    """
+
+    def __init__(self, baseline, tolerance):
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.measured = {}
+
+    def record(self, name, tx):
+        """
+        Record gas used by the transaction and fail if it regressed past the tolerance or the benchmark
+        has no baseline (unless the baseline is being updated)
+
+        Args:
+            name (string): name of the benchmark, e.g. "burnToGainGear[10]"
+            tx (TransactionReceipt): the receipt of benchmarked transaction
+
+        Returns:
+            (int): gas used by the transaction
+        """
+        gas_used = tx.gas_used
+        self.measured[name] = gas_used
+        baseline_gas = self.baseline.get(name)
+        print("{}: {} gas (baseline: {})".format(name, gas_used, baseline_gas))
+        if UPDATE_GAS_BASELINE:
+            return gas_used
+        assert baseline_gas, "{} has no baseline in {}, record it with UPDATE_GAS_BASELINE=True".format(
+            name, GAS_BASELINE_FILE.name
+        )
+        limit = baseline_gas * (1 + self.tolerance / 100)
+        assert gas_used <= limit, "{} regressed: {} gas used, baseline {} (+{}% allowed)".format(
+            name, gas_used, baseline_gas, self.tolerance
+        )
+        return gas_used
+
+
+@pytest.fixture(scope="session")
+def gas_recorder():
+    baseline = {}
+    if GAS_BASELINE_FILE.exists():
+        with GAS_BASELINE_FILE.open() as file:
+            baseline = json.load(file)
+    elif not UPDATE_GAS_BASELINE:
+        pytest.fail("{} is missing, record it with UPDATE_GAS_BASELINE=True".format(GAS_BASELINE_FILE))
+    recorder = GasRecorder(baseline, GAS_REGRESSION_TOLERANCE)
+    yield recorder
+    # the baseline changes only on request, benchmarks not run keep their values
+    if not UPDATE_GAS_BASELINE:
+        return
+    updated = dict(baseline)
+    updated.update(recorder.measured)
+    if updated != baseline:
+        with GAS_BASELINE_FILE.open("w") as file:
+            json.dump(dict(sorted(updated.items())), file, indent=4)
@@ -0,0 +1,98 @@
+from web3 import Web3
+from brownie import network
+from scripts.helpers import get_contract, fund_with_link, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+import pytest
+
+RATE = 0.1
+STATIC_RNG = 77777
+BURN_AMOUNTS = [1, 10, 100]
+# one VRF request per gear -> 100 burnt gears in a loop do not fit into the ganache block gas limit
+LOOP_BURN_AMOUNTS = [1, 10, 50]
+PUBLIC_MINT_AMOUNTS = [1, 10, 100, 1000]
+
+
+@pytest.fixture(autouse=True)
+def only_local():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+
+
+def fund_knight(nft_game, knight, id, amount):
+    nft_game.publicMint(id, amount, {"from": knight, "value": Web3.toWei(amount * RATE, "ether")})
+
+
+@pytest.mark.parametrize("amount", [1, 10, 100])
+def test_gas_mint(nft_game, minter, user, gas_recorder, amount):
+    tx = nft_game.mint(user, 0, amount, {"from": minter})
+    gas_recorder.record("mint[{}]".format(amount), tx)
+
+
+@pytest.mark.parametrize("amount", PUBLIC_MINT_AMOUNTS)
+def test_gas_public_mint(nft_game, user, gas_recorder, amount):
+    assert amount <= nft_game.maxAvailableForPublicMint()
+    tx = nft_game.publicMint(1, amount, {"from": user, "value": Web3.toWei(amount * RATE, "ether")})
+    gas_recorder.record("publicMint[{}]".format(amount), tx)
+
+
+@pytest.mark.parametrize("amount", LOOP_BURN_AMOUNTS)
+def test_gas_burn_to_gain_gear(nft_game, owner, user, gas_recorder, amount):
+    # loop pays one VRF fee per gear
+    fund_knight(nft_game, user, 1, amount)
+    fund_with_link(nft_game.address, owner, amount=amount * nft_game.fee())
+    tx = nft_game.burnToGainGear(1, amount, {"from": user})
+    gas_recorder.record("burnToGainGear[{}]".format(amount), tx)
+
+
+@pytest.mark.parametrize("amount", BURN_AMOUNTS)
+def test_gas_burn_to_gain_gear_batch(nft_game, user, gas_recorder, amount):
+    fund_knight(nft_game, user, 1, amount)
+    tx = nft_game.burnToGainGearBatch(1, amount, {"from": user})
+    gas_recorder.record("burnToGainGearBatch[{}]".format(amount), tx)
+
+
+@pytest.mark.parametrize("amount", BURN_AMOUNTS)
+def test_gas_fulfill_randomness(nft_game, owner, user, gas_recorder, amount):
+    fund_knight(nft_game, user, 1, amount)
+    tx = nft_game.burnToGainGearBatch(1, amount, {"from": user})
+    request_id = tx.events["RequestedRandomness"]["requestId"]
+    tx_callback = get_contract("vrf_coordinator").callBackWithRandomness(
+        request_id, STATIC_RNG, nft_game.address, {"from": owner}
+    )
+    gas_recorder.record("fulfillRandomness[{}]".format(amount), tx_callback)
+
+
+@pytest.mark.parametrize("amount", [1, 10, 100])
+def test_gas_mint_batch(nft_game, minter, user, gas_recorder, amount):
+    tx = nft_game.mintBatch(user, [0, 1, 2], [amount, amount, amount], "", {"from": minter})
+    gas_recorder.record("mintBatch[{}]".format(amount), tx)
+
+
+def test_gas_set_parameters_of_public_mint(nft_game, owner, gas_recorder):
+    tx = nft_game.setParametersOfPublicMint(2000, ["0.5 ether", "0.05 ether", "0.25 ether"], {"from": owner})
+    gas_recorder.record("setParametersOfPublicMint", tx)
+
+
+def test_gas_set_burn_gear_parameters(nft_game, owner, gas_recorder):
+    tx = nft_game.setBurnGearParameters(50, 0, 1, {"from": owner})
+    gas_recorder.record("setBurnGearParameters", tx)
+
+
+def test_gas_withdraw(nft_game, owner, user, gas_recorder):
+    fund_knight(nft_game, user, 0, 10)
+    tx = nft_game.withdraw({"from": owner})
+    gas_recorder.record("withdraw", tx)
+
+
+@pytest.mark.parametrize("amount", [1, 10, 100])
+def test_gas_public_mint_batch(nft_game, user, gas_recorder, amount):
+    tx = nft_game.publicMintBatch(
+        [0, 1, 2], [amount] * 3, {"from": user, "value": Web3.toWei(3 * amount * RATE, "ether")}
+    )
+    gas_recorder.record("publicMintBatch[{}]".format(amount), tx)
+
+
+@pytest.mark.parametrize("recipients", [1, 10, 100])
+def test_gas_airdrop(nft_game, minter, gas_recorder, recipients):
+    knights = ["0x{:040x}".format(0x1000 + i) for i in range(recipients)]
+    tx = nft_game.airdrop(knights, [i % 3 for i in range(recipients)], [1] * recipients, {"from": minter})
+    gas_recorder.record("airdrop[{}]".format(recipients), tx)
@@ -1,48 +1,76 @@
-from scripts.helpers import get_account, get_contract, fund_with_link
-from brownie import config, network, MediavalSTRVGameV2
+from scripts.helpers import get_account, get_contract
+from scripts.deploy_game import deploy_nft_game
+from scripts.tx_report import recorder
+from scripts.rpc_profiler import RpcProfiler
+from brownie import chain, history
 from web3 import Web3
+import os
 import pytest
 
 MINTER_ROLE = Web3.keccak(text="MINTER_ROLE")
 PAUSER_ROLE = Web3.keccak(text="PAUSER_ROLE")
+# TX_REPORT=True writes gas report of all transactions of the session (see scripts/tx_report.py)
+TX_REPORT = os.getenv("TX_REPORT") == "True"
+# RPC_PROFILE=True counts and times JSON-RPC calls of the session (see scripts/rpc_profiler.py)
+RPC_PROFILE = os.getenv("RPC_PROFILE") == "True"
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def owner():
     return get_account()
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def minter():
     return get_account(1)
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def pauser():
     return get_account(2)
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def user():
     return get_account(3)
 
 
+@pytest.fixture(scope="session")
+def rpc_profiler():
+    if not RPC_PROFILE:
+        yield None
+        return
+    with RpcProfiler() as profiler:
+        yield profiler
+    profiler.print_report()
+    profiler.write_report(name="test_rpc_profile")
+
+
+@pytest.fixture(scope="session")
+def mocks(rpc_profiler):
+    # mocks are deployed once per session (by the first get_contract) and reused by all tests
+    return {name: get_contract(name) for name in ("link_token", "vrf_coordinator", "multicall")}
+
+
 @pytest.mark.require_network("development")
-@pytest.fixture(autouse=True)
-def nft_game(owner, minter, pauser):
+@pytest.fixture(scope="session", autouse=True)
+def nft_game(mocks, owner, minter, pauser):
     print("Deploying NFT game..")
-    nft_game = MediavalSTRVGameV2.deploy(
-        get_contract("vrf_coordinator").address,
-        get_contract("link_token").address,
-        config["networks"][network.show_active()]["keyhash"],
-        config["networks"][network.show_active()]["fee"],
-        {"from": owner},
-        )
-    # set roles
-    nft_game.grantRole(MINTER_ROLE, minter, {"from": owner})
-    nft_game.grantRole(PAUSER_ROLE, pauser, {"from": owner})
-    tx_funding = fund_with_link(nft_game.address, owner)
-    tx_funding.wait(1)
-    return nft_game
+    # deploy, set roles and fund with LINK at once, the game is shared by all tests of the session
+    return deploy_nft_game(owner, grants=[(MINTER_ROLE, minter), (PAUSER_ROLE, pauser)])
 
 
 @pytest.fixture(autouse=True)
-def isolation(fn_isolation):
-    pass
+def isolation(nft_game):
+    # every test starts from the chain state right after the session setup
+    chain.snapshot()
+    yield
+    if TX_REPORT:
+        # transactions of the test are dropped from the history by the revert
+        recorder.record_history(history)
+    chain.revert()
+    # setup transactions repeated by the next test get the same txids, they are recorded again
+    recorder.chain_reverted()
+
+
+def pytest_sessionfinish(session):
+    if TX_REPORT:
+        recorder.record_history(history)
+        recorder.write_report(name="test_transactions")
@@ -0,0 +1,94 @@
+from scripts.airdrop import airdrop, load_recipients, load_checkpoint, save_checkpoint
+from scripts.helpers import get_contract
+from brownie import accounts
+import scripts.airdrop
+import csv
+import pytest
+
+RECIPIENTS = 30
+
+
+@pytest.fixture()
+def recipients_csv(tmp_path):
+    csv_path = tmp_path / "recipients.csv"
+    with csv_path.open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["address", "id", "amount"])
+        for i in range(RECIPIENTS):
+            writer.writerow([accounts.add().address, i % 3, i % 4 + 1])
+    return str(csv_path)
+
+
+def test_airdrop_in_chunks_and_resume_without_double_mint(nft_game, minter, recipients_csv):
+    # Arrange
+    recipients = load_recipients(recipients_csv)
+    checkpoint_file = recipients_csv + ".checkpoint.json"
+    # Act 1 - small gas limit -> more chunks
+    report = airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    # Assert 1
+    assert report["chunks"] > 1
+    assert report["gas_per_recipient"] < report["gas_per_mint_call"]
+    for knight, id, amount in recipients:
+        assert nft_game.balanceOf(knight, id) == amount
+    # Act 2 - rerun of finished airdrop
+    nonce = minter.nonce
+    airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    # Assert 2
+    assert minter.nonce == nonce
+    for knight, id, amount in recipients:
+        assert nft_game.balanceOf(knight, id) == amount
+
+
+def test_airdrop_refuses_to_resend_chunk_with_used_nonce(nft_game, minter, recipients_csv):
+    # Arrange
+    recipients = load_recipients(recipients_csv)
+    checkpoint_file = recipients_csv + ".checkpoint.json"
+    airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    # pretend the run crashed after the last chunk was sent but before its tx hash was saved
+    checkpoint = load_checkpoint(checkpoint_file)
+    last = checkpoint["chunks"][-1]
+    last.update(tx_hash=None, gas_used=None)
+    save_checkpoint(checkpoint, checkpoint_file)
+    # Act / Assert
+    with pytest.raises(ValueError, match="was used by unknown transaction"):
+        airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    for knight, id, amount in recipients:
+        assert nft_game.balanceOf(knight, id) == amount
+
+
+def test_airdrop_leaves_out_contracts_rejecting_gears(nft_game, minter, recipients_csv):
+    # Arrange - a contract without onERC1155Received in the middle of the recipients
+    recipients = load_recipients(recipients_csv)
+    rejecting = get_contract("multicall").address
+    recipients.insert(RECIPIENTS // 2, (rejecting, 1, 1))
+    checkpoint_file = recipients_csv + ".checkpoint.json"
+    # Act
+    report = airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    # Assert
+    assert [recipient["address"] for recipient in report["rejected"]] == [rejecting]
+    assert report["recipients"] == RECIPIENTS
+    assert not any(chunk.get("reverted") for chunk in load_checkpoint(checkpoint_file)["chunks"])
+    assert nft_game.balanceOf(rejecting, 1) == 0
+    for knight, id, amount in recipients:
+        if knight != rejecting:
+            assert nft_game.balanceOf(knight, id) == amount
+
+
+def test_airdrop_splits_reverted_chunk_down_to_rejecting_recipient(nft_game, minter, recipients_csv, monkeypatch):
+    # Arrange - the contract is not found before sending, its chunk reverts
+    monkeypatch.setattr(scripts.airdrop, "find_rejecting_recipients", lambda *args: [])
+    recipients = load_recipients(recipients_csv)
+    rejecting = get_contract("multicall").address
+    recipients.insert(3, (rejecting, 1, 1))
+    checkpoint_file = recipients_csv + ".checkpoint.json"
+    # Act
+    report = airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    nonce = minter.nonce
+    airdrop(nft_game, recipients, minter, checkpoint_file, gas_limit=500000)
+    # Assert - recorded once, the rerun sends nothing
+    assert [(recipient["index"], recipient["address"]) for recipient in report["rejected"]] == [(3, rejecting)]
+    assert minter.nonce == nonce
+    assert any(chunk.get("reverted") for chunk in load_checkpoint(checkpoint_file)["chunks"])
+    for knight, id, amount in recipients:
+        if knight != rejecting:
+            assert nft_game.balanceOf(knight, id) == amount
@@ -0,0 +1,72 @@
+from scripts.deploy_clones import deploy_game_factory, create_games, compare_deployment_gas, GAME_URI
+from scripts.helpers import get_contract, fund_with_link, get_request_ids, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import MediavalSTRVGameClone, reverts, network
+from web3 import Web3
+import pytest
+
+RATE = 0.1
+KEY_HASHES = ["0x" + "11" * 32, "0x" + "22" * 32, "0x" + "33" * 32]
+
+
+@pytest.fixture(autouse=True)
+def only_local():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+
+
+@pytest.fixture()
+def factory(owner):
+    return deploy_game_factory(owner)
+
+
+def test_factory_creates_independent_instances(factory, owner, user):
+    # Act
+    games = [
+        create_games(factory, owner, 1, key_hash=key_hash, fee=(i + 1) * 10 ** 17, max_available_for_public_mint=10 * (i + 1))[0]
+        for i, key_hash in enumerate(KEY_HASHES)
+    ]
+    games[0].publicMint(0, 5, {"from": user, "value": Web3.toWei(5 * RATE, "ether")})
+    # Assert
+    assert factory.gamesCount() == len(KEY_HASHES)
+    for i, game in enumerate(games):
+        assert factory.gameAt(i) == game.address
+        assert game.keyHash() == KEY_HASHES[i]
+        assert game.fee() == (i + 1) * 10 ** 17
+        assert game.maxAvailableForPublicMint() == 10 * (i + 1)
+        assert game.owner() == owner
+        assert game.hasRole(game.DEFAULT_ADMIN_ROLE(), owner)
+        assert game.uri(0) == GAME_URI
+    assert games[0].balanceOf(user, 0) == 5
+    assert games[1].balanceOf(user, 0) == 0 and games[1].mintedPublicly() == 0
+
+
+def test_instances_cannot_be_initialized_again(factory, owner, user):
+    # Arrange
+    game = create_games(factory, owner, 1)[0]
+    implementation = MediavalSTRVGameClone.at(factory.implementation())
+    # Act / Assert
+    with reverts("Initializable: contract is already initialized"):
+        game.initialize(user, GAME_URI, KEY_HASHES[0], 0, 10, [0, 0, 0], {"from": user})
+    with reverts("Initializable: contract is already initialized"):
+        implementation.initialize(user, GAME_URI, KEY_HASHES[0], 0, 10, [0, 0, 0], {"from": user})
+
+
+def test_instance_burns_with_randomness(factory, owner, user):
+    # Arrange
+    game = create_games(factory, owner, 1)[0]
+    fund_with_link(game.address, owner)
+    game.publicMint(1, 2, {"from": user, "value": Web3.toWei(2 * RATE, "ether")})
+    # Act
+    tx = game.burnToGainGearBatch(1, 2, {"from": user})
+    request_id = get_request_ids(tx)[0]
+    get_contract("vrf_coordinator").callBackWithRandomness(request_id, 77777, game.address, {"from": owner})
+    # Assert
+    assert game.RequestIdsToKnights(request_id) == "0x0000000000000000000000000000000000000000"
+    assert game.balanceOf(user, 1) == 0
+
+
+def test_clone_is_cheapest_deployment(factory, owner):
+    # Act
+    gas = compare_deployment_gas(owner, factory)
+    # Assert
+    assert gas["clone"] < gas["transparent proxy"] < gas["full deploy"]
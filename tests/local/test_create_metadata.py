@@ -0,0 +1,74 @@
+from scripts.create_metadata import upload_files, load_pin_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import hashlib, json, requests, shutil, threading
+import pytest
+
+IMAGES = ["./img/0_ARMOR.PNG", "./img/1_SHIELD.PNG", "./img/2_SWORD.PNG"]
+
+
+class PinningHandler(BaseHTTPRequestHandler):
+    # local stand-in of pinata pinFileToIPFS endpoint
+    uploads = 0
+    # uploads of a file with this name fail
+    failing_filename = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if PinningHandler.failing_filename and PinningHandler.failing_filename.encode() in body:
+            self.send_response(500)
+            self.end_headers()
+            return
+        PinningHandler.uploads += 1
+        response = json.dumps({"IpfsHash": "Qm" + hashlib.sha256(body).hexdigest()[:44]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def pinning_server():
+    PinningHandler.uploads = 0
+    PinningHandler.failing_filename = None
+    server = HTTPServer(("127.0.0.1", 0), PinningHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(server.server_port)
+    server.shutdown()
+
+
+def test_upload_files_skips_cached_and_duplicate_images(pinning_server, tmp_path):
+    # Arrange
+    cache_file = str(tmp_path / "pin_cache.json")
+    duplicate = str(tmp_path / "copy_of_armor.PNG")
+    shutil.copy(IMAGES[0], duplicate)
+    # Act 1 - first run uploads each distinct image once
+    ipfs_hashes, stats = upload_files(IMAGES + [duplicate], base_url=pinning_server, cache_file=cache_file)
+    # Assert 1
+    assert PinningHandler.uploads == 3
+    assert stats["uploaded"] == 3 and stats["skipped"] == 1
+    assert ipfs_hashes[duplicate] == ipfs_hashes[IMAGES[0]]
+    assert len(load_pin_cache(cache_file)) == 3
+    # Act 2 - re-run does not upload anything
+    ipfs_hashes_rerun, stats_rerun = upload_files(IMAGES, base_url=pinning_server, cache_file=cache_file)
+    # Assert 2
+    assert PinningHandler.uploads == 3
+    assert stats_rerun["uploaded"] == 0 and stats_rerun["skipped"] == 3
+    assert all(ipfs_hashes_rerun[image] == ipfs_hashes[image] for image in IMAGES)
+
+
+def test_upload_files_keeps_pinned_files_if_an_upload_fails(pinning_server, tmp_path):
+    # Arrange
+    cache_file = str(tmp_path / "pin_cache.json")
+    PinningHandler.failing_filename = "2_SWORD.PNG"
+    # Act
+    with pytest.raises(requests.HTTPError):
+        upload_files(IMAGES, base_url=pinning_server, cache_file=cache_file, max_workers=1)
+    # Assert - images pinned before the failure are not uploaded again
+    assert len(load_pin_cache(cache_file)) == 2
+    PinningHandler.failing_filename = None
+    _, stats = upload_files(IMAGES, base_url=pinning_server, cache_file=cache_file)
+    assert stats["uploaded"] == 1 and stats["skipped"] == 2
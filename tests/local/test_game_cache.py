@@ -0,0 +1,73 @@
+from scripts.game_cache import CachedGame
+from scripts.rpc_profiler import RpcProfiler
+from brownie import chain
+import time
+
+
+def test_repeated_reads_within_block_are_cached(nft_game):
+    # Arrange
+    game = CachedGame(nft_game)
+    # Act
+    first = [game.ratesForPublicMint(id) for id in range(3)] + [game.mintingThreshold(), game.fee()]
+    second = [game.ratesForPublicMint(id) for id in range(3)] + [game.mintingThreshold(), game.fee()]
+    # Assert
+    assert first == second
+    assert first[:3] == [nft_game.ratesForPublicMint(id) for id in range(3)]
+    assert game.stats["misses"] == 5
+    assert game.stats["hits"] == 5
+
+
+def test_own_setter_transaction_invalidates_cache(nft_game, owner):
+    # Arrange
+    game = CachedGame(nft_game)
+    assert game.mintingThreshold() == 80
+    # Act
+    game.setBurnGearParameters(50, 1, 2, {"from": owner})
+    # Assert
+    assert game.mintingThreshold() == 50
+    assert game.stats["invalidations"] == 1
+
+
+def test_setter_events_of_other_senders_invalidate_cache(nft_game, owner):
+    # Arrange
+    game = CachedGame(nft_game)
+    rate = game.ratesForPublicMint(0)
+    threshold = game.mintingThreshold()
+    # Act 1 - new blocks without parameter changes keep the cache
+    chain.mine(2)
+    # Assert 1
+    assert game.ratesForPublicMint(0) == rate and game.mintingThreshold() == threshold
+    assert game.stats["invalidations"] == 0
+    # Act 2 - the parameters are changed directly on the contract
+    nft_game.setParametersOfPublicMint(2000, [rate * 2] * 3, {"from": owner})
+    # Assert 2
+    assert game.ratesForPublicMint(0) == rate * 2
+    assert game.maxAvailableForPublicMint() == 2000
+    assert game.stats["invalidations"] == 1
+
+
+def test_reads_with_watcher_cost_no_rpc_calls(nft_game):
+    # Arrange
+    with CachedGame(nft_game, poll_interval=3600) as game:
+        game.gearToBurn()
+        # Act
+        with RpcProfiler() as profiler:
+            values = [game.gearToBurn() for _ in range(10)]
+    # Assert
+    assert values == [nft_game.gearToBurn()] * 10
+    assert profiler.total_calls == 0
+    assert game.stats["hits"] == 10
+
+
+def test_watcher_invalidates_cache_on_setter_events(nft_game, owner):
+    # Arrange
+    with CachedGame(nft_game, poll_interval=0.05) as game:
+        rate = game.ratesForPublicMint(0)
+        # Act
+        nft_game.setParametersOfPublicMint(2000, [rate * 2] * 3, {"from": owner})
+        deadline = time.monotonic() + 10
+        while game.stats["invalidations"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        # Assert
+        assert game.stats["invalidations"] == 1
+        assert game.ratesForPublicMint(0) == rate * 2
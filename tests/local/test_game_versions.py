@@ -0,0 +1,94 @@
+from web3 import Web3
+from brownie import config, network, reverts, MediavalSTRVGameV2, MediavalSTRVGameV3
+from scripts.helpers import get_account, get_contract, fund_with_link, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+import pytest
+
+RATE = 0.1
+MINTER_ROLE = Web3.keccak(text="MINTER_ROLE")
+
+
+def deploy_game_version(contract_type, owner):
+    nft_game = contract_type.deploy(
+        get_contract("vrf_coordinator").address,
+        get_contract("link_token").address,
+        config["networks"][network.show_active()]["keyhash"],
+        config["networks"][network.show_active()]["fee"],
+        {"from": owner},
+        )
+    nft_game.grantRole(MINTER_ROLE, owner, {"from": owner})
+    fund_with_link(nft_game.address, owner)
+    return nft_game
+
+
+def measure_gas(nft_game, owner, knight):
+    gas = {}
+    gas["mint"] = nft_game.mint(knight, 0, 10, {"from": owner}).gas_used
+    gas["publicMint"] = nft_game.publicMint(
+        1, 10, {"from": knight, "value": Web3.toWei(10*RATE, "ether")}
+    ).gas_used
+    gas["burnToGainGear"] = nft_game.burnToGainGear(1, 1, {"from": knight}).gas_used
+    gas["burnToGainGearBatch"] = nft_game.burnToGainGearBatch(1, 5, {"from": knight}).gas_used
+    return gas
+
+
+def test_v3_single_ledger_saves_gas_on_mint_and_burn(owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    knight = get_account(6)
+    nft_game_v2 = deploy_game_version(MediavalSTRVGameV2, owner)
+    nft_game_v3 = deploy_game_version(MediavalSTRVGameV3, owner)
+    # Act
+    gas_v2 = measure_gas(nft_game_v2, owner, knight)
+    gas_v3 = measure_gas(nft_game_v3, owner, knight)
+    for name in gas_v2:
+        print("{}: V2 {} gas, V3 {} gas, saved {}".format(name, gas_v2[name], gas_v3[name], gas_v2[name] - gas_v3[name]))
+    # Assert - both versions agree on balances, V3 is cheaper
+    for id in range(3):
+        assert nft_game_v2.balanceOf(knight, id) == nft_game_v3.balanceOf(knight, id)
+    for name in gas_v2:
+        assert gas_v3[name] < gas_v2[name]
+
+
+def test_v3_burn_keeps_nothing_to_burn_semantics(nft_game, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    nft_game.publicMint(1, 2, {"from": user, "value": Web3.toWei(2*RATE, "ether")})
+    # Act & Assert - neither the loop nor the batch can burn more than the balance
+    with reverts("There is nothing to burn"):
+        nft_game.burnToGainGear(1, 3, {"from": user})
+    with reverts("There is nothing to burn"):
+        nft_game.burnToGainGearBatch(1, 3, {"from": user})
+    nft_game.burnToGainGear(1, 2, {"from": user})
+    assert nft_game.balanceOf(user, 1) == 0
+
+
+def test_v3_packed_getters_compatible_with_v2(owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    knight = get_account(6)
+    nft_game_v2 = deploy_game_version(MediavalSTRVGameV2, owner)
+    nft_game_v3 = deploy_game_version(MediavalSTRVGameV3, owner)
+    getters = ["mintedPublicly", "maxAvailableForPublicMint", "mintingThreshold", "gearToBurn", "gearToMint", "fee"]
+    # Act
+    for nft_game in (nft_game_v2, nft_game_v3):
+        nft_game.publicMint(0, 3, {"from": knight, "value": Web3.toWei(3*RATE, "ether")})
+        nft_game.setParametersOfPublicMint(2000, ["0.5 ether", "0.05 ether", "0.25 ether"], {"from": owner})
+        nft_game.setBurnGearParameters(50, 0, 1, {"from": owner})
+    # Assert
+    for getter in getters:
+        assert getattr(nft_game_v2, getter)() == getattr(nft_game_v3, getter)()
+    for id in range(3):
+        assert nft_game_v2.mintedTotal(id) == nft_game_v3.mintedTotal(id)
+        assert nft_game_v2.ratesForPublicMint(id) == nft_game_v3.ratesForPublicMint(id)
+
+
+def test_v3_packed_parameters_out_of_range(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    with reverts("Rates must be set for every gear"):
+        nft_game.setParametersOfPublicMint(2000, ["0.5 ether", "0.05 ether"], {"from": owner})
+    with reverts("Rate is too high"):
+        nft_game.setParametersOfPublicMint(2000, [2 ** 80, 0, 0], {"from": owner})
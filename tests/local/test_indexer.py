@@ -0,0 +1,56 @@
+from web3 import Web3
+from brownie import network
+from scripts.helpers import get_request_ids, fulfill_randomness_locally, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from scripts.indexer import connect, sync, win_rate
+import pytest
+
+RATE = 0.1
+
+
+def test_indexer_balances_and_requests(nft_game, owner, user, minter):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    deploy_block = nft_game.tx.block_number
+    conn = connect(":memory:")
+    nft_game.publicMint(1, 5, {"from": user, "value": Web3.toWei(5*RATE, "ether")})
+    nft_game.mintBatch(user, [0, 2], [3, 4], "", {"from": minter})
+    # TransferBatch repeating an id
+    nft_game.publicMintBatch([1, 1], [1, 1], {"from": user, "value": Web3.toWei(2*RATE, "ether")})
+    # Act 1 - first sync
+    sync(conn, nft_game, from_block=deploy_block)
+    tx = nft_game.burnToGainGear(1, 2, {"from": user})
+    fulfill_randomness_locally(nft_game, get_request_ids(tx), randomness=77777, account=owner)
+    tx_batch = nft_game.burnToGainGearBatch(1, 3, {"from": user})
+    fulfill_randomness_locally(nft_game, get_request_ids(tx_batch), randomness=977777, account=owner)
+    # Act 2 - resumed sync from the cursor
+    last_block = sync(conn, nft_game, from_block=deploy_block)
+    # Assert
+    balances = dict(((holder, token_id), balance) for holder, token_id, balance in conn.execute("SELECT * FROM balances"))
+    for token_id in range(3):
+        assert balances.get((user.address, token_id), 0) == nft_game.balanceOf(user, token_id)
+    requests = conn.execute("SELECT request_id, fulfilled_block FROM requests").fetchall()
+    assert len(requests) == 3
+    assert all(fulfilled_block for _, fulfilled_block in requests)
+    batch_won = conn.execute("SELECT gears_won FROM requests WHERE rolls = 3").fetchone()[0]
+    single_won = 2 if (77777 % 100) + 1 <= 80 else 0
+    assert win_rate(conn, 80) == (batch_won + single_won) / 5
+    assert conn.execute("SELECT block_number FROM cursor").fetchone()[0] == last_block
+
+
+def test_indexer_rewinds_after_reorg(nft_game, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    deploy_block = nft_game.tx.block_number
+    conn = connect(":memory:")
+    nft_game.publicMint(1, 5, {"from": user, "value": Web3.toWei(5*RATE, "ether")})
+    sync(conn, nft_game, from_block=deploy_block)
+    # Act - pretend the cursor block has been reorganized away
+    conn.execute("UPDATE cursor SET block_hash = ?", ("0x" + "00" * 32,))
+    sync(conn, nft_game, from_block=deploy_block, reorg_depth=5)
+    # Assert - re-indexed blocks are not counted twice
+    balance = conn.execute(
+        "SELECT balance FROM balances WHERE holder = ? AND token_id = 1", (user.address,)
+    ).fetchone()[0]
+    assert balance == nft_game.balanceOf(user, 1) == 5
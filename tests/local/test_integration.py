@@ -1,7 +1,12 @@
 from web3 import Web3
-from brownie import network
-from scripts.helpers import get_contract, LOCAL_BLOCKCHAIN_ENVIRONMENTS
-import pytest
+from brownie import network, web3, MediavalSTRVGameV2, MediavalSTRVGameV3
+from scripts import helpers
+from scripts.deploy_game import deploy_nft_game
+from scripts.helpers import (
+    get_contract, get_request_ids, wait_for_randomness, fulfill_randomness_locally, get_game_snapshot,
+    LOCAL_BLOCKCHAIN_ENVIRONMENTS,
+)
+import pytest, time
 
 AMOUNT_TO_MINT = 100
 RATE = 0.1
@@ -47,3 +52,88 @@ def test_set_new_burn_gear_parameters_and_test_burning_aftwerwards(owner, nft_ga
         assert user_balance_armor_before == (user_balance_armor_after + 1)
         assert user_balance_shield_before == (user_balance_shield_after - minted_amount)
 
+
+
+def test_wait_for_randomness_returns_once_requests_are_fulfilled(owner, nft_game, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    AMOUNT = 3
+    nft_game.publicMint(1, AMOUNT, {"from": user, "value": Web3.toWei(AMOUNT*RATE, "ether")})
+    tx = nft_game.burnToGainGear(1, AMOUNT, {"from": user})
+    request_ids = get_request_ids(tx)
+    # Act
+    fulfill_randomness_locally(nft_game, request_ids, account=owner)
+    start = time.monotonic()
+    fulfilled = wait_for_randomness(nft_game, request_ids, from_block=tx.block_number, timeout=10)
+    # Assert
+    assert len(request_ids) == AMOUNT
+    assert set(fulfilled.keys()) == set(request_ids)
+    assert time.monotonic() - start < 10
+
+
+def test_wait_for_randomness_times_out_without_fulfillment(nft_game, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    nft_game.publicMint(1, 1, {"from": user, "value": Web3.toWei(RATE, "ether")})
+    tx = nft_game.burnToGainGear(1, 1, {"from": user})
+    # Act & Assert
+    with pytest.raises(TimeoutError):
+        wait_for_randomness(nft_game, get_request_ids(tx), from_block=tx.block_number, timeout=1, poll_interval=0.2)
+
+
+def test_game_snapshot_matches_single_reads(owner, nft_game, user, minter):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    nft_game.publicMint(1, 5, {"from": user, "value": Web3.toWei(5*RATE, "ether")})
+    nft_game.mint(owner, 2, 7, {"from": minter})
+    pairs = [(knight, gear) for knight in (owner, user) for gear in range(3)]
+    # Act
+    snapshot = get_game_snapshot(nft_game, pairs)
+    # Assert
+    assert snapshot.block_number == web3.eth.block_number
+    for knight, gear in pairs:
+        assert snapshot.balance_of(knight, gear) == nft_game.balanceOf(knight, gear)
+    assert snapshot.minted_total == [nft_game.mintedTotal(gear) for gear in range(3)]
+    assert snapshot.rates_for_public_mint == [nft_game.ratesForPublicMint(gear) for gear in range(3)]
+    assert snapshot.minted_publicly == nft_game.mintedPublicly() == 5
+    assert snapshot.minting_threshold == nft_game.mintingThreshold()
+    assert snapshot.fee == nft_game.fee()
+
+
+def test_deployment_registry_reuses_contract_until_bytecode_changes(nft_game, monkeypatch, tmp_path):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange - pretend being on a live network with registry in a temporary folder
+    monkeypatch.setattr(helpers, "LOCAL_BLOCKCHAIN_ENVIRONMENTS", [])
+    monkeypatch.setattr(helpers, "DEPLOYMENTS_DIR", str(tmp_path))
+    monkeypatch.setattr(helpers, "_contract_cache", {})
+    # Act
+    helpers.record_deployment("nft_game", nft_game)
+    registry = helpers.load_registry()
+    helpers._contract_cache.clear()
+    registered = helpers.get_registered_contract("nft_game", MediavalSTRVGameV3)
+    # Assert
+    assert registry["nft_game"]["address"] == nft_game.address
+    assert registry["nft_game"]["block_number"] == nft_game.tx.block_number
+    assert registered.address == nft_game.address
+    assert helpers.get_registered_contract("nft_game", MediavalSTRVGameV3) is registered
+    # different bytecode -> redeploy needed
+    assert helpers.get_registered_contract("nft_game", MediavalSTRVGameV2) is None
+
+
+def test_deploy_nft_game_sends_setup_back_to_back(owner, minter, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    MINTER_ROLE = Web3.keccak(text="MINTER_ROLE")
+    predicted_address = helpers.predict_contract_address(owner, owner.nonce)
+    # Act
+    nft_game = deploy_nft_game(owner, grants=[(MINTER_ROLE, owner), (MINTER_ROLE, minter)], mints=[(user, 1, 10)])
+    # Assert
+    assert nft_game.address == predicted_address
+    assert nft_game.hasRole(MINTER_ROLE, minter)
+    assert nft_game.balanceOf(user, 1) == nft_game.mintedTotal(1) == 10
+    assert get_contract("link_token").balanceOf(nft_game) == Web3.toWei(2, "ether")
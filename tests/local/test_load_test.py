@@ -0,0 +1,20 @@
+from brownie import network
+from scripts.helpers import LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from scripts.load_test import create_knights, run_load
+import pytest
+
+
+def test_load_harness_reports_every_operation(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    OPERATIONS = 30
+    knights = create_knights(3, owner)
+    # Act
+    report = run_load(nft_game, knights, OPERATIONS, target_rate=1000, seed=42)
+    # Assert
+    stats = report["operations_stats"]
+    assert sum(s["count"] for s in stats.values()) == OPERATIONS
+    assert stats["publicMint"]["count"] > 0 and stats["publicMint"]["revert_rate"] == 0
+    assert stats["publicMint"]["avg_gas_used"] > 0
+    assert all(s["latency_p99"] >= s["latency_p50"] for s in stats.values())
@@ -0,0 +1,57 @@
+from scripts.metadata_server import create_server, benchmark
+from http.client import HTTPConnection
+import gzip, json, os, threading
+import pytest
+
+TOKEN_ID = "{0:064x}".format(1)
+
+
+@pytest.fixture()
+def metadata_server(tmp_path):
+    (tmp_path / "{}.json".format(TOKEN_ID)).write_text(json.dumps({"name": "SHIELD"}))
+    server = create_server(str(tmp_path), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, tmp_path
+    server.shutdown()
+
+
+def get(server, path, headers=None):
+    connection = HTTPConnection(*server.server_address)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_metadata_server_etag_gzip_and_reload(metadata_server):
+    server, directory = metadata_server
+    # Act & Assert - plain response
+    response, body = get(server, "/{}.json".format(TOKEN_ID))
+    assert response.status == 200
+    assert json.loads(body) == {"name": "SHIELD"}
+    etag = response.getheader("ETag")
+    # revalidation
+    response, body = get(server, "/{}.json".format(TOKEN_ID), {"If-None-Match": etag})
+    assert response.status == 304 and body == b""
+    # gzip
+    response, body = get(server, "/{}.json".format(TOKEN_ID), {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert json.loads(gzip.decompress(body)) == {"name": "SHIELD"}
+    # changed file is reloaded with a new etag
+    path = directory / "{}.json".format(TOKEN_ID)
+    path.write_text(json.dumps({"name": "SHIELD", "description": "STRV awesome SHIELD"}))
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+    response, body = get(server, "/{}.json".format(TOKEN_ID), {"If-None-Match": etag})
+    assert response.status == 200
+    assert json.loads(body)["description"] == "STRV awesome SHIELD"
+    # unknown ids
+    assert get(server, "/{}.json".format("{0:064x}".format(7)))[0].status == 404
+    assert get(server, "/1.json")[0].status == 404
+
+
+def test_metadata_server_benchmark(metadata_server):
+    server, _ = metadata_server
+    result = benchmark("http://{}:{}".format(*server.server_address), [TOKEN_ID], requests=200, concurrency=4)
+    assert result["statuses"] == {200: 200}
+    assert result["requests_per_sec"] > 0
@@ -154,4 +154,165 @@ def test_to_break_burn_function(nft_game):
     nft_game.burnToGainGear(1, 1, {"from": user})
     # Assert - try to burnToGainGear before chainlink node/vrf coordinators sends the randomness
     with reverts("There is nothing to burn"):
-        nft_game.burnToGainGear(1, 1, {"from": user})
\ No newline at end of file
+        nft_game.burnToGainGear(1, 1, {"from": user})
+
+def test_burn_batch_function(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    user = get_account(8)
+    AMOUNT = 10
+    STATIC_RNG = 77777
+    nft_game.publicMint(1, AMOUNT, {"from": user, "value": Web3.toWei(AMOUNT*RATE, "ether")})
+    # expected rolls -> the same expansion of random word as in fulfillRandomness
+    threshold = nft_game.mintingThreshold()
+    expected_won = sum(
+        1 for i in range(AMOUNT)
+        if (Web3.toInt(Web3.solidityKeccak(["uint256", "uint256"], [STATIC_RNG, i])) % 100) + 1 <= threshold
+    )
+    # Act
+    user_balance_sword_before = nft_game.balanceOf(user, 2)
+    tx = nft_game.burnToGainGearBatch(1, AMOUNT, {"from": user})
+    request_id = tx.events["RequestedRandomness"]["requestId"]
+    tx_callback = get_contract("vrf_coordinator").callBackWithRandomness(
+        request_id, STATIC_RNG, nft_game.address, {"from": owner}
+    )
+    # Assert
+    assert len(tx.events["RequestedRandomness"]) == 1
+    assert nft_game.balanceOf(user, 1) == 0
+    assert nft_game.balanceOf(user, 2) == user_balance_sword_before + expected_won
+    assert tx_callback.events["FulfilledBatchRandomness"]["gearsWon"] == expected_won
+    with reverts("There is nothing to burn"):
+        nft_game.burnToGainGearBatch(1, 1, {"from": user})
+    with reverts("Amount out of batch range"):
+        nft_game.burnToGainGearBatch(1, nft_game.MAX_BURN_BATCH() + 1, {"from": user})
+
+
+def test_burn_batch_gas_and_link_compared_to_loop(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    user = get_account(8)
+    AMOUNT = 10
+    STATIC_RNG = 77777
+    link_token = get_contract("link_token")
+    vrf_coordinator = get_contract("vrf_coordinator")
+    nft_game.publicMint(1, 2 * AMOUNT, {"from": user, "value": Web3.toWei(2*AMOUNT*RATE, "ether")})
+    # Act 1 - current loop, one VRF request per burnt gear
+    link_before = link_token.balanceOf(nft_game)
+    tx_loop = nft_game.burnToGainGear(1, AMOUNT, {"from": user})
+    link_loop = link_before - link_token.balanceOf(nft_game)
+    gas_loop = tx_loop.gas_used
+    for event in tx_loop.events["RequestedRandomness"]:
+        gas_loop += vrf_coordinator.callBackWithRandomness(
+            event["requestId"], STATIC_RNG, nft_game.address, {"from": owner}
+        ).gas_used
+    # Act 2 - batch, one VRF request for all burnt gears
+    link_before = link_token.balanceOf(nft_game)
+    tx_batch = nft_game.burnToGainGearBatch(1, AMOUNT, {"from": user})
+    link_batch = link_before - link_token.balanceOf(nft_game)
+    gas_batch = tx_batch.gas_used + vrf_coordinator.callBackWithRandomness(
+        tx_batch.events["RequestedRandomness"]["requestId"], STATIC_RNG, nft_game.address, {"from": owner}
+    ).gas_used
+    print("Gas per burnt gear - loop: {}, batch: {}".format(gas_loop // AMOUNT, gas_batch // AMOUNT))
+    print("LINK per burnt gear - loop: {}, batch: {}".format(link_loop // AMOUNT, link_batch // AMOUNT))
+    # Assert
+    assert len(tx_loop.events["RequestedRandomness"]) == AMOUNT
+    assert link_loop == AMOUNT * nft_game.fee()
+    assert link_batch == nft_game.fee()
+    assert gas_batch < gas_loop
+
+
+def test_public_mint_batch(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    user = get_account(5)
+    AMOUNTS = [1, 2, 3]
+    # Act
+    tx = nft_game.publicMintBatch([0, 1, 2], AMOUNTS, {"from": user, "value": Web3.toWei(sum(AMOUNTS)*RATE, "ether")})
+    # Assert
+    assert "TransferBatch" in tx.events and "TransferSingle" not in tx.events
+    for id, amount in enumerate(AMOUNTS):
+        assert nft_game.balanceOf(user, id) == nft_game.mintedTotal(id) == amount
+    assert nft_game.mintedPublicly() == sum(AMOUNTS)
+    with reverts("Not enough ETH for transaction"):
+        nft_game.publicMintBatch([0, 1], [1, 1], {"from": user, "value": Web3.toWei(RATE, "ether")})
+    with reverts("Ids and amounts length mismatch"):
+        nft_game.publicMintBatch([0, 1], [1], {"from": user, "value": Web3.toWei(RATE, "ether")})
+    with reverts("Gear does not exists!"):
+        nft_game.publicMintBatch([3], [1], {"from": user, "value": Web3.toWei(RATE, "ether")})
+    left = nft_game.maxAvailableForPublicMint() - nft_game.mintedPublicly()
+    with reverts("Not enough supply left in public mint"):
+        nft_game.publicMintBatch([0, 1], [left, 1], {"from": user, "value": Web3.toWei((left+1)*RATE, "ether")})
+
+
+def test_public_mint_batch_gas_compared_to_separate_calls(nft_game):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    user_separate = get_account(5)
+    user_batch = get_account(6)
+    AMOUNT = 10
+    # Act
+    gas_separate = sum(
+        nft_game.publicMint(id, AMOUNT, {"from": user_separate, "value": Web3.toWei(AMOUNT*RATE, "ether")}).gas_used
+        for id in range(3)
+    )
+    gas_batch = nft_game.publicMintBatch(
+        [0, 1, 2], [AMOUNT] * 3, {"from": user_batch, "value": Web3.toWei(3*AMOUNT*RATE, "ether")}
+    ).gas_used
+    print("Gas of armor, shield and sword - 3x publicMint: {}, publicMintBatch: {}".format(gas_separate, gas_batch))
+    # Assert
+    for id in range(3):
+        assert nft_game.balanceOf(user_separate, id) == nft_game.balanceOf(user_batch, id)
+    assert gas_batch < gas_separate
+
+
+def test_fulfilled_requests_are_cleared(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    user = get_account(8)
+    STATIC_RNG = 77777
+    nft_game.publicMint(1, 5, {"from": user, "value": Web3.toWei(5*RATE, "ether")})
+    vrf_coordinator = get_contract("vrf_coordinator")
+    # Act 1 - pending requests
+    tx = nft_game.burnToGainGear(1, 2, {"from": user})
+    tx_batch = nft_game.burnToGainGearBatch(1, 3, {"from": user})
+    request_id = tx_batch.events["RequestedRandomness"]["requestId"]
+    request_ids = [event["requestId"] for event in tx.events["RequestedRandomness"]] + [request_id]
+    # Assert 1
+    assert all(nft_game.RequestIdsToKnights(id) == user for id in request_ids)
+    # Act 2 - fulfill all requests, the batch one twice
+    for event in tx.events["RequestedRandomness"]:
+        vrf_coordinator.callBackWithRandomness(event["requestId"], STATIC_RNG, nft_game.address, {"from": owner})
+    vrf_coordinator.callBackWithRandomness(request_id, STATIC_RNG, nft_game.address, {"from": owner})
+    swords = nft_game.balanceOf(user, 2)
+    vrf_coordinator.callBackWithRandomness(request_id, STATIC_RNG, nft_game.address, {"from": owner})
+    # Assert 2 - storage cleared, repeated fulfillment does not mint again
+    assert all(nft_game.RequestIdsToKnights(id) == "0x0000000000000000000000000000000000000000" for id in request_ids)
+    assert nft_game.balanceOf(user, 2) == swords
+
+
+def test_airdrop_mints_to_many_knights(nft_game, owner):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    minter = get_account(1)
+    knights = [get_account(i) for i in range(4, 8)]
+    ids = [0, 1, 2, 1]
+    amounts = [1, 2, 3, 4]
+    # Act
+    tx = nft_game.airdrop(knights, ids, amounts, {"from": minter})
+    # Assert
+    assert len(tx.events["TransferSingle"]) == len(knights)
+    for knight, id, amount in zip(knights, ids, amounts):
+        assert nft_game.balanceOf(knight, id) == amount
+    assert [nft_game.mintedTotal(id) for id in range(3)] == [1, 6, 3]
+    with reverts("BurningContract: must have minter role to mint"):
+        nft_game.airdrop(knights, ids, amounts, {"from": knights[0]})
+    with reverts("Knights, ids and amounts length mismatch"):
+        nft_game.airdrop(knights, ids[:2], amounts, {"from": minter})
+    with reverts("Gear does not exists!"):
+        nft_game.airdrop(knights[:1], [3], [1], {"from": minter})
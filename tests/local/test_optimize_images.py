@@ -0,0 +1,68 @@
+from scripts.optimize_images import optimize_images, create_variants, hash_image, THUMBNAIL_SIZE
+from PIL import Image
+import shutil
+
+IMAGES = ["./img/0_ARMOR.PNG", "./img/1_SHIELD.PNG", "./img/2_SWORD.PNG"]
+
+
+def test_optimize_images_creates_lossless_variants(tmp_path):
+    # Arrange
+    output_dir = str(tmp_path / "optimized")
+    # Act
+    variants = optimize_images(IMAGES, output_dir, max_workers=2)
+    # Assert
+    for path in IMAGES:
+        variant = variants[path]
+        with Image.open(path) as original, Image.open(variant["png"]) as png, Image.open(variant["webp"]) as webp:
+            assert png.convert("RGBA").tobytes() == original.convert("RGBA").tobytes()
+            assert webp.convert("RGBA").tobytes() == original.convert("RGBA").tobytes()
+        with Image.open(variant["thumbnail"]) as thumbnail:
+            assert thumbnail.width <= THUMBNAIL_SIZE[0] and thumbnail.height <= THUMBNAIL_SIZE[1]
+
+
+def test_optimize_images_dedupes_identical_pixels(tmp_path):
+    # Arrange
+    # same pixels, different PNG encoding
+    reencoded = str(tmp_path / "armor_copy.PNG")
+    with Image.open(IMAGES[0]) as image:
+        image.save(reencoded, format="PNG", compress_level=0)
+    copy = str(tmp_path / "armor_copy_2.PNG")
+    shutil.copy(IMAGES[0], copy)
+    # Act
+    variants = optimize_images([IMAGES[0], reencoded, copy, IMAGES[1]], str(tmp_path / "optimized"))
+    # Assert
+    assert hash_image(reencoded) == hash_image(IMAGES[0])
+    assert variants[reencoded]["png"] == variants[IMAGES[0]]["png"] == variants[copy]["png"]
+    assert variants[IMAGES[1]]["png"] != variants[IMAGES[0]]["png"]
+    assert len(list((tmp_path / "optimized").glob("*.png"))) == 2
+
+
+def test_optimize_images_keeps_sources_with_same_name_apart(tmp_path):
+    # Arrange - same stem in different folders, different pixels
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    sword = str(tmp_path / "a" / "Sword.png")
+    other_sword = str(tmp_path / "b" / "sword.PNG")
+    shutil.copy(IMAGES[2], sword)
+    shutil.copy(IMAGES[1], other_sword)
+    # Act
+    variants = optimize_images([sword, other_sword], str(tmp_path / "optimized"))
+    # Assert
+    for name in ("png", "webp", "thumbnail"):
+        assert variants[sword][name] != variants[other_sword][name]
+    with Image.open(variants[sword]["png"]) as png, Image.open(IMAGES[2]) as original:
+        assert png.convert("RGBA").tobytes() == original.convert("RGBA").tobytes()
+
+
+def test_optimize_images_keeps_already_optimal_png(tmp_path):
+    # Arrange - the sword is smaller than its recompression by Pillow
+    source = IMAGES[2]
+    # Act
+    variant = create_variants(source, str(tmp_path))
+    # Assert
+    assert variant["bytes_saved"] == 0
+    assert variant["png"] == str(tmp_path / "{}.png".format(hash_image(source)[0]))
+    with open(source, "rb") as original, open(variant["png"], "rb") as png:
+        assert png.read() == original.read()
+    # recompressed sources still save bytes
+    assert create_variants(IMAGES[0], str(tmp_path))["bytes_saved"] > 0
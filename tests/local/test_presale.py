@@ -0,0 +1,61 @@
+from scripts.presale import load_allowlist, get_leaf, build_tree, get_root, get_proof, verify_proof, write_proofs
+from scripts.helpers import get_account
+from brownie import accounts, reverts
+from web3 import Web3
+import csv, json
+
+RATE = 0.1
+
+
+def write_allowlist(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["address", "id", "amount"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_proofs_of_every_leaf_are_valid(tmp_path):
+    # Arrange - odd number of leaves on several levels
+    rows = [(accounts.add().address, i % 3, i % 5 + 1) for i in range(37)]
+    entries = load_allowlist(write_allowlist(tmp_path / "allowlist.csv", rows))
+    # Act
+    levels = build_tree([get_leaf(*entry) for entry in entries])
+    proofs_path = str(tmp_path / "proofs.json")
+    write_proofs(entries, levels, proofs_path)
+    # Assert
+    with open(proofs_path) as file:
+        proofs = json.load(file)
+    assert proofs["root"] == get_root(levels)
+    assert len(proofs["claims"]) == len(rows)
+    for claim, entry in zip(proofs["claims"], entries):
+        leaf = get_leaf(claim["index"], claim["address"], claim["id"], claim["amount"])
+        assert verify_proof(claim["proof"], proofs["root"], leaf)
+        assert not verify_proof(claim["proof"], proofs["root"], get_leaf(claim["index"], claim["address"], claim["id"], claim["amount"] + 1))
+
+
+def test_presale_mint_with_proof(nft_game, owner, tmp_path):
+    # Arrange
+    knights = [get_account(i) for i in range(4, 9)]
+    rows = [(knight.address, 1, i + 1) for i, knight in enumerate(knights)]
+    entries = load_allowlist(write_allowlist(tmp_path / "allowlist.csv", rows))
+    levels = build_tree([get_leaf(*entry) for entry in entries])
+    nft_game.setPresaleRoot(get_root(levels), {"from": owner})
+    index, knight, id, amount = entries[2]
+    proof = get_proof(levels, 2)
+    value = Web3.toWei(amount * RATE, "ether")
+    # Act
+    tx = nft_game.presaleMint(index, id, amount, proof, {"from": knight, "value": value})
+    # Assert
+    assert tx.events["PresaleClaimed"]["index"] == index
+    assert nft_game.balanceOf(knight, id) == amount
+    assert nft_game.isPresaleClaimed(index) and not nft_game.isPresaleClaimed(index + 1)
+    with reverts("Presale already claimed"):
+        nft_game.presaleMint(index, id, amount, proof, {"from": knight, "value": value})
+    # other knight cannot use the proof, nor can the knight claim more
+    with reverts("Invalid presale proof"):
+        nft_game.presaleMint(3, id, amount, proof, {"from": knights[3], "value": value})
+    with reverts("Invalid presale proof"):
+        nft_game.presaleMint(0, id, amount + 1, get_proof(levels, 0), {"from": knights[0], "value": value * 2})
+    with reverts("BurningContract: must have admin role to change variables"):
+        nft_game.setPresaleRoot(get_root(levels), {"from": knight})
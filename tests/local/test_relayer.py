@@ -0,0 +1,73 @@
+from scripts.relayer import OrderRelayer, sign_order, ORDER_MINT, ORDER_BURN
+from scripts.helpers import fund_with_link
+from scripts.indexer import connect, sync, pending_requests
+from brownie import accounts, chain, reverts
+import pytest
+
+KNIGHTS = 5
+
+
+def test_relayer_executes_signed_orders_in_batches(nft_game, owner):
+    # Arrange - knights without any ETH, their mints are prepaid (the last knight's is not)
+    knights = [accounts.add() for _ in range(KNIGHTS)]
+    fund_with_link(nft_game.address, owner, amount=KNIGHTS * nft_game.fee())
+    gear = nft_game.gearToBurn()
+    for knight in knights[:-1]:
+        nft_game.depositForOrders(knight, {"from": owner, "value": 3 * nft_game.ratesForPublicMint(gear)})
+    relayer_balance = owner.balance()
+    relayer = OrderRelayer(nft_game, owner, max_batch=4, max_wait=0.2).start()
+    # Act
+    for knight in knights:
+        relayer.submit(*sign_order(nft_game, knight, ORDER_MINT, gear, 3, nonce=0))
+        relayer.submit(*sign_order(nft_game, knight, ORDER_BURN, gear, 2, nonce=1))
+    report = relayer.stop()
+    conn = connect(":memory:")
+    sync(conn, nft_game, from_block=nft_game.tx.block_number)
+    # Assert - orders of the unpaid knight fail without reverting their batch
+    assert report["orders"] == 2 * KNIGHTS
+    assert report["reverted"] == 2
+    assert report["batches"] >= 3
+    assert report["gas_per_order"] > 0
+    # the relayer pays no ETH for mints (gas is free on the local network)
+    assert owner.balance() == relayer_balance
+    for knight in knights[:-1]:
+        assert knight.balance() == 0
+        assert nft_game.orderDeposits(knight) == 0
+        assert nft_game.balanceOf(knight, gear) == 1
+        assert nft_game.orderNonces(knight) == 2
+        assert len(pending_requests(conn, knight)) == 1
+    assert nft_game.balanceOf(knights[-1], gear) == 0
+    assert nft_game.orderNonces(knights[-1]) == 2
+    assert pending_requests(conn, knights[-1]) == []
+
+
+def test_invalid_orders_are_skipped_without_reverting_the_batch(nft_game, owner, user):
+    # Arrange
+    knight = accounts.add()
+    other = accounts.add()
+    nft_game.depositForOrders(knight, {"from": owner, "value": 2 * nft_game.ratesForPublicMint(0)})
+    order, signature = sign_order(nft_game, knight, ORDER_MINT, 0, 1)
+    forged, forged_signature = sign_order(nft_game, other, ORDER_MINT, 0, 1)
+    expired, expired_signature = sign_order(nft_game, knight, ORDER_MINT, 0, 1, deadline=chain.time() - 1)
+    # Act / Assert
+    with pytest.raises(ValueError):
+        OrderRelayer(nft_game, owner).submit(dict(order, amount=100), signature)
+    tx = nft_game.executeOrders(
+        [tuple(dict(forged, knight=str(knight)).values()), tuple(expired.values()), tuple(order.values()), tuple(order.values())],
+        [forged_signature, expired_signature, signature, signature],
+        {"from": user},
+    )
+    assert [event["reason"] for event in tx.events["OrderFailed"]] == [
+        "Invalid order signature", "Order expired", "Invalid order nonce",
+    ]
+    assert len(tx.events["OrderExecuted"]) == 1
+    assert nft_game.balanceOf(knight, 0) == 1
+    assert nft_game.orderDeposits(knight) == nft_game.ratesForPublicMint(0)
+    # signed but unpaid order consumes its nonce, so it cannot be replayed once the knight deposits
+    unpaid, unpaid_signature = sign_order(nft_game, knight, ORDER_MINT, 0, 2)
+    tx = nft_game.executeOrders([tuple(unpaid.values())], [unpaid_signature], {"from": user})
+    assert tx.events["OrderFailed"]["reason"] == "Not enough deposit for order"
+    assert nft_game.orderNonces(knight) == 2
+    # deposits are not withdrawn by the admin, only by the knight
+    nft_game.withdrawOrderDeposit(nft_game.ratesForPublicMint(0), {"from": knight})
+    assert nft_game.totalOrderDeposits() == 0
@@ -0,0 +1,75 @@
+from scripts.replay import export_trace, save_trace, load_trace, replay, compare_gas, FULFILL
+from scripts.helpers import get_contract, get_request_ids, fund_with_link, fulfill_randomness_locally
+from brownie import config, network, MediavalSTRVGameV2, MediavalSTRVGameV3
+from web3 import Web3
+
+MINTER_ROLE = Web3.keccak(text="MINTER_ROLE")
+
+
+def deploy_traced_game(owner, user):
+    nft_game = MediavalSTRVGameV2.deploy(
+        get_contract("vrf_coordinator").address,
+        get_contract("link_token").address,
+        config["networks"][network.show_active()]["keyhash"],
+        config["networks"][network.show_active()]["fee"],
+        {"from": owner},
+        )
+    fund_with_link(nft_game.address, owner)
+    nft_game.grantRole(MINTER_ROLE, owner, {"from": owner})
+    nft_game.mint(user, 1, 3, {"from": owner})
+    nft_game.publicMint(1, 2, {"from": user, "value": Web3.toWei(0.2, "ether")})
+    tx = nft_game.burnToGainGear(1, 2, {"from": user})
+    fulfill_randomness_locally(nft_game, get_request_ids(tx), randomness=1)
+    tx = nft_game.burnToGainGearBatch(1, 3, {"from": user})
+    fulfill_randomness_locally(nft_game, get_request_ids(tx), randomness=12345)
+    return nft_game
+
+
+def test_exported_trace_replays_against_both_versions(owner, user, tmp_path):
+    # Arrange
+    nft_game = deploy_traced_game(owner, user)
+    trace_file = tmp_path / "trace.json"
+    save_trace(export_trace(nft_game.address, nft_game.tx.block_number), trace_file)
+    trace = load_trace(trace_file)
+    # Act
+    results = {}
+    games = {}
+    for contract_type in (MediavalSTRVGameV2, MediavalSTRVGameV3):
+        games[contract_type._name], results[contract_type._name] = replay(trace, contract_type)
+    diff = compare_gas(results)
+    # Assert
+    assert trace["admin"] == owner
+    assert [call["function"] for call in trace["calls"]] == [
+        "grantRole", "mint", "publicMint", "burnToGainGear", FULFILL, FULFILL, "burnToGainGearBatch", FULFILL,
+    ]
+    for version_results in results.values():
+        assert all(result["status"] == 1 for result in version_results)
+    # recorded randomness is fed back -> same gears won
+    for game in games.values():
+        for id in range(3):
+            assert game.balanceOf(user, id) == nft_game.balanceOf(user, id)
+    assert diff["burnToGainGear"]["calls"] == 1
+    assert diff[FULFILL]["calls"] == 3
+    for row in diff.values():
+        assert all(stats["avg_gas"] and not stats["status_mismatches"] for stats in row["versions"].values())
+
+
+def test_calls_missing_in_replayed_version_are_reported_as_unsupported(owner, user):
+    # Arrange - sword_lottery is public in V2 only
+    trace = {
+        "admin": owner.address,
+        "key_hash": config["networks"][network.show_active()]["keyhash"],
+        "fee": config["networks"][network.show_active()]["fee"],
+        "calls": [{
+            "block": 1, "tx_index": 0, "tx_hash": None, "sender": user.address, "function": "sword_lottery",
+            "args": [user.address], "value": 0, "status": 1, "gas_used": 100000, "request_ids": [],
+        }],
+    }
+    # Act
+    _, results = replay(trace, MediavalSTRVGameV3)
+    diff = compare_gas({"MediavalSTRVGameV3": results})
+    # Assert
+    assert results[0]["unsupported"]
+    assert diff["sword_lottery"]["versions"]["MediavalSTRVGameV3"] == {
+        "avg_gas": None, "reverted": 0, "status_mismatches": 0, "unsupported": 1,
+    }
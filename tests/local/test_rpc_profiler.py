@@ -0,0 +1,32 @@
+from scripts.rpc_profiler import RpcProfiler
+from brownie import web3
+
+
+def test_profiler_counts_calls_per_method_and_call_site(nft_game, user):
+    # Act
+    with RpcProfiler() as profiler:
+        for _ in range(3):
+            nft_game.balanceOf(user, 0)
+        web3.eth.block_number
+    # Assert
+    report = profiler.report()
+    assert report["methods"]["eth_call"]["count"] == 3
+    assert report["methods"]["eth_blockNumber"]["count"] >= 1
+    call_site = next(site for site in report["call_sites"] if site["method"] == "eth_call")
+    assert call_site["call_site"].startswith("tests/local/test_rpc_profiler.py")
+    assert call_site["count"] == 3
+    # the same balance was read three times
+    assert any(request["method"] == "eth_call" and request["count"] == 3 for request in report["repeated_requests"])
+
+
+def test_profiler_is_removed_after_stop(nft_game, user):
+    # Arrange
+    profiler = RpcProfiler().start()
+    nft_game.balanceOf(user, 0)
+    profiler.stop()
+    calls = profiler.total_calls
+    # Act
+    nft_game.balanceOf(user, 0)
+    # Assert
+    assert calls > 0
+    assert profiler.total_calls == calls
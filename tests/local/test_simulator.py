@@ -0,0 +1,48 @@
+from web3 import Web3
+from brownie import network
+from scripts.helpers import get_contract, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from scripts.simulator import GameParameters, Demand, roll_outcomes, batch_gears_won, simulate
+import pytest, random
+
+RATE = 0.1
+SAMPLES = 10
+
+
+def test_simulator_agrees_with_vrf_callbacks(nft_game, owner, user):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip("Only for LOCAL testing")
+    # Arrange
+    rng = random.Random(42)
+    words = [rng.randint(1, 2 ** 256 - 1) for _ in range(SAMPLES)]
+    threshold = nft_game.mintingThreshold()
+    BATCH = 5
+    nft_game.publicMint(1, SAMPLES * (1 + BATCH), {"from": user, "value": Web3.toWei(SAMPLES*(1+BATCH)*RATE, "ether")})
+    vrf_coordinator = get_contract("vrf_coordinator")
+    expected = roll_outcomes(words, threshold)
+    for word, won in zip(words, expected):
+        # Act 1 - single roll
+        sword_balance_before = nft_game.balanceOf(user, 2)
+        tx = nft_game.burnToGainGear(1, 1, {"from": user})
+        vrf_coordinator.callBackWithRandomness(tx.events["RequestedRandomness"]["requestId"], word, nft_game.address, {"from": owner})
+        # Assert 1
+        assert nft_game.balanceOf(user, 2) - sword_balance_before == int(won)
+        # Act 2 - batch of rolls from one random word
+        sword_balance_before = nft_game.balanceOf(user, 2)
+        tx = nft_game.burnToGainGearBatch(1, BATCH, {"from": user})
+        vrf_coordinator.callBackWithRandomness(tx.events["RequestedRandomness"]["requestId"], word, nft_game.address, {"from": owner})
+        # Assert 2
+        assert nft_game.balanceOf(user, 2) - sword_balance_before == batch_gears_won(word, BATCH, threshold)
+
+
+def test_simulator_respects_public_mint_cap():
+    # Arrange
+    parameters = GameParameters(max_available_for_public_mint=100)
+    demand = Demand(orders=200, burn_share=1, burn_batch=10)
+    # Act
+    results = simulate(parameters, demand, simulations=1000, seed=1, chunk_size=300)
+    # Assert - orders not fitting are rejected, later smaller ones fill the supply up to the cap
+    minted_publicly = results["supply"].sum(axis=1) + results["burnt"] - results["won"]
+    assert len(minted_publicly) == 1000
+    assert (minted_publicly == 100).all()
+    assert (results["won"] <= results["burnt"]).all()
+    assert (results["link_spend"] == -(-results["burnt"] // 10) * parameters.fee).all()
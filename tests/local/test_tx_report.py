@@ -0,0 +1,67 @@
+from scripts.helpers import fund_with_link
+from scripts.tx_report import TransactionRecorder, recorder, send_transaction
+from brownie import chain, exceptions
+import csv, json
+import pytest
+
+
+def test_helpers_record_gas_and_latency(nft_game, owner):
+    # Arrange
+    recorded = len(recorder.records)
+    # Act
+    funding_tx = fund_with_link(nft_game.address, owner)
+    # Assert
+    record = recorder.records[recorded]
+    assert record["txid"] == funding_tx.txid
+    assert record["function"] == "LinkToken.transfer"
+    assert record["gas_used"] == funding_tx.gas_used
+    assert record["gas_used"] <= record["gas_limit"]
+    assert record["latency"] > 0
+    assert record["status"] == 1
+
+
+def test_reverted_transaction_is_recorded_with_revert_reason(nft_game, user):
+    # Arrange
+    recorded = len(recorder.records)
+    # Act
+    with pytest.raises(exceptions.VirtualMachineError):
+        send_transaction(nft_game.publicMint, 0, 1, {"from": user, "value": 0})
+    # Assert
+    record = recorder.records[recorded]
+    assert record["status"] != 1
+    assert "Not enough ETH" in record["revert_msg"]
+
+
+def test_write_report_aggregates_per_function(nft_game, owner, tmp_path):
+    # Arrange
+    tx_recorder = TransactionRecorder()
+    txs = [nft_game.setBurnGearParameters(80, 1, 2, {"from": owner}) for _ in range(3)]
+    # Act
+    tx_recorder.record_history(txs)
+    json_path, csv_path = tx_recorder.write_report(str(tmp_path))
+    # Assert
+    with open(json_path) as file:
+        summary = json.load(file)["summary"]
+    stats = summary["MediavalSTRVGameV3.setBurnGearParameters"]
+    assert stats["count"] == 3
+    assert stats["reverted"] == 0
+    assert sum(stats["gas_histogram"].values()) == 3
+    assert stats["latency_p50"] is None
+    with open(csv_path) as file:
+        assert len(list(csv.DictReader(file))) == 3
+
+
+def test_transaction_sent_again_after_revert_is_recorded_again(nft_game, owner):
+    # Arrange
+    tx_recorder = TransactionRecorder()
+    tx = nft_game.setBurnGearParameters(80, 1, 2, {"from": owner})
+    tx_recorder.record(tx)
+    # Act - same sender, nonce and data -> same txid
+    chain.undo()
+    tx_recorder.chain_reverted()
+    tx_again = nft_game.setBurnGearParameters(80, 1, 2, {"from": owner})
+    tx_recorder.record(tx_again)
+    tx_recorder.record(tx_again)
+    # Assert
+    assert tx_again.txid == tx.txid
+    assert len(tx_recorder.records) == 2